@@ -1,18 +1,66 @@
 from __future__ import annotations
 
+import json
 import os
 import platform
 import socket
-from typing import Dict, List, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 
 import docker
 import psutil  # type: ignore
 from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from .services.inventory import (
+    SUMMARY_FIELDS,
+    ContainerInventory,
+    project,
+    summarize_container,
+)
+from .services.warm_pool import WarmPool, is_pool_container, parse_pool_spec
+from .wire import WireEncodingMiddleware
 
 AGENT_TOKEN = os.getenv("AGENT_TOKEN", "")
 SERVER_NAME = os.getenv("SERVER_NAME", platform.node())
+INVENTORY_ENABLED = os.getenv("AGENT_INVENTORY_ENABLED", "1") not in {"0", "false", "no"}
+COMPRESS_MIN_BYTES = int(os.getenv("AGENT_COMPRESS_MIN_BYTES", "1024"))
+ZSTD_LEVEL = int(os.getenv("AGENT_ZSTD_LEVEL", "3"))
+MAX_CONTAINER_PAGE = 500
+# Comma separated images to keep pulled; empty disables the warm pool.
+WARM_POOL = os.getenv("AGENT_WARM_POOL", "")
+WARM_POOL_CHECK_SECONDS = float(os.getenv("AGENT_WARM_POOL_CHECK_SECONDS", "30"))
+WARM_POOL_REFRESH_SECONDS = float(os.getenv("AGENT_WARM_POOL_REFRESH_SECONDS", str(6 * 60 * 60)))
+
+
+def _get_docker_client() -> docker.DockerClient:
+    return docker.from_env()
+
+
+inventory = ContainerInventory(_get_docker_client)
+warm_pool = WarmPool(
+    _get_docker_client,
+    parse_pool_spec(WARM_POOL),
+    check_interval=WARM_POOL_CHECK_SECONDS,
+    refresh_interval=WARM_POOL_REFRESH_SECONDS,
+)
 
-app = FastAPI(title="KWS Agent", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INVENTORY_ENABLED:
+        inventory.start()
+    warm_pool.start()
+    yield
+    warm_pool.stop()
+    inventory.stop()
+
+
+app = FastAPI(title="KWS Agent", version="0.1.0", lifespan=lifespan)
+app.add_middleware(
+    WireEncodingMiddleware, minimum_size=COMPRESS_MIN_BYTES, zstd_level=ZSTD_LEVEL
+)
 
 
 def require_token(request: Request):
@@ -25,10 +73,6 @@ def require_token(request: Request):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
-def _get_docker_client() -> docker.DockerClient:
-    return docker.from_env()
-
-
 def _get_ip_addresses() -> List[str]:
     addresses: List[str] = []
     try:
@@ -43,13 +87,17 @@ def _get_ip_addresses() -> List[str]:
 
 def _docker_info() -> Dict[str, int]:
     running = total = 0
-    try:
-        client = _get_docker_client()
-        containers = client.containers.list(all=True)
-        total = len(containers)
-        running = len([c for c in containers if c.status == "running"])
-    except Exception:
-        running = total = 0
+    if inventory.ready:
+        counts = inventory.counts()
+        running, total = counts["running"], counts["total"]
+    else:
+        try:
+            client = _get_docker_client()
+            containers = [item for item in client.api.containers(all=True) if not is_pool_container(item)]
+            total = len(containers)
+            running = len([c for c in containers if c.get("State") == "running"])
+        except Exception:
+            running = total = 0
     return {
         "docker_running_containers": running,
         "docker_total_containers": total,
@@ -92,6 +140,8 @@ def metrics():
         "cpu_percent": cpu,
         "memory_percent": mem.percent,
         "disk_percent": disk.percent,
+        "cpu_count": psutil.cpu_count() or 1,
+        "memory_total_mb": mem.total // (1024 * 1024),
         **docker_stats,
     }
 
@@ -106,11 +156,24 @@ def docker_run(payload: Dict[str, Optional[object]], request: Request = Depends(
     ports = payload.get("ports") or {}
     volumes = payload.get("volumes") or None
     networks = payload.get("networks") or []
+    healthcheck = payload.get("healthcheck") or None
+    timings: Dict[str, float] = {}
+    warm = False
+    if payload.get("warm"):
+        started = time.perf_counter()
+        warm = warm_pool.claim(client, image)
+        timings["warm_claim_ms"] = (time.perf_counter() - started) * 1000
+    # Callers that already streamed the image through /docker/pull skip this,
+    # and a warm pool hit means the image was refreshed in the background.
+    if payload.get("pull", True) and not warm:
+        started = time.perf_counter()
+        try:
+            client.images.pull(image)
+        except Exception:
+            pass
+        timings["image_pull_ms"] = (time.perf_counter() - started) * 1000
     try:
-        client.images.pull(image)
-    except Exception:
-        pass
-    try:
+        started = time.perf_counter()
         container = client.containers.run(
             image,
             name=name,
@@ -118,17 +181,46 @@ def docker_run(payload: Dict[str, Optional[object]], request: Request = Depends(
             labels=labels,
             ports=ports,
             volumes=volumes,
+            healthcheck=healthcheck,
             detach=True,
         )
+        timings["container_start_ms"] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
         for net in networks:
             try:
                 network = client.networks.get(net)
                 network.connect(container)
             except Exception:
                 continue
+        timings["network_connect_ms"] = (time.perf_counter() - started) * 1000
     except docker.errors.DockerException as exc:
         raise HTTPException(status_code=400, detail=str(exc))
-    return {"id": container.id}
+    return {"id": container.id, "timings": timings, "warm": warm}
+
+
+@app.post("/docker/pull")
+def docker_pull(payload: Dict[str, str], request: Request = Depends(require_token)):
+    """Pull an image, streaming the daemon's progress as newline-delimited JSON."""
+
+    image = payload.get("image")
+    if not image:
+        raise HTTPException(status_code=400, detail="image required")
+    client = _get_docker_client()
+    repository, tag = docker.utils.parse_repository_tag(image)
+
+    def _progress():
+        try:
+            for event in client.api.pull(repository, tag=tag or "latest", stream=True, decode=True):
+                yield json.dumps(event) + "\n"
+        except docker.errors.DockerException as exc:
+            yield json.dumps({"error": str(exc)}) + "\n"
+
+    return StreamingResponse(_progress(), media_type="application/x-ndjson")
+
+
+@app.get("/docker/warm-pool")
+def docker_warm_pool(request: Request = Depends(require_token)):
+    return warm_pool.status()
 
 
 @app.post("/docker/stop")
@@ -159,6 +251,42 @@ def docker_remove(payload: Dict[str, str], request: Request = Depends(require_to
     return {"status": "removed"}
 
 
+@app.get("/docker/inspect")
+def docker_inspect(container: str, request: Request = Depends(require_token)):
+    client = _get_docker_client()
+    try:
+        attrs = client.api.inspect_container(container)
+    except docker.errors.NotFound:
+        return {"exists": False}
+    except docker.errors.DockerException as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    state = attrs.get("State") or {}
+    return {
+        "exists": True,
+        "id": attrs.get("Id"),
+        "name": (attrs.get("Name") or "").lstrip("/"),
+        "image_id": attrs.get("Image"),
+        "state": state.get("Status"),
+        "running": bool(state.get("Running")),
+        "health": (state.get("Health") or {}).get("Status"),
+        "exit_code": state.get("ExitCode"),
+    }
+
+
+@app.post("/docker/rename")
+def docker_rename(payload: Dict[str, str], request: Request = Depends(require_token)):
+    container_ref = payload.get("container")
+    new_name = payload.get("name")
+    if not container_ref or not new_name:
+        raise HTTPException(status_code=400, detail="container and name required")
+    client = _get_docker_client()
+    try:
+        client.containers.get(container_ref).rename(new_name)
+    except docker.errors.DockerException as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"status": "renamed"}
+
+
 @app.get("/docker/logs")
 def docker_logs(container: str, tail: int = 200):
     client = _get_docker_client()
@@ -168,3 +296,49 @@ def docker_logs(container: str, tail: int = 200):
     except docker.errors.DockerException as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     return {"logs": logs}
+
+
+def _requested_fields(raw: Any) -> Optional[List[str]]:
+    if not raw:
+        return None
+    fields = [raw] if isinstance(raw, str) else [str(item) for item in raw]
+    unknown = [field for field in fields if field not in SUMMARY_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+@app.post("/docker/containers")
+def docker_containers(payload: Dict[str, Any], request: Request = Depends(require_token)):
+    """List containers with filters applied before anything is serialized.
+
+    Payload: ``filters`` (docker-style ``label``/``status``/``name``/``id``),
+    ``fields`` to project each entry, and ``offset``/``limit`` for paging. The
+    inventory answers when it is live; otherwise the filters are pushed down
+    to the daemon with a sparse listing.
+    """
+
+    filters = payload.get("filters") or {}
+    fields = _requested_fields(payload.get("fields"))
+    offset = max(0, int(payload.get("offset") or 0))
+    limit = payload.get("limit")
+    limit = max(1, min(int(limit), MAX_CONTAINER_PAGE)) if limit else MAX_CONTAINER_PAGE
+    if inventory.ready:
+        matched = inventory.list(
+            labels=filters.get("label"),
+            status=filters.get("status"),
+            names=filters.get("name"),
+            ids=filters.get("id"),
+            fields=fields,
+        )
+    else:
+        client = _get_docker_client()
+        try:
+            raw = client.api.containers(all=True, filters=filters)
+        except docker.errors.DockerException as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        raw.sort(key=lambda item: (item.get("Created") or 0, item.get("Id", "")))
+        matched = [project(summarize_container(item), fields) for item in raw if not is_pool_container(item)]
+    page = matched[offset : offset + limit]
+    next_offset = offset + len(page) if offset + len(page) < len(matched) else None
+    return {"containers": page, "total": len(matched), "next_offset": next_offset}
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import docker
+
+from .warm_pool import is_pool_container
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ("id", "name", "image", "state", "status", "labels", "created", "ports")
+
+# Container actions that can change what we keep in the inventory. Everything
+# else (exec_*, attach, top, resize, ...) is noise for our purposes.
+TRACKED_ACTIONS = {
+    "create",
+    "start",
+    "restart",
+    "stop",
+    "die",
+    "kill",
+    "oom",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+    "health_status",
+}
+
+
+def summarize_container(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an inventory entry from a list-format (sparse) container payload."""
+
+    names = attrs.get("Names") or []
+    name = names[0].lstrip("/") if names else ""
+    return {
+        "id": attrs.get("Id", ""),
+        "name": name,
+        "image": attrs.get("Image", ""),
+        "state": attrs.get("State", ""),
+        "status": attrs.get("Status", ""),
+        "labels": dict(attrs.get("Labels") or {}),
+        "created": attrs.get("Created"),
+        "ports": list(attrs.get("Ports") or []),
+    }
+
+
+def project(entry: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    if not fields:
+        return dict(entry)
+    return {field: entry[field] for field in fields if field in entry}
+
+
+def _normalize_label_filters(raw: Any) -> List[str]:
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        return [raw]
+    if isinstance(raw, dict):
+        return [f"{key}={value}" if value is not None else key for key, value in raw.items()]
+    return [str(item) for item in raw]
+
+
+def _as_list(raw: Any) -> List[str]:
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        return [raw]
+    return [str(item) for item in raw]
+
+
+def _matches_name(name: str, patterns: List[str]) -> bool:
+    # The daemon treats name filters as regular expressions; mirror that.
+    for pattern in patterns:
+        try:
+            if re.search(pattern, name):
+                return True
+        except re.error:
+            if pattern in name:
+                return True
+    return False
+
+
+def _matches_labels(labels: Dict[str, str], label_filters: List[str]) -> bool:
+    for expression in label_filters:
+        key, sep, value = expression.partition("=")
+        if key not in labels:
+            return False
+        if sep and labels[key] != value:
+            return False
+    return True
+
+
+class ContainerInventory:
+    """In-memory view of the local containers kept current from the docker events stream.
+
+    The inventory is built once with a sparse ``containers`` list call and then
+    patched per event, so counts and filtered listings never hit the daemon.
+    Leftover warm pool placeholders are not workloads and are left out.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], docker.DockerClient],
+        retry_delay: float = 5.0,
+    ):
+        self._client_factory = client_factory
+        self._retry_delay = retry_delay
+        self._containers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stream: Any = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="container-inventory", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:  # pylint: disable=broad-except
+                pass
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def wait_ready(self, timeout: float) -> bool:
+        return self._ready.wait(timeout)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            total = len(self._containers)
+            running = sum(1 for entry in self._containers.values() if entry["state"] == "running")
+        return {"running": running, "total": total}
+
+    def list(
+        self,
+        labels: Any = None,
+        status: Any = None,
+        fields: Optional[Iterable[str]] = None,
+        names: Any = None,
+        ids: Any = None,
+    ) -> List[Dict[str, Any]]:
+        label_filters = _normalize_label_filters(labels)
+        statuses = set(_as_list(status))
+        name_filters = _as_list(names)
+        id_filters = _as_list(ids)
+        with self._lock:
+            entries = list(self._containers.values())
+        entries.sort(key=lambda item: (item.get("created") or 0, item.get("id", "")))
+        results: List[Dict[str, Any]] = []
+        for entry in entries:
+            if statuses and entry["state"] not in statuses:
+                continue
+            if label_filters and not _matches_labels(entry["labels"], label_filters):
+                continue
+            if name_filters and not _matches_name(entry["name"], name_filters):
+                continue
+            if id_filters and not any(entry["id"].startswith(ref) for ref in id_filters):
+                continue
+            results.append(project(entry, fields))
+        return results
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                client = self._client_factory()
+                # Subscribe before listing so changes made while the snapshot is
+                # being built are replayed from the stream instead of lost.
+                since = int(time.time())
+                self._stream = client.events(
+                    since=since, filters={"type": "container"}, decode=True
+                )
+                self._rebuild(client)
+                self._ready.set()
+                for event in self._stream:
+                    if self._stopping.is_set():
+                        break
+                    self._apply_event(client, event)
+            except Exception as exc:  # pylint: disable=broad-except
+                if self._stopping.is_set():
+                    break
+                logger.warning("Container event stream interrupted: %s", exc)
+            finally:
+                self._ready.clear()
+                self._stream = None
+            self._stopping.wait(self._retry_delay)
+
+    def _rebuild(self, client: docker.DockerClient) -> None:
+        raw = client.api.containers(all=True)
+        snapshot = {item["Id"]: summarize_container(item) for item in raw if not is_pool_container(item)}
+        with self._lock:
+            self._containers = snapshot
+        logger.info("Container inventory built with %s containers", len(snapshot))
+
+    def _apply_event(self, client: docker.DockerClient, event: Dict[str, Any]) -> None:
+        if event.get("Type") != "container":
+            return
+        action = str(event.get("Action") or event.get("status") or "").split(":", 1)[0]
+        container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if not container_id:
+            return
+        if action == "destroy":
+            with self._lock:
+                self._containers.pop(container_id, None)
+            return
+        if action not in TRACKED_ACTIONS:
+            return
+        self._refresh(client, container_id)
+
+    def _refresh(self, client: docker.DockerClient, container_id: str) -> None:
+        try:
+            raw = client.api.containers(all=True, filters={"id": container_id})
+        except docker.errors.DockerException as exc:
+            logger.debug("Failed to refresh container %s: %s", container_id, exc)
+            return
+        with self._lock:
+            if raw and not is_pool_container(raw[0]):
+                self._containers[container_id] = summarize_container(raw[0])
+            else:
+                self._containers.pop(container_id, None)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import docker
+
+logger = logging.getLogger(__name__)
+
+# Earlier agents kept stopped placeholder containers under this label; they
+# are removed on start and never count as workloads.
+POOL_LABEL = "kws.warm-pool"
+
+
+def is_pool_container(attrs: Dict[str, Any]) -> bool:
+    """True for a list-format container payload carrying the warm pool label."""
+
+    return POOL_LABEL in (attrs.get("Labels") or {})
+
+
+def parse_pool_spec(raw: str) -> List[str]:
+    """Parse images separated by commas, e.g. ``nginx:alpine,node:18-alpine``.
+
+    The ``image=count`` form of earlier agents is still accepted; the count is
+    ignored since nothing is pre-created any more.
+    """
+
+    images: List[str] = []
+    for item in (raw or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        image, sep, count = item.rpartition("=")
+        if not sep or not count.isdigit():
+            image = item
+        if image and image not in images:
+            images.append(image)
+    return images
+
+
+class WarmPool:
+    """Keeps popular images pulled and current so a first deployment skips the registry.
+
+    Docker cannot change the labels or environment of an existing container,
+    so no containers are pre-created: the run call creates the real one, and
+    what the pool saves is the pull. Images are re-pulled in the background
+    every ``refresh_interval`` seconds. A claim is a hit when the local image
+    is still the one last refreshed; a miss wakes the loop to pull it again.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], docker.DockerClient],
+        images: List[str],
+        check_interval: float = 30.0,
+        refresh_interval: float = 6 * 60 * 60,
+    ):
+        self._client_factory = client_factory
+        self.images = list(images)
+        self._check_interval = check_interval
+        self._refresh_interval = refresh_interval
+        self._image_ids: Dict[str, str] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "misses": 0, "pulls": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.images)
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="warm-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def claim(self, client: docker.DockerClient, image: str) -> bool:
+        """Return True when ``image`` is warm locally and the run call can skip its pull."""
+
+        if image not in self.images:
+            return False
+        with self._lock:
+            current = self._image_ids.get(image)
+        local = None
+        if current:
+            try:
+                local = client.api.inspect_image(image)["Id"]
+            except docker.errors.DockerException as exc:
+                logger.debug("Warm pool image %s not present locally: %s", image, exc)
+        with self._lock:
+            if current and local == current:
+                self.stats["hits"] += 1
+                return True
+            self.stats["misses"] += 1
+            # Pruned or retagged behind our back; pull it again.
+            self._refreshed_at.pop(image, None)
+        self._wakeup.set()
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            images = [
+                {
+                    "image": image,
+                    "image_id": self._image_ids.get(image),
+                    "refreshed_seconds_ago": (
+                        round(now - self._refreshed_at[image]) if image in self._refreshed_at else None
+                    ),
+                }
+                for image in self.images
+            ]
+            stats = dict(self.stats)
+        return {"enabled": self.enabled, "images": images, **stats}
+
+    def _run(self) -> None:
+        try:
+            self._remove_leftovers(self._client_factory())
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Failed to remove leftover warm pool containers: %s", exc)
+        while not self._stopping.is_set():
+            try:
+                self.refresh(self._client_factory())
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Warm pool refresh failed: %s", exc)
+            self._wakeup.wait(self._check_interval)
+            self._wakeup.clear()
+
+    def refresh(self, client: docker.DockerClient) -> None:
+        """Pull every image that is missing or due for a refresh."""
+
+        for image in self.images:
+            if self._stopping.is_set():
+                return
+            now = time.monotonic()
+            with self._lock:
+                refreshed_at = self._refreshed_at.get(image)
+            if refreshed_at is not None and now - refreshed_at < self._refresh_interval:
+                continue
+            try:
+                repository, tag = docker.utils.parse_repository_tag(image)
+                client.api.pull(repository, tag=tag or "latest")
+                image_id = client.api.inspect_image(image)["Id"]
+            except docker.errors.DockerException as exc:
+                logger.warning("Warm pool pull of %s failed: %s", image, exc)
+                continue
+            with self._lock:
+                self._image_ids[image] = image_id
+                self._refreshed_at[image] = now
+                self.stats["pulls"] += 1
+
+    @staticmethod
+    def _remove_leftovers(client: docker.DockerClient) -> None:
+        for item in client.api.containers(all=True, filters={"label": POOL_LABEL}):
+            if item.get("State") == "created":
+                client.api.remove_container(item["Id"], force=True)
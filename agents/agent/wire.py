@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # Optional codecs; the agent falls back to plain JSON/gzip without them.
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _parse_qualities(header: str) -> Dict[str, float]:
+    qualities: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[token] = quality
+    return qualities
+
+
+def negotiate(accept: str, accept_encoding: str) -> Tuple[bool, Optional[str]]:
+    """Return ``(use_msgpack, content_encoding)`` for the given request headers."""
+
+    media = _parse_qualities(accept)
+    use_msgpack = msgpack is not None and media.get(MSGPACK_MEDIA_TYPE, 0.0) > 0.0
+    encodings = _parse_qualities(accept_encoding)
+    encoding: Optional[str] = None
+    if zstandard is not None and encodings.get("zstd", 0.0) > 0.0:
+        encoding = "zstd"
+    elif encodings.get("gzip", 0.0) > 0.0:
+        encoding = "gzip"
+    return use_msgpack, encoding
+
+
+def compress(body: bytes, encoding: str, zstd_level: int = 3, gzip_level: int = 6) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class WireEncodingMiddleware:
+    """Negotiate msgpack bodies and gzip/zstd compression for JSON responses.
+
+    Only buffered ``application/json`` responses are re-encoded; streaming
+    responses and anything already carrying a ``Content-Encoding`` pass through.
+    Bodies smaller than ``minimum_size`` are sent uncompressed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        zstd_level: int = 3,
+        gzip_level: int = 6,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.zstd_level = zstd_level
+        self.gzip_level = gzip_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        use_msgpack, encoding = negotiate(
+            headers.get("accept", ""), headers.get("accept-encoding", "")
+        )
+        if not use_msgpack and encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                response_headers = Headers(raw=message["headers"])
+                content_type = response_headers.get("content-type", "")
+                if response_headers.get("content-encoding") or not content_type.startswith(
+                    "application/json"
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start_message is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_encoded(send, start_message, b"".join(chunks), use_msgpack, encoding)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_encoded(
+        self,
+        send: Send,
+        start_message: Message,
+        body: bytes,
+        use_msgpack: bool,
+        encoding: Optional[str],
+    ) -> None:
+        response_headers = MutableHeaders(raw=list(start_message["headers"]))
+        if use_msgpack and body:
+            body = msgpack.packb(json.loads(body), use_bin_type=True)
+            response_headers["content-type"] = MSGPACK_MEDIA_TYPE
+        if encoding and len(body) >= self.minimum_size:
+            body = compress(body, encoding, self.zstd_level, self.gzip_level)
+            response_headers["content-encoding"] = encoding
+        response_headers.add_vary_header("Accept")
+        response_headers.add_vary_header("Accept-Encoding")
+        response_headers["content-length"] = str(len(body))
+        await send({**start_message, "headers": response_headers.raw})
+        await send({"type": "http.response.body", "body": body, "more_body": False})
@@ -3,8 +3,11 @@ from fastapi import APIRouter
 from .routes import auth, health
 from .v1 import apps as apps_v1
 from .v1 import alerts as alerts_v1
+from .v1 import backups as backups_v1
+from .v1 import deployments as deployments_v1
 from .v1 import dns as dns_v1
 from .v1 import domains as domains_v1
+from .v1 import jobs as jobs_v1
 from .v1 import logs as logs_v1
 from .v1 import servers as servers_v1
 
@@ -17,5 +20,8 @@ api_router.include_router(apps_v1.router, prefix="/api/v1")
 api_router.include_router(alerts_v1.router, prefix="/api/v1")
 api_router.include_router(logs_v1.router, prefix="/api/v1")
 api_router.include_router(servers_v1.router, prefix="/api/v1")
+api_router.include_router(backups_v1.router, prefix="/api/v1")
+api_router.include_router(jobs_v1.router, prefix="/api/v1")
+api_router.include_router(deployments_v1.router, prefix="/api/v1")
 
 __all__ = ["api_router"]
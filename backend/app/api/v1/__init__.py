@@ -3,6 +3,7 @@ from .apps import router as apps_router
 from .backups import router as backups_router
 from .dns import router as dns_router
 from .domains import router as domains_router
+from .jobs import router as jobs_router
 from .logs import router as logs_router
 from .servers import router as servers_router
 
@@ -11,6 +12,7 @@ __all__ = [
     "apps_router",
     "dns_router",
     "domains_router",
+    "jobs_router",
     "logs_router",
     "servers_router",
 ]
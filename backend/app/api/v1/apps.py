@@ -3,22 +3,37 @@ from __future__ import annotations
 from typing import List, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from redis.exceptions import RedisError
+from rq.job import Job
 from sqlalchemy.orm import Session, selectinload
 
+from ...core.config import get_settings
 from ...core.database import get_db
 from ...models import AppDomainMapping, AppInstance, Application, Domain, Server
 from ...schemas.app_schemas import (
     AppInstanceCreate,
     AppInstanceRead,
     AppInstanceDomainAttachRequest,
+    AppInstanceJobAccepted,
+    AppInstanceScaleRequest,
     ApplicationCreate,
     ApplicationRead,
+    BulkOperationAccepted,
+    BulkOperationRequest,
     DomainMappingInput,
+    PlacementCandidate,
+    PlacementPreview,
+    PlacementPreviewRequest,
+    RollingUpgradeAccepted,
+    RollingUpgradeRequest,
 )
+from ...services import deployment_events, deployment_jobs, placement_service
 from ...services.app_blueprints import get_app_blueprint, list_app_blueprints
+from ...services.bulk_operations import select_targets
 from ...services.deployment_engine import DeploymentEngine
 from ...services.subdomain_service import SubdomainService
+from .streaming import event_stream_response
 
 router = APIRouter(prefix="/apps", tags=["apps"])
 engine = DeploymentEngine()
@@ -29,6 +44,22 @@ def blueprints():
     return list_app_blueprints()
 
 
+@router.post("/placement/preview", response_model=PlacementPreview)
+def preview_placement(payload: PlacementPreviewRequest, db: Session = Depends(get_db)):
+    try:
+        candidates = placement_service.score_servers(
+            db, payload.cpu_request, payload.memory_request_mb, payload.strategy
+        )
+    except placement_service.PlacementError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    selected = next((candidate for candidate in candidates if candidate["eligible"]), None)
+    return PlacementPreview(
+        strategy=payload.strategy or get_settings().placement_strategy,
+        selected_server_id=selected["server_id"] if selected else None,
+        candidates=[PlacementCandidate(**candidate) for candidate in candidates],
+    )
+
+
 @router.get("/", response_model=List[ApplicationRead])
 def list_applications(db: Session = Depends(get_db)):
     return db.query(Application).all()
@@ -60,6 +91,39 @@ def delete_application(app_id: int, db: Session = Depends(get_db)):
     db.commit()
 
 
+@router.post(
+    "/{app_id}/upgrade",
+    response_model=RollingUpgradeAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def upgrade_application(app_id: int, payload: RollingUpgradeRequest, db: Session = Depends(get_db)):
+    application = db.get(Application, app_id)
+    if not application:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Application not found")
+    image = payload.image or application.default_image
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No image given and the application has no default"
+        )
+    instance_ids = [
+        instance_id
+        for (instance_id,) in db.query(AppInstance.id)
+        .filter(AppInstance.app_id == app_id, AppInstance.docker_image != image)
+        .order_by(AppInstance.id)
+    ]
+    if not instance_ids:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"All instances already run {image}")
+    options = payload.model_dump(include={"wave_size", "max_failure_rate", "pull_concurrency"})
+    job = _enqueue(deployment_jobs.enqueue_rolling_upgrade, app_id, image, options)
+    return RollingUpgradeAccepted(
+        job_id=job.id,
+        job_status=getattr(job.get_status(refresh=False), "value", "queued"),
+        application_id=app_id,
+        image=image,
+        instance_ids=instance_ids,
+    )
+
+
 @router.get("/instances", response_model=List[AppInstanceRead])
 def list_app_instances(
     server_id: Optional[int] = Query(default=None),
@@ -68,7 +132,8 @@ def list_app_instances(
     db: Session = Depends(get_db),
 ):
     query = db.query(AppInstance).options(
-        selectinload(AppInstance.domain_mappings).selectinload(AppDomainMapping.domain)
+        selectinload(AppInstance.domain_mappings).selectinload(AppDomainMapping.domain),
+        selectinload(AppInstance.replica_containers),
     )
     if server_id is not None:
         query = query.filter(AppInstance.server_id == server_id)
@@ -87,10 +152,22 @@ def get_app_instance(instance_id: int, db: Session = Depends(get_db)):
     return app_instance
 
 
-@router.post("/instances", response_model=AppInstanceRead, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/instances",
+    response_model=AppInstanceJobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 def create_app_instance(payload: AppInstanceCreate, db: Session = Depends(get_db)):
     application = db.get(Application, payload.app_id)
-    server = db.get(Server, payload.server_id)
+    if payload.server_id is not None:
+        server = db.get(Server, payload.server_id)
+    else:
+        try:
+            server = placement_service.choose_server(
+                db, payload.cpu_request, payload.memory_request_mb, payload.placement_strategy
+            )
+        except placement_service.PlacementError as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if not application or not server:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Application or server not found")
     prepared_mappings, primary_domain_id = _prepare_domain_payloads(db, payload.domains)
@@ -118,6 +195,9 @@ def create_app_instance(payload: AppInstanceCreate, db: Session = Depends(get_db
         internal_container_name=internal_container_name,
         docker_image=docker_image,
         docker_port=docker_port,
+        replicas=max(1, int(config.get("replicas") or 1)),
+        cpu_request=payload.cpu_request,
+        memory_request_mb=payload.memory_request_mb,
         env_vars=env_vars,
     )
     db.add(app_instance)
@@ -126,12 +206,41 @@ def create_app_instance(payload: AppInstanceCreate, db: Session = Depends(get_db
     db.commit()
     db.refresh(app_instance)
 
-    try:
-        engine.deploy_app_instance(app_instance.id)
-    except Exception as exc:  # pylint: disable=broad-except
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
-    enriched = _app_instance_with_domains(db, app_instance.id)
-    return enriched or app_instance
+    job = _enqueue(deployment_jobs.enqueue_deployment, app_instance.id)
+    return _accepted(db, app_instance.id, job)
+
+
+@router.post(
+    "/instances/bulk",
+    response_model=BulkOperationAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def bulk_app_instance_operation(payload: BulkOperationRequest, db: Session = Depends(get_db)):
+    if not (payload.instance_ids or payload.app_id or payload.server_id or payload.status):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide instance_ids or at least one of app_id, server_id, status",
+        )
+    targets = select_targets(
+        db,
+        instance_ids=payload.instance_ids,
+        app_id=payload.app_id,
+        server_id=payload.server_id,
+        status=payload.status,
+    )
+    if not targets:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No matching app instances")
+    options = payload.model_dump(include={"max_concurrency", "max_per_server", "max_error_rate", "min_samples"})
+    job = _enqueue(
+        deployment_jobs.enqueue_bulk_operation, payload.action, targets, options, payload.force
+    )
+    return BulkOperationAccepted(
+        job_id=job.id,
+        job_status=getattr(job.get_status(refresh=False), "value", "queued"),
+        action=payload.action,
+        total=len(targets),
+        instance_ids=[instance_id for instance_id, _ in targets],
+    )
 
 
 @router.post("/instances/{instance_id}/stop")
@@ -140,11 +249,60 @@ def stop_app_instance(instance_id: int):
     return {"status": "stopped"}
 
 
-@router.post("/instances/{instance_id}/restart", response_model=AppInstanceRead)
-def restart_app_instance(instance_id: int, db: Session = Depends(get_db)):
-    updated = engine.restart_app_instance(instance_id)
-    refreshed = _app_instance_with_domains(db, instance_id)
-    return refreshed or updated
+@router.post(
+    "/instances/{instance_id}/restart",
+    response_model=AppInstanceJobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def restart_app_instance(
+    instance_id: int,
+    force: bool = Query(default=False),
+    db: Session = Depends(get_db),
+):
+    if not db.get(AppInstance, instance_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="AppInstance not found")
+    job = _enqueue(deployment_jobs.enqueue_restart, instance_id, force)
+    return _accepted(db, instance_id, job)
+
+
+@router.post(
+    "/instances/{instance_id}/scale",
+    response_model=AppInstanceJobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def scale_app_instance(
+    instance_id: int,
+    payload: AppInstanceScaleRequest,
+    db: Session = Depends(get_db),
+):
+    instance = db.get(AppInstance, instance_id)
+    if not instance:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="AppInstance not found")
+    # The data directory is host-local and Traefik only routes to local
+    # containers, so replicas stay on the instance's own server.
+    if any(server_id != instance.server_id for server_id in payload.server_ids or []):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Replicas can only run on the instance's server {instance.server_id}",
+        )
+    job = _enqueue(deployment_jobs.enqueue_scale, instance_id, payload.replicas, payload.server_ids)
+    return _accepted(db, instance_id, job)
+
+
+@router.get("/instances/{instance_id}/events")
+def stream_app_instance_events(
+    instance_id: int,
+    follow: bool = Query(default=True),
+    last_event_id: Optional[int] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Server-sent deployment progress for an instance (phases, pull progress, errors)."""
+
+    if not db.get(AppInstance, instance_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="AppInstance not found")
+    return event_stream_response(
+        deployment_events.stream_events(instance_id, last_event_id=last_event_id, follow=follow)
+    )
 
 
 @router.get("/instances/{instance_id}/logs")
@@ -153,7 +311,11 @@ def get_app_logs(instance_id: int, tail: int = 200):
     return {"logs": logs}
 
 
-@router.post("/instances/{instance_id}/domains", response_model=AppInstanceRead)
+@router.post(
+    "/instances/{instance_id}/domains",
+    response_model=AppInstanceJobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 def attach_app_domains(
     instance_id: int,
     payload: AppInstanceDomainAttachRequest,
@@ -167,12 +329,28 @@ def attach_app_domains(
     db.flush()
     _replace_domain_mappings(db, app_instance.id, prepared_mappings)
     db.commit()
+    job = _enqueue(deployment_jobs.enqueue_restart, app_instance.id)
+    return _accepted(db, app_instance.id, job)
+
+
+def _enqueue(enqueue, *args) -> Job:
     try:
-        engine.restart_app_instance(app_instance.id)
-    except Exception as exc:  # pylint: disable=broad-except
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
-    refreshed = _app_instance_with_domains(db, app_instance.id)
-    return refreshed or app_instance
+        return enqueue(*args)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Job queue unavailable: {exc}",
+        ) from exc
+
+
+def _accepted(db: Session, instance_id: int, job: Job) -> AppInstanceJobAccepted:
+    app_instance = _app_instance_with_domains(db, instance_id)
+    accepted = AppInstanceRead.model_validate(app_instance, from_attributes=True)
+    return AppInstanceJobAccepted(
+        **accepted.model_dump(),
+        job_id=job.id,
+        job_status=getattr(job.get_status(refresh=False), "value", "queued"),
+    )
 
 
 def _prepare_domain_payloads(
@@ -234,7 +412,8 @@ def _app_instance_with_domains(db: Session, instance_id: int) -> AppInstance | N
     return (
         db.query(AppInstance)
         .options(
-            selectinload(AppInstance.domain_mappings).selectinload(AppDomainMapping.domain)
+            selectinload(AppInstance.domain_mappings).selectinload(AppDomainMapping.domain),
+            selectinload(AppInstance.replica_containers),
         )
         .filter(AppInstance.id == instance_id)
         .first()
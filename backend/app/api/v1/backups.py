@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
@@ -18,7 +20,11 @@ from ...schemas.backup_schemas import (
     ManualBackupRequest,
     RestoreRequest,
 )
+from ...schemas.job_schemas import JobAccepted
+from ...services import deployment_jobs
+from ...services.backup_codecs import validate_codec
 from ...services.backup_service import BackupService
+from ...utils.cron import CronSchedule
 
 router = APIRouter(tags=["backups"])
 
@@ -72,7 +78,9 @@ def create_backup_policy(payload: BackupPolicyCreate, db: Session = Depends(get_
     target = db.get(BackupTarget, payload.backup_target_id)
     if not target:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid backup target")
+    _validate_compression(payload.compression, payload.compression_level, payload.compression_threads)
     policy = BackupPolicy(**payload.model_dump())
+    policy.next_run_at = _next_run_at(policy.schedule_cron)
     db.add(policy)
     db.commit()
     db.refresh(policy)
@@ -94,9 +102,15 @@ def update_backup_policy(
     policy = db.get(BackupPolicy, policy_id)
     if not policy:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Backup policy not found")
+    was_enabled = policy.is_enabled
     updates = payload.model_dump(exclude_unset=True)
     for key, value in updates.items():
         setattr(policy, key, value)
+    _validate_compression(policy.compression, policy.compression_level, policy.compression_threads)
+    # A policy coming back from being disabled starts from now rather than
+    # firing straight away for the runs it missed.
+    if "schedule_cron" in updates or (policy.is_enabled and not was_enabled):
+        policy.next_run_at = _next_run_at(policy.schedule_cron)
     db.add(policy)
     db.commit()
     db.refresh(policy)
@@ -112,6 +126,22 @@ def delete_backup_policy(policy_id: int, db: Session = Depends(get_db)):
     db.commit()
 
 
+def _validate_compression(codec: str, level: int | None, threads: int | None) -> None:
+    try:
+        validate_codec(codec, level, threads)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+def _next_run_at(schedule_cron: str | None) -> datetime | None:
+    if not schedule_cron:
+        return None
+    try:
+        return CronSchedule(schedule_cron).next_after(datetime.utcnow())
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
 @router.get(
     "/backups/app-instances/{app_instance_id}/snapshots",
     response_model=List[BackupSnapshotRead],
@@ -146,13 +176,25 @@ def run_app_instance_backup(
     return job
 
 
-@router.post("/backups/app-instances/{app_instance_id}/restore")
+@router.post(
+    "/backups/app-instances/{app_instance_id}/restore",
+    response_model=JobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 def restore_app_instance_backup(
     app_instance_id: int, payload: RestoreRequest, db: Session = Depends(get_db)
 ):
-    service = BackupService(db)
+    snapshot = db.get(BackupSnapshot, payload.snapshot_id)
+    if not snapshot or snapshot.scope_type != "app_instance" or snapshot.scope_id != app_instance_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Snapshot does not belong to this app instance",
+        )
     try:
-        service.restore_app_instance_from_backup(app_instance_id, payload.snapshot_id)
-    except ValueError as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    return {"status": "restore_scheduled"}
+        job = deployment_jobs.enqueue_restore(app_instance_id, payload.snapshot_id)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Job queue unavailable: {exc}",
+        ) from exc
+    return JobAccepted(job_id=job.id, status="restore_scheduled")
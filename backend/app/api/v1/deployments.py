@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from ...core.database import get_db
+from ...models import Deployment
+from ...schemas.deployment_schemas import DeploymentRead, DeploymentStats
+from ...services.deployment_tracer import phase_statistics
+
+router = APIRouter(prefix="/deployments", tags=["deployments"])
+
+
+def _recent(
+    db: Session,
+    app_instance_id: Optional[int],
+    action: Optional[str],
+    limit: int,
+) -> List[Deployment]:
+    query = db.query(Deployment)
+    if app_instance_id is not None:
+        query = query.filter(Deployment.app_instance_id == app_instance_id)
+    if action:
+        query = query.filter(Deployment.action == action)
+    return query.order_by(Deployment.started_at.desc(), Deployment.id.desc()).limit(limit).all()
+
+
+@router.get("/", response_model=List[DeploymentRead])
+def list_deployments(
+    app_instance_id: Optional[int] = Query(default=None),
+    action: Optional[str] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    return _recent(db, app_instance_id, action, limit)
+
+
+@router.get("/stats", response_model=DeploymentStats)
+def deployment_stats(
+    app_instance_id: Optional[int] = Query(default=None),
+    action: Optional[str] = Query(default=None),
+    limit: int = Query(default=200, ge=1, le=5000),
+    slowest: int = Query(default=10, ge=0, le=100),
+    db: Session = Depends(get_db),
+):
+    return phase_statistics(_recent(db, app_instance_id, action, limit), slowest=slowest)
+
+
+@router.get("/{deployment_id}", response_model=DeploymentRead)
+def get_deployment(deployment_id: int, db: Session = Depends(get_db)):
+    deployment = db.get(Deployment, deployment_id)
+    if not deployment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deployment not found")
+    return deployment
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, status
+from redis.exceptions import RedisError
+
+from ...schemas.job_schemas import JobStatusRead
+from ...services import deployment_events, deployment_jobs
+from .streaming import event_stream_response
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}/events")
+def stream_job_events(job_id: str):
+    """Server-sent progress for a single-instance job, ending when its deployment ends."""
+
+    try:
+        job = deployment_jobs.get_job_status(job_id)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Job queue unavailable: {exc}",
+        ) from exc
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if not job.get("app_instance_id"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Job is not tied to a single app instance",
+        )
+    return event_stream_response(
+        deployment_events.stream_events(
+            job["app_instance_id"], job_id=job_id, last_event_id=0, follow=False
+        )
+    )
+
+
+@router.get("/{job_id}", response_model=JobStatusRead)
+def get_job(job_id: str):
+    try:
+        job = deployment_jobs.get_job_status(job_id)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Job queue unavailable: {exc}",
+        ) from exc
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
-from ...models import AppInstance, ServerMetricSnapshot
+from ...models import AppInstance, Server, ServerMetricSnapshot
 from ...schemas.server_schemas import (
+    AgentCircuitRead,
     ServerCreate,
     ServerDetail,
     ServerMetricSnapshotRead,
@@ -19,6 +20,11 @@ from ...services import server_service
 router = APIRouter(prefix="/servers", tags=["servers"])
 
 
+def _agent_circuit(server: Server) -> Optional[AgentCircuitRead]:
+    state = server_service.get_circuit_state(server)
+    return AgentCircuitRead(**state) if state else None
+
+
 @router.get("/", response_model=List[ServerSummary])
 def list_servers(db: Session = Depends(get_db)):
     servers = server_service.list_servers(db)
@@ -50,7 +56,9 @@ def get_server(server_id: int, db: Session = Depends(get_db)):
         .all()
     )
     detail = ServerDetail.model_validate(server, from_attributes=True)
-    return detail.model_copy(update={"metrics": metrics})
+    return detail.model_copy(
+        update={"metrics": metrics, "agent_circuit": _agent_circuit(server)}
+    )
 
 
 @router.put("/{server_id}", response_model=ServerDetail)
@@ -67,7 +75,9 @@ def update_server(server_id: int, payload: ServerUpdate, db: Session = Depends(g
         .all()
     )
     detail = ServerDetail.model_validate(updated, from_attributes=True)
-    return detail.model_copy(update={"metrics": metrics})
+    return detail.model_copy(
+        update={"metrics": metrics, "agent_circuit": _agent_circuit(updated)}
+    )
 
 
 @router.delete("/{server_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+
+
+def event_stream_response(events: Iterator[str]) -> StreamingResponse:
+    """Wrap a server-sent events iterator, failing fast with 503 if Redis is down."""
+
+    try:
+        # The stream yields a comment as soon as it is subscribed, so this
+        # returns immediately and surfaces broker errors before headers go out.
+        first = next(events, None)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Event stream unavailable: {exc}",
+        ) from exc
+
+    def _chunks() -> Iterator[str]:
+        if first is not None:
+            yield first
+        yield from events
+
+    return StreamingResponse(
+        _chunks(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -11,6 +13,31 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://redis:6379/0")
     admin_email: str = Field(default="admin@karve.fun")
     admin_password: str = Field(default="admin123")
+    agent_circuit_failure_threshold: int = Field(default=3)
+    agent_circuit_reset_seconds: float = Field(default=30.0)
+    agent_retry_attempts: int = Field(default=3)
+    agent_retry_base_delay: float = Field(default=0.2)
+    agent_retry_max_delay: float = Field(default=2.0)
+    dns_provision_max_workers: int = Field(default=8)
+    dns_provider_concurrency: int = Field(default=4)
+    placement_strategy: Literal["spread", "binpack"] = Field(default="spread")
+    placement_metrics_max_age_seconds: int = Field(default=10 * 60)
+    placement_max_memory_percent: float = Field(default=90.0)
+    placement_max_disk_percent: float = Field(default=90.0)
+    placement_cpu_overcommit: float = Field(default=2.0)
+    restart_strategy: str = Field(default="bluegreen")
+    readiness_timeout_seconds: int = Field(default=120)
+    readiness_poll_interval: float = Field(default=2.0)
+    deployment_job_timeout: int = Field(default=30 * 60)
+    deployment_job_result_ttl: int = Field(default=24 * 60 * 60)
+    bulk_operation_job_timeout: int = Field(default=6 * 60 * 60)
+    # New blueprint instances skip the pull when the agent's warm pool (AGENT_WARM_POOL) has the image.
+    warm_pool_enabled: bool = Field(default=False)
+    backup_max_concurrency: int = Field(default=8)
+    backup_max_per_target: int = Field(default=2)
+    backup_max_per_server: int = Field(default=2)
+    backup_start_jitter_seconds: float = Field(default=60.0)
+    backup_scheduler_poll_seconds: float = Field(default=30.0)
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
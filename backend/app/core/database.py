@@ -4,7 +4,8 @@ from .config import get_settings
 
 
 settings = get_settings()
-engine = create_engine(settings.database_url, future=True)
+connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
+engine = create_engine(settings.database_url, future=True, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
 
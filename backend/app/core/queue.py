@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+from redis import Redis
+from rq import Queue
+
+from .config import get_settings
+
+DEPLOYMENTS_QUEUE = "deployments"
+
+
+@lru_cache
+def get_redis_connection() -> Redis:
+    return Redis.from_url(get_settings().redis_url)
+
+
+def get_queue(name: str = DEPLOYMENTS_QUEUE) -> Queue:
+    return Queue(
+        name,
+        connection=get_redis_connection(),
+        default_timeout=get_settings().deployment_job_timeout,
+    )
@@ -2,11 +2,13 @@ from .app_models import (
     AppDomainMapping,
     AppEnvironmentVariable,
     AppInstance,
+    AppInstanceReplica,
     Application,
     Server,
     ServerMetricSnapshot,
 )
-from .backup_models import BackupJob, BackupPolicy, BackupSnapshot, BackupTarget
+from .backup_models import BackupChunk, BackupJob, BackupPolicy, BackupSnapshot, BackupTarget
+from .deployment_models import Deployment
 from .dns import DNSProviderCredential, DNSRecord, Domain
 from .monitoring_models import ActivityLog, AlertEvent, AlertRule, SuspiciousLoginAttempt
 from .user import User
@@ -15,9 +17,11 @@ __all__ = [
     "AppDomainMapping",
     "AppEnvironmentVariable",
     "AppInstance",
+    "AppInstanceReplica",
     "Application",
     "Server",
     "ServerMetricSnapshot",
+    "Deployment",
     "DNSProviderCredential",
     "DNSRecord",
     "Domain",
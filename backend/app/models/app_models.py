@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, JSON, String
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..core.database import Base
@@ -76,7 +76,10 @@ class AppInstance(Base):
     docker_image: Mapped[str] = mapped_column(String, nullable=False)
     docker_port: Mapped[int] = mapped_column(Integer, default=80)
     replicas: Mapped[int] = mapped_column(Integer, default=1)
+    cpu_request: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    memory_request_mb: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     env_vars: Mapped[dict] = mapped_column(JSON, default=dict)
+    deployed_state: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -91,6 +94,34 @@ class AppInstance(Base):
     domain_mappings: Mapped[List["AppDomainMapping"]] = relationship(
         "AppDomainMapping", back_populates="app_instance", cascade="all, delete-orphan"
     )
+    replica_containers: Mapped[List["AppInstanceReplica"]] = relationship(
+        "AppInstanceReplica",
+        back_populates="app_instance",
+        cascade="all, delete-orphan",
+        order_by="AppInstanceReplica.replica_index",
+    )
+
+
+class AppInstanceReplica(Base):
+    """An extra container serving an app instance next to its primary container."""
+
+    __tablename__ = "app_instance_replicas"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    app_instance_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("app_instances.id"), nullable=False, index=True
+    )
+    server_id: Mapped[int] = mapped_column(Integer, ForeignKey("servers.id"), nullable=False)
+    replica_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    container_name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    status: Mapped[str] = mapped_column(String, default="creating")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    app_instance: Mapped[AppInstance] = relationship("AppInstance", back_populates="replica_containers")
+    server: Mapped[Server] = relationship("Server")
 
 
 class AppEnvironmentVariable(Base):
@@ -133,6 +164,8 @@ class ServerMetricSnapshot(Base):
     disk_percent: Mapped[float] = mapped_column()
     docker_running_containers: Mapped[int] = mapped_column(Integer, default=0)
     docker_total_containers: Mapped[int] = mapped_column(Integer, default=0)
+    cpu_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    memory_total_mb: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     server: Mapped[Server] = relationship("Server", back_populates="metric_snapshots")
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, JSON, String
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, JSON, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..core.database import Base
@@ -39,8 +39,19 @@ class BackupPolicy(Base):
     scope_type: Mapped[str] = mapped_column(String, nullable=False)
     scope_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     schedule_cron: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Maintained by the backup scheduler so restarts resume where they left off.
+    next_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     backup_target_id: Mapped[int] = mapped_column(Integer, ForeignKey("backup_targets.id"))
     retain_last: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Grandfather-father-son tiers: keep the newest snapshot of this many recent days/weeks/months.
+    retain_daily: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    retain_weekly: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    retain_monthly: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    compression: Mapped[str] = mapped_column(String, default="gzip")
+    compression_level: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    compression_threads: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    incremental: Mapped[bool] = mapped_column(Boolean, default=False)
     is_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     created_by_user_id: Mapped[Optional[int]] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=True
@@ -83,8 +94,24 @@ class BackupSnapshot(Base):
     scope_type: Mapped[str] = mapped_column(String, nullable=False)
     scope_id: Mapped[int] = mapped_column(Integer, nullable=False)
     location_uri: Mapped[str] = mapped_column(String, nullable=False)
+    # "archive" for a compressed tarball, "chunked" for a manifest into the chunk store.
+    format: Mapped[str] = mapped_column(String, default="archive")
     size_bytes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     checksum: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     job: Mapped[BackupJob] = relationship("BackupJob", back_populates="snapshots")
+
+
+class BackupChunk(Base):
+    """A deduplicated chunk known to be stored on a backup target."""
+
+    __tablename__ = "backup_chunks"
+    __table_args__ = (UniqueConstraint("backup_target_id", "digest"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    backup_target_id: Mapped[int] = mapped_column(Integer, ForeignKey("backup_targets.id"), index=True)
+    digest: Mapped[str] = mapped_column(String(64), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    stored_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -73,13 +73,27 @@ class AppDomainMappingRead(BaseModel):
 
 class AppInstanceCreate(BaseModel):
     app_id: int
-    server_id: int
+    server_id: Optional[int] = None
     display_name: str
+    cpu_request: Optional[float] = Field(default=None, gt=0)
+    memory_request_mb: Optional[int] = Field(default=None, gt=0)
+    placement_strategy: Optional[Literal["spread", "binpack"]] = None
     domains: List[DomainMappingInput] = Field(default_factory=list)
     app_type: Optional[str] = None
     config: Optional[dict[str, Any]] = None
 
 
+class AppInstanceReplicaRead(BaseModel):
+    id: int
+    server_id: int
+    replica_index: int
+    container_name: str
+    status: str
+
+    class Config:
+        from_attributes = True
+
+
 class AppInstanceRead(BaseModel):
     id: int
     app_id: int
@@ -91,15 +105,95 @@ class AppInstanceRead(BaseModel):
     docker_image: str
     docker_port: int
     replicas: int
+    cpu_request: Optional[float] = None
+    memory_request_mb: Optional[int] = None
     env_vars: dict
+    deployed_state: Optional[dict] = None
     created_at: datetime
     updated_at: datetime
     domain_mappings: List[AppDomainMappingRead] = Field(default_factory=list)
+    replica_containers: List[AppInstanceReplicaRead] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
 
 
+class AppInstanceJobAccepted(AppInstanceRead):
+    job_id: str
+    job_status: str
+
+
+class AppInstanceScaleRequest(BaseModel):
+    replicas: int = Field(ge=1, le=50)
+    server_ids: Optional[List[int]] = None
+
+
+class PlacementPreviewRequest(BaseModel):
+    cpu_request: Optional[float] = Field(default=None, gt=0)
+    memory_request_mb: Optional[int] = Field(default=None, gt=0)
+    strategy: Optional[Literal["spread", "binpack"]] = None
+
+
+class PlacementCandidate(BaseModel):
+    server_id: int
+    server_name: str
+    eligible: bool
+    reasons: List[str] = Field(default_factory=list)
+    score: float
+    utilisation: float
+    cpu_percent: Optional[float] = None
+    memory_percent: Optional[float] = None
+    disk_percent: Optional[float] = None
+    cpu_count: Optional[int] = None
+    memory_total_mb: Optional[int] = None
+    instance_count: int
+    committed_cpu: float
+    committed_memory_mb: int
+    metrics_at: Optional[datetime] = None
+
+
+class PlacementPreview(BaseModel):
+    strategy: str
+    selected_server_id: Optional[int] = None
+    candidates: List[PlacementCandidate] = Field(default_factory=list)
+
+
+class BulkOperationRequest(BaseModel):
+    action: Literal["deploy", "restart"] = "restart"
+    instance_ids: Optional[List[int]] = None
+    app_id: Optional[int] = None
+    server_id: Optional[int] = None
+    status: Optional[str] = None
+    max_concurrency: int = Field(default=10, ge=1, le=100)
+    max_per_server: int = Field(default=2, ge=1, le=50)
+    max_error_rate: float = Field(default=0.2, ge=0.0, le=1.0)
+    min_samples: int = Field(default=5, ge=1)
+    force: bool = False
+
+
+class BulkOperationAccepted(BaseModel):
+    job_id: str
+    job_status: str
+    action: str
+    total: int
+    instance_ids: List[int]
+
+
+class RollingUpgradeRequest(BaseModel):
+    image: Optional[str] = None
+    wave_size: int = Field(default=1, ge=1, le=100)
+    max_failure_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    pull_concurrency: int = Field(default=8, ge=1, le=100)
+
+
+class RollingUpgradeAccepted(BaseModel):
+    job_id: str
+    job_status: str
+    application_id: int
+    image: str
+    instance_ids: List[int]
+
+
 class AppEnvironmentVariableRead(BaseModel):
     id: int
     key: str
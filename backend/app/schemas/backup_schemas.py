@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class BackupTargetBase(BaseModel):
@@ -34,6 +34,13 @@ class BackupPolicyBase(BaseModel):
     schedule_cron: Optional[str] = None
     backup_target_id: int
     retain_last: Optional[int] = None
+    retain_daily: Optional[int] = None
+    retain_weekly: Optional[int] = None
+    retain_monthly: Optional[int] = None
+    compression: Literal["none", "gzip", "zstd", "lz4"] = "gzip"
+    compression_level: Optional[int] = None
+    compression_threads: Optional[int] = Field(default=None, ge=0)
+    incremental: bool = False
     is_enabled: bool = True
 
 
@@ -48,11 +55,20 @@ class BackupPolicyUpdate(BaseModel):
     schedule_cron: Optional[str] = None
     backup_target_id: Optional[int] = None
     retain_last: Optional[int] = None
+    retain_daily: Optional[int] = None
+    retain_weekly: Optional[int] = None
+    retain_monthly: Optional[int] = None
+    compression: Optional[Literal["none", "gzip", "zstd", "lz4"]] = None
+    compression_level: Optional[int] = None
+    compression_threads: Optional[int] = Field(default=None, ge=0)
+    incremental: Optional[bool] = None
     is_enabled: Optional[bool] = None
 
 
 class BackupPolicyRead(BackupPolicyBase):
     id: int
+    next_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
     created_by_user_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
@@ -83,6 +99,7 @@ class BackupSnapshotRead(BaseModel):
     scope_type: str
     scope_id: int
     location_uri: str
+    format: str = "archive"
     size_bytes: Optional[int] = None
     checksum: Optional[str] = None
     created_at: datetime
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class DeploymentRead(BaseModel):
+    id: int
+    app_instance_id: int
+    action: str
+    status: str
+    outcome: Optional[str] = None
+    error: Optional[str] = None
+    duration_ms: Optional[float] = None
+    phases: List[dict[str, Any]] = Field(default_factory=list)
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PhaseStat(BaseModel):
+    name: str
+    count: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    total_ms: float
+
+
+class SlowDeployment(BaseModel):
+    id: int
+    app_instance_id: int
+    action: str
+    status: str
+    duration_ms: Optional[float] = None
+    slowest_phase: Optional[str] = None
+    slowest_phase_ms: Optional[float] = None
+    started_at: datetime
+
+
+class DeploymentStats(BaseModel):
+    deployments: int
+    phases: List[PhaseStat] = Field(default_factory=list)
+    slowest: List[SlowDeployment] = Field(default_factory=list)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobStatusRead(BaseModel):
+    id: str
+    status: str
+    action: Optional[str] = None
+    app_instance_id: Optional[int] = None
+    enqueued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    meta: dict[str, Any] = Field(default_factory=dict)
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
@@ -37,12 +37,23 @@ class ServerMetricSnapshotRead(BaseModel):
     disk_percent: float
     docker_running_containers: int
     docker_total_containers: int
+    cpu_count: Optional[int] = None
+    memory_total_mb: Optional[int] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class AgentCircuitRead(BaseModel):
+    state: str
+    consecutive_failures: int
+    latency_ms: Optional[float] = None
+    opened_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
 class ServerRead(ServerBase):
     id: int
     last_seen_at: Optional[datetime] = None
@@ -59,3 +70,4 @@ class ServerSummary(ServerRead):
 
 class ServerDetail(ServerRead):
     metrics: list[ServerMetricSnapshotRead] = Field(default_factory=list)
+    agent_circuit: Optional[AgentCircuitRead] = None
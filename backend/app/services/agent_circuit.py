@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import requests  # type: ignore[import-untyped]
+
+from ..core.config import get_settings
+from ..models.app_models import Server
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of contacting an agent whose circuit is open."""
+
+
+class AgentCircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        latency_alpha: float = 0.2,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_alpha = latency_alpha
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None
+        self.opened_at: Optional[datetime] = None
+        self.last_failure_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._opened_monotonic = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self._opened_monotonic < self.reset_timeout:
+                    raise CircuitOpenError(f"Agent circuit for {self.name} is open")
+                # Cool-down elapsed: let exactly one probe through.
+                self.state = STATE_HALF_OPEN
+                self._probe_in_flight = True
+                return
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"Agent circuit for {self.name} is half-open")
+            self._probe_in_flight = True
+
+    def release_probe(self) -> None:
+        """End a call that neither succeeded nor failed against the agent."""
+
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self, latency_ms: float) -> None:
+        with self._lock:
+            self._record_latency(latency_ms)
+            if self.state != STATE_CLOSED:
+                logger.info("Agent circuit for %s closed", self.name)
+            self.state = STATE_CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, latency_ms: float, error: Exception) -> None:
+        with self._lock:
+            self._record_latency(latency_ms)
+            self.consecutive_failures += 1
+            self.last_failure_at = datetime.utcnow()
+            self.last_error = str(error)
+            self._probe_in_flight = False
+            if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    logger.warning(
+                        "Agent circuit for %s opened after %s failures: %s",
+                        self.name,
+                        self.consecutive_failures,
+                        error,
+                    )
+                self.state = STATE_OPEN
+                self.opened_at = datetime.utcnow()
+                self._opened_monotonic = time.monotonic()
+
+    def _record_latency(self, latency_ms: float) -> None:
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += self.latency_alpha * (latency_ms - self.latency_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+                "opened_at": self.opened_at,
+                "last_failure_at": self.last_failure_at,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: Dict[int, AgentCircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(server: Server) -> AgentCircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(server.id)
+        if breaker is None:
+            settings = get_settings()
+            breaker = AgentCircuitBreaker(
+                server.name,
+                failure_threshold=settings.agent_circuit_failure_threshold,
+                reset_timeout=settings.agent_circuit_reset_seconds,
+            )
+            _breakers[server.id] = breaker
+        return breaker
+
+
+def reset_breaker(server_id: int) -> None:
+    with _registry_lock:
+        _breakers.pop(server_id, None)
+
+
+def get_circuit_state(server: Server) -> Optional[Dict[str, Any]]:
+    if not server.agent_url:
+        return None
+    return get_breaker(server).snapshot()
+
+
+def _is_agent_failure(exc: requests.RequestException) -> bool:
+    """Only transport errors and 5xx replies count against the agent."""
+
+    response = getattr(exc, "response", None)
+    if isinstance(exc, requests.HTTPError) and response is not None:
+        return response.status_code >= 500
+    return True
+
+
+def call_agent(server: Server, func: Callable[[], T], idempotent: bool = False) -> T:
+    """Run ``func`` through the server's circuit breaker.
+
+    Idempotent calls are retried with full-jitter exponential backoff; anything
+    else gets a single attempt so a timed-out ``/docker/run`` is never replayed.
+    """
+
+    settings = get_settings()
+    breaker = get_breaker(server)
+    attempts = max(1, settings.agent_retry_attempts) if idempotent else 1
+    for attempt in range(attempts):
+        breaker.before_call()
+        started = time.monotonic()
+        try:
+            result = func()
+        except requests.RequestException as exc:  # type: ignore[import-untyped]
+            latency_ms = (time.monotonic() - started) * 1000
+            if not _is_agent_failure(exc):
+                breaker.record_success(latency_ms)
+                raise
+            breaker.record_failure(latency_ms, exc)
+            if attempt + 1 >= attempts or breaker.state == STATE_OPEN:
+                raise
+            delay = min(
+                settings.agent_retry_max_delay,
+                settings.agent_retry_base_delay * (2**attempt),
+            )
+            time.sleep(random.uniform(0, delay))
+            continue
+        except BaseException:
+            # Not held against the agent (e.g. the reply failed to parse), but a
+            # half-open probe must not stay claimed or the circuit never closes.
+            breaker.release_probe()
+            raise
+        breaker.record_success((time.monotonic() - started) * 1000)
+        return result
+    raise RuntimeError("unreachable")  # pragma: no cover
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import requests  # type: ignore[import-untyped]
+
+try:  # msgpack is optional; without it we simply keep asking for JSON.
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def agent_accept_headers() -> Dict[str, str]:
+    """Headers advertising the body encodings we can decode.
+
+    Compression is negotiated by ``requests``/``urllib3`` themselves: the default
+    ``Accept-Encoding`` already lists gzip, and zstd whenever ``zstandard`` is
+    installed, and ``response.content`` is transparently decompressed.
+    """
+
+    if msgpack is not None:
+        return {"Accept": f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9"}
+    return {"Accept": "application/json"}
+
+
+def decode_agent_response(response: requests.Response) -> Any:
+    if not response.content:
+        return None
+    content_type = response.headers.get("Content-Type", "")
+    if content_type.startswith(MSGPACK_MEDIA_TYPE):
+        if msgpack is None:
+            raise RuntimeError("Agent replied with msgpack but msgpack is not installed")
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Set
 
 BLUEPRINTS: Dict[str, dict] = {
     "wordpress": {
@@ -8,18 +8,30 @@ BLUEPRINTS: Dict[str, dict] = {
         "docker_port": 80,
         "env": ["DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"],
         "requires": ["mysql"],
+        # Docker healthcheck run inside the container, exec form so no shell is
+        # needed; {port} is the instance's port. curl counts any HTTP answer.
+        "readiness": ["CMD", "curl", "-s", "-o", "/dev/null", "http://127.0.0.1:{port}/"],
     },
     "nodejs": {
         "docker_image": "node:18-alpine",
         "docker_port": 3000,
         "env": ["NODE_ENV"],
         "requires": [],
+        # The image has no HTTP client, so check the port accepts connections.
+        "readiness": [
+            "CMD",
+            "node",
+            "-e",
+            "require('net').connect({port}, '127.0.0.1')"
+            ".on('connect', () => process.exit(0)).on('error', () => process.exit(1))",
+        ],
     },
     "static": {
         "docker_image": "nginx:alpine",
         "docker_port": 80,
         "env": [],
         "requires": [],
+        "readiness": ["CMD", "wget", "-q", "-O", "/dev/null", "http://127.0.0.1:{port}/"],
     },
 }
 
@@ -30,3 +42,7 @@ def get_app_blueprint(app_type: str) -> dict:
 
 def list_app_blueprints() -> List[dict]:
     return [dict({"type": key}, **value) for key, value in BLUEPRINTS.items()]
+
+
+def blueprint_images() -> Set[str]:
+    return {blueprint["docker_image"] for blueprint in BLUEPRINTS.values()}
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from ..models.app_models import AppInstance
+from ..utils.paths import get_app_data_base_path
+from .backup_codecs import DEFAULT_CODEC, open_compressor, validate_codec
+
+logger = logging.getLogger(__name__)
+
+PIPE_BUFFER_SIZE = 1024 * 1024
+
+
+class _DigestWriter(io.BufferedIOBase):
+    """Pass writes through to ``target`` while hashing and counting them."""
+
+    def __init__(self, target: BinaryIO):
+        super().__init__()
+        self._target = target
+        self.digest = hashlib.sha256()
+        self.size_bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        view = memoryview(data)
+        self._target.write(view)
+        self.digest.update(view)
+        self.size_bytes += view.nbytes
+        return view.nbytes
+
+
+def manifest_text(app_instance: AppInstance, data_dir: Path, data_dir_exists: bool) -> str:
+    return (
+        f"Backup for app instance {app_instance.id}\n"
+        f"Name: {app_instance.display_name}\n"
+        f"Image: {app_instance.docker_image}\n"
+        f"Data directory: {data_dir}\n"
+        f"Data directory present: {data_dir_exists}\n"
+    )
+
+
+class AppInstanceBackupStream(io.RawIOBase):
+    """Readable compressed tarball of an app instance, produced on the fly.
+
+    A background thread tars and compresses (see ``backup_codecs``) the data directory into a pipe;
+    everything written is hashed and counted on the way, so the archive is
+    never materialised on disk and the source data is read exactly once. Read
+    it to EOF (for example by handing it to a target's ``upload_stream``) and
+    then take ``checksum``/``size_bytes``. If the producer fails, the read that
+    would have returned EOF raises instead, so a truncated archive is never
+    mistaken for a complete one.
+    """
+
+    def __init__(
+        self,
+        app_instance: AppInstance,
+        codec: str = DEFAULT_CODEC,
+        level: Optional[int] = None,
+        threads: Optional[int] = None,
+    ):
+        super().__init__()
+        validate_codec(codec, level, threads)
+        self.app_instance_id = app_instance.id
+        self.codec = codec
+        self._level = level
+        self._threads = threads
+        self.data_dir = get_app_data_base_path() / f"app_instance_{app_instance.id}"
+        self._manifest = manifest_text(app_instance, self.data_dir, self.data_dir.exists()).encode("utf-8")
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, "rb", buffering=0)
+        self._pipe = os.fdopen(write_fd, "wb", buffering=PIPE_BUFFER_SIZE)
+        self._writer = _DigestWriter(self._pipe)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._produce, name=f"backup-app-{app_instance.id}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def checksum(self) -> str:
+        return self._writer.digest.hexdigest()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._writer.size_bytes
+
+    def _produce(self) -> None:
+        prefix = f"app_instance_{self.app_instance_id}"
+        try:
+            compressed = open_compressor(self.codec, self._writer, self._level, self._threads)
+            with compressed, tarfile.open(fileobj=compressed, mode="w|") as archive:
+                info = tarfile.TarInfo(f"{prefix}/manifest.txt")
+                info.size = len(self._manifest)
+                info.mtime = int(time.time())
+                archive.addfile(info, io.BytesIO(self._manifest))
+                if self.data_dir.exists():
+                    archive.add(self.data_dir, arcname=f"{prefix}/app_data")
+                else:
+                    logger.warning(
+                        "Data directory for app instance %s is missing at %s",
+                        self.app_instance_id,
+                        self.data_dir,
+                    )
+        except BaseException as exc:  # pylint: disable=broad-except
+            self._error = exc
+        finally:
+            try:
+                self._pipe.close()
+            except OSError as exc:
+                # The reader went away (upload failed); nothing left to flush to.
+                self._error = self._error or exc
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[override]
+        count = self._reader.readinto(buffer)
+        if not count:
+            self._thread.join()
+            if self._error is not None:
+                raise RuntimeError(f"Backup archive failed: {self._error}") from self._error
+        return count or 0
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        # Closing the read end unblocks a producer stuck on a full pipe.
+        self._reader.close()
+        self._thread.join()
+        super().close()
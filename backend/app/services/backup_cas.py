@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import stat
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.backup_models import BackupChunk
+from .backup_codecs import EXTENSIONS, open_compressor, open_decompressor
+from .backup_target_base import BackupTargetHandler
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+CHUNK_PREFIX = "chunks"
+
+MIN_CHUNK_SIZE = 256 * 1024
+AVG_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+READ_SIZE = 8 * 1024 * 1024
+TRANSFER_CONCURRENCY = 8
+
+# Gear table for the rolling hash; seeded so chunk boundaries are stable
+# across processes and releases.
+_GEAR = tuple(random.Random(0x6B7773).getrandbits(64) for _ in range(256))
+_HASH_MASK = (1 << 64) - 1
+
+
+def _masks(avg_size: int) -> Tuple[int, int]:
+    # FastCDC normalised chunking: a stricter mask before the average size and
+    # a looser one after it pull chunk sizes towards the average.
+    bits = max(1, avg_size.bit_length() - 1)
+    return (1 << (bits + 2)) - 1, (1 << (bits - 2)) - 1
+
+
+def _boundary(data: bytes, min_size: int, avg_size: int, max_size: int) -> int:
+    """Length of the first content-defined chunk in ``data``."""
+
+    length = len(data)
+    if length <= min_size:
+        return length
+    limit = min(length, max_size)
+    normal = min(limit, avg_size)
+    strict, loose = _masks(avg_size)
+    gear = _GEAR
+    fingerprint = 0
+    # Bytes below min_size can never end a chunk, so hashing starts there.
+    index = min_size
+    while index < normal:
+        fingerprint = ((fingerprint << 1) + gear[data[index]]) & _HASH_MASK
+        index += 1
+        if not fingerprint & strict:
+            return index
+    while index < limit:
+        fingerprint = ((fingerprint << 1) + gear[data[index]]) & _HASH_MASK
+        index += 1
+        if not fingerprint & loose:
+            return index
+    return limit
+
+
+def iter_chunks(
+    handle: BinaryIO,
+    min_size: int = MIN_CHUNK_SIZE,
+    avg_size: int = AVG_CHUNK_SIZE,
+    max_size: int = MAX_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Split a stream into content-defined chunks.
+
+    Boundaries depend only on nearby content, so an insertion early in a file
+    changes the chunks around it and leaves the rest identical.
+    """
+
+    buffer = b""
+    eof = False
+    while True:
+        while not eof and len(buffer) < max_size:
+            block = handle.read(READ_SIZE)
+            if not block:
+                eof = True
+            buffer += block
+        if not buffer:
+            return
+        cut = _boundary(buffer, min_size, avg_size, max_size)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+
+
+def chunk_path(digest: str) -> str:
+    return f"{CHUNK_PREFIX}/{digest[:2]}/{digest}"
+
+
+def _compress(codec: str, level: Optional[int], data: bytes) -> bytes:
+    sink = io.BytesIO()
+    # Chunks are small; a single zstd thread beats the threading overhead.
+    with open_compressor(codec, sink, level, 0 if codec == "zstd" else None) as compressed:
+        compressed.write(data)
+    return sink.getvalue()
+
+
+def _decompress(data: bytes) -> bytes:
+    _, stream = open_decompressor(io.BytesIO(data))
+    return stream.read()
+
+
+class ChunkedBackupWriter:
+    """Back a directory up into a target's chunk store plus one manifest.
+
+    Files whose size and mtime match the previous manifest reuse its chunk
+    list without being read. Everything else is split with content-defined
+    chunking (files up to ``MAX_CHUNK_SIZE`` are a single chunk); chunks already recorded in ``BackupChunk`` for the target are
+    skipped, the rest are compressed and uploaded in parallel.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        handler: BackupTargetHandler,
+        target_id: int,
+        codec: str,
+        level: Optional[int] = None,
+        concurrency: int = TRANSFER_CONCURRENCY,
+    ):
+        self.db = db
+        self.handler = handler
+        self.target_id = target_id
+        self.codec = codec
+        self.level = level
+        self.concurrency = concurrency
+        self.stats = {
+            "files": 0,
+            "files_reused": 0,
+            "chunks": 0,
+            "chunks_uploaded": 0,
+            "bytes_scanned": 0,
+            "bytes_uploaded": 0,
+            "logical_bytes": 0,
+        }
+        self._known: Set[str] = set()
+        self._new_chunks: Dict[str, Tuple[int, int]] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency * 2)
+
+    def write(
+        self,
+        source_dir: Path,
+        remote_prefix: str,
+        info: str,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, int, str]:
+        """Upload ``source_dir`` and return ``(location_uri, uploaded_bytes, manifest_sha256)``."""
+
+        self._known = {
+            digest
+            for (digest,) in self.db.query(BackupChunk.digest).filter(
+                BackupChunk.backup_target_id == self.target_id
+            )
+        }
+        previous_files = {
+            entry["path"]: entry
+            for entry in (previous or {}).get("entries", [])
+            if entry["type"] == "file"
+        }
+        entries: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="chunk-upload") as pool:
+            if source_dir.exists():
+                for path in sorted(source_dir.rglob("*")):
+                    entries.append(self._entry(pool, source_dir, path, previous_files))
+            for future in list(self._pending.values()):
+                future.result()
+        self._record_chunks()
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "codec": self.codec,
+            "info": info,
+            "data_present": source_dir.exists(),
+            "entries": entries,
+        }
+        payload = _compress(self.codec, self.level, json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+        suffix = EXTENSIONS[self.codec].replace(".tar", ".manifest.json")
+        location_uri = self.handler.put_bytes(f"{remote_prefix}{suffix}", payload)
+        self.stats["bytes_uploaded"] += len(payload)
+        logger.info("Chunked backup to %s: %s", location_uri, self.stats)
+        return location_uri, self.stats["bytes_uploaded"], hashlib.sha256(payload).hexdigest()
+
+    def _entry(
+        self,
+        pool: ThreadPoolExecutor,
+        root: Path,
+        path: Path,
+        previous_files: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        relative = path.relative_to(root).as_posix()
+        info = path.lstat()
+        entry: Dict[str, Any] = {"path": relative, "mode": stat.S_IMODE(info.st_mode), "mtime_ns": info.st_mtime_ns}
+        if stat.S_ISLNK(info.st_mode):
+            entry.update(type="symlink", target=os.readlink(path))
+            return entry
+        if stat.S_ISDIR(info.st_mode):
+            entry["type"] = "dir"
+            return entry
+        if not stat.S_ISREG(info.st_mode):
+            entry["type"] = "other"
+            return entry
+
+        entry.update(type="file", size=info.st_size)
+        self.stats["files"] += 1
+        self.stats["logical_bytes"] += info.st_size
+        earlier = previous_files.get(relative)
+        if (
+            earlier
+            and earlier.get("size") == info.st_size
+            and earlier.get("mtime_ns") == info.st_mtime_ns
+            and all(digest in self._known for digest in earlier["chunks"])
+        ):
+            entry["chunks"] = list(earlier["chunks"])
+            self.stats["files_reused"] += 1
+            self.stats["chunks"] += len(entry["chunks"])
+            return entry
+
+        digests: List[str] = []
+        with path.open("rb") as handle:
+            # Files that fit in one chunk are stored whole; only large files
+            # pay for the (pure Python) boundary search.
+            chunks = [handle.read()] if info.st_size <= MAX_CHUNK_SIZE else iter_chunks(handle)
+            for chunk in chunks:
+                digest = hashlib.sha256(chunk).hexdigest()
+                digests.append(digest)
+                self.stats["chunks"] += 1
+                self.stats["bytes_scanned"] += len(chunk)
+                if digest in self._known or digest in self._pending:
+                    continue
+                self._slots.acquire()
+                self._pending[digest] = pool.submit(self._upload, digest, chunk)
+        entry["chunks"] = digests
+        return entry
+
+    def _upload(self, digest: str, chunk: bytes) -> None:
+        try:
+            payload = _compress(self.codec, self.level, chunk)
+            self.handler.put_bytes(chunk_path(digest), payload)
+            with self._lock:
+                self._new_chunks[digest] = (len(chunk), len(payload))
+                self.stats["chunks_uploaded"] += 1
+                self.stats["bytes_uploaded"] += len(payload)
+        finally:
+            self._slots.release()
+
+    def _record_chunks(self) -> None:
+        rows = [
+            BackupChunk(backup_target_id=self.target_id, digest=digest, size_bytes=size, stored_bytes=stored)
+            for digest, (size, stored) in self._new_chunks.items()
+        ]
+        if not rows:
+            return
+        try:
+            self.db.add_all(rows)
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent backup to the same target recorded some of them first.
+            self.db.rollback()
+            for row in rows:
+                try:
+                    self.db.add(
+                        BackupChunk(
+                            backup_target_id=row.backup_target_id,
+                            digest=row.digest,
+                            size_bytes=row.size_bytes,
+                            stored_bytes=row.stored_bytes,
+                        )
+                    )
+                    self.db.commit()
+                except IntegrityError:
+                    self.db.rollback()
+
+
+def read_manifest(handler: BackupTargetHandler, location_uri: str) -> Tuple[Dict[str, Any], str]:
+    """Fetch a manifest and return it with the sha256 of its stored bytes."""
+
+    payload = handler.get_bytes(location_uri)
+    manifest = json.loads(_decompress(payload))
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported backup manifest version: {manifest.get('version')}")
+    return manifest, hashlib.sha256(payload).hexdigest()
+
+
+def manifest_digests(manifest: Dict[str, Any]) -> Set[str]:
+    """Every chunk digest a manifest references."""
+
+    return {
+        digest
+        for entry in manifest.get("entries", [])
+        if entry["type"] == "file"
+        for digest in entry["chunks"]
+    }
+
+
+def _restore_path(destination: Path, relative: str) -> Path:
+    """Map a manifest path under ``destination``, refusing anything that could escape it.
+
+    Like tarfile's "data" filter: no absolute paths or ``..`` components, and
+    nothing is written through a symlink, including ones this restore created.
+    """
+
+    pure = PurePosixPath(relative)
+    if not pure.parts or pure.is_absolute() or ".." in pure.parts:
+        raise ValueError(f"Unsafe path in backup manifest: {relative!r}")
+    path = destination
+    for part in pure.parts:
+        path = path / part
+        if path.is_symlink():
+            raise ValueError(f"Backup manifest path {relative!r} goes through a symlink")
+    return path
+
+
+def _check_link_target(destination: Path, link: Path, target: str) -> None:
+    # Resolved on disk, as tarfile does, so links chained through earlier
+    # symlinks in the same restore are caught too.
+    root = os.path.realpath(destination)
+    resolved = os.path.realpath(os.path.join(link.parent, target))
+    if os.path.isabs(target) or os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Symlink {link.relative_to(destination)} in backup manifest points outside the restore")
+
+
+def restore_manifest(
+    handler: BackupTargetHandler,
+    manifest: Dict[str, Any],
+    destination: Path,
+    concurrency: int = TRANSFER_CONCURRENCY,
+) -> None:
+    """Rebuild the tree described by ``manifest`` under ``destination``.
+
+    Chunks are fetched in parallel with a bounded read-ahead, verified
+    against their digest and appended in order, so large files are never
+    held in memory. Entries that would land outside ``destination`` are
+    rejected (see ``_restore_path``).
+    """
+
+    def fetch(digest: str) -> bytes:
+        data = _decompress(handler.get_bytes(chunk_path(digest)))
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest} is corrupt")
+        return data
+
+    destination.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="chunk-fetch") as pool:
+        for entry in manifest["entries"]:
+            path = _restore_path(destination, entry["path"])
+            if entry["type"] == "dir":
+                path.mkdir(parents=True, exist_ok=True)
+            elif entry["type"] == "symlink":
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _check_link_target(destination, path, entry["target"])
+                os.symlink(entry["target"], path)
+            elif entry["type"] == "file":
+                path.parent.mkdir(parents=True, exist_ok=True)
+                written = 0
+                window: Deque[Future] = deque()
+                digests = iter(entry["chunks"])
+                # O_NOFOLLOW: never write through a link that appeared meanwhile.
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOFOLLOW", 0), 0o600)
+                with os.fdopen(fd, "wb") as handle:
+                    for digest in itertools.islice(digests, concurrency * 2):
+                        window.append(pool.submit(fetch, digest))
+                    while window:
+                        data = window.popleft().result()
+                        for digest in itertools.islice(digests, 1):
+                            window.append(pool.submit(fetch, digest))
+                        handle.write(data)
+                        written += len(data)
+                if written != entry["size"]:
+                    raise ValueError(f"Restored size of {entry['path']} does not match the manifest")
+
+    # Permissions and times last, once nothing else writes into the directories.
+    for entry in manifest["entries"]:
+        if entry["type"] in ("file", "dir"):
+            path = _restore_path(destination, entry["path"])
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
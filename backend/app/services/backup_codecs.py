@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import gzip
+import io
+import os
+from typing import IO, BinaryIO, Dict, Optional, Tuple, Union, cast
+
+try:  # zstandard is optional; policies asking for zstd fail with a clear error.
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+try:  # lz4 is optional as well.
+    import lz4.frame as lz4_frame  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+CODECS = ("none", "gzip", "zstd", "lz4")
+DEFAULT_CODEC = "gzip"
+
+EXTENSIONS: Dict[str, str] = {
+    "none": ".tar",
+    "gzip": ".tar.gz",
+    "zstd": ".tar.zst",
+    "lz4": ".tar.lz4",
+}
+
+# Valid level ranges and the level used when a policy leaves it unset.
+LEVELS: Dict[str, Tuple[int, int, int]] = {
+    "gzip": (1, 9, 6),
+    "zstd": (-7, 22, 3),
+    "lz4": (0, 16, 0),
+}
+
+# What the codecs read from and write to: files, BytesIO and io-based wrappers.
+ByteStream = Union[BinaryIO, io.BufferedIOBase]
+
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"\x04\x22\x4d\x18", "lz4"),
+)
+
+
+def validate_codec(codec: str, level: Optional[int] = None, threads: Optional[int] = None) -> None:
+    """Raise ``ValueError`` when the codec settings cannot be used on this host."""
+
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+    if codec == "lz4" and lz4_frame is None:
+        raise ValueError("lz4 compression requires the lz4 package")
+    if level is not None:
+        if codec == "none":
+            raise ValueError("Compression level given for uncompressed backups")
+        low, high, _ = LEVELS[codec]
+        if not low <= level <= high:
+            raise ValueError(f"{codec} level must be between {low} and {high}")
+    if threads is not None:
+        if codec != "zstd":
+            raise ValueError("Only zstd compresses with multiple threads")
+        if threads < 0:
+            raise ValueError("Thread count must be 0 (single-threaded) or more")
+
+
+def open_compressor(
+    codec: str,
+    target: ByteStream,
+    level: Optional[int] = None,
+    threads: Optional[int] = None,
+) -> ByteStream:
+    """Writable stream compressing into ``target``; closing it finishes the frame but leaves ``target`` open."""
+
+    validate_codec(codec, level, threads)
+    if codec == "none":
+        return _Uncompressed(target)
+    if level is None:
+        level = LEVELS[codec][2]
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=target, mode="wb", compresslevel=level, mtime=0)
+    if codec == "zstd":
+        workers = (os.cpu_count() or 1) if threads is None else threads
+        compressor = zstandard.ZstdCompressor(level=level, threads=workers)
+        # zstandard's stubs want typing.IO; the io-based wrappers work just as well.
+        return compressor.stream_writer(cast(IO[bytes], target), closefd=False)
+    return lz4_frame.LZ4FrameFile(target, mode="wb", compression_level=level)
+
+
+def detect_codec(header: bytes) -> str:
+    for magic, codec in _MAGIC:
+        if header.startswith(magic):
+            return codec
+    return "none"
+
+
+def open_decompressor(source: ByteStream) -> Tuple[str, ByteStream]:
+    """Sniff the codec from the first bytes of ``source`` and return a decompressing reader."""
+
+    header = source.read(4)
+    codec = detect_codec(header)
+    source = _Prefixed(header, source)
+    if codec == "none":
+        return codec, source
+    validate_codec(codec)
+    if codec == "gzip":
+        return codec, gzip.GzipFile(fileobj=source, mode="rb")
+    if codec == "zstd":
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            cast(IO[bytes], source), read_across_frames=True, closefd=False
+        )
+        return codec, reader
+    return codec, lz4_frame.LZ4FrameFile(source, mode="rb")
+
+
+class _Uncompressed(io.BufferedIOBase):
+    def __init__(self, target: ByteStream):
+        super().__init__()
+        self._target = target
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return self._target.write(data)
+
+    def flush(self) -> None:
+        self._target.flush()
+
+    def close(self) -> None:
+        # Like the real codecs, closing leaves ``target`` open.
+        if not self.closed:
+            self._target.flush()
+            super().close()
+
+
+class _Prefixed(io.BufferedIOBase):
+    """Replay bytes already consumed for codec sniffing ahead of the rest of ``source``."""
+
+    def __init__(self, prefix: bytes, source: ByteStream):
+        super().__init__()
+        self._prefix = prefix
+        self._source = source
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None:
+            size = -1
+        if not self._prefix:
+            return self._source.read(size)
+        if size < 0:
+            data, self._prefix = self._prefix + self._source.read(), b""
+            return data
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        if len(data) < size:
+            data += self._source.read(size - len(data))
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        if not self.closed:
+            self._source.close()
+            super().close()
@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.database import SessionLocal
+from ..models.app_models import AppInstance
+from ..models.backup_models import BackupJob, BackupPolicy
+from ..utils.cron import CronSchedule
+from .backup_service import BackupService
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+FinishedCallback = Callable[["ScheduledBackup", Optional[BaseException]], None]
+
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class ScheduledBackup:
+    """One policy's backup of one app instance, as queued by the executor."""
+
+    __slots__ = ("policy_id", "app_instance_id", "target_id", "server_id", "last_success_at", "start_at")
+
+    def __init__(
+        self,
+        policy_id: int,
+        app_instance_id: int,
+        target_id: int,
+        server_id: Optional[int],
+        last_success_at: Optional[datetime] = None,
+    ):
+        self.policy_id = policy_id
+        self.app_instance_id = app_instance_id
+        self.target_id = target_id
+        self.server_id = server_id
+        self.last_success_at = last_success_at
+        self.start_at = 0.0
+
+    def priority(self) -> float:
+        # Never-backed-up work first, then the longest time since a success.
+        if self.last_success_at is None:
+            return float("-inf")
+        return self.last_success_at.timestamp()
+
+
+class BackupExecutor:
+    """Run scheduled backups on a worker pool under per-target and per-server caps.
+
+    Work is started in priority order (oldest last success first), but no
+    earlier than a random offset within ``jitter_seconds`` of the run start so
+    a whole fleet does not hit its targets in the same second. A backup whose
+    target or server is at its cap waits without blocking work for other
+    targets and servers. Each backup runs in its own database session.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_per_target: int = 2,
+        max_per_server: int = 2,
+        jitter_seconds: float = 0.0,
+        db_factory: Callable[[], Session] = SessionLocal,
+        progress_callback: Optional[ProgressCallback] = None,
+        on_finished: Optional[FinishedCallback] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_target = max(1, max_per_target)
+        self.max_per_server = max(1, max_per_server)
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.db_factory = db_factory
+        self.progress_callback = progress_callback
+        self.on_finished = on_finished
+
+    def run(self, work: Sequence[ScheduledBackup]) -> Dict[str, Any]:
+        started = time.monotonic()
+        pending: List[ScheduledBackup] = sorted(work, key=ScheduledBackup.priority)
+        # Spread start times over the jitter window, earliest offsets to the
+        # highest-priority work so jitter never reorders the queue.
+        offsets = sorted(random.uniform(0, self.jitter_seconds) for _ in pending)
+        for item, offset in zip(pending, offsets):
+            item.start_at = started + offset
+        per_target: Dict[int, int] = {}
+        per_server: Dict[Optional[int], int] = {}
+        in_flight: Dict[Future, ScheduledBackup] = {}
+        progress: Dict[str, Any] = {
+            "total": len(pending),
+            "completed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "failures": {},
+        }
+
+        def eligible(item: ScheduledBackup, now: float) -> bool:
+            return (
+                item.start_at <= now
+                and per_target.get(item.target_id, 0) < self.max_per_target
+                and (item.server_id is None or per_server.get(item.server_id, 0) < self.max_per_server)
+            )
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="backup") as pool:
+            while pending or in_flight:
+                now = time.monotonic()
+                index = 0
+                while index < len(pending) and len(in_flight) < self.max_concurrency:
+                    item = pending[index]
+                    if not eligible(item, now):
+                        index += 1
+                        continue
+                    pending.pop(index)
+                    per_target[item.target_id] = per_target.get(item.target_id, 0) + 1
+                    per_server[item.server_id] = per_server.get(item.server_id, 0) + 1
+                    in_flight[pool.submit(self._backup, item)] = item
+
+                # Wake for the next completion or the next jittered start, whichever is first.
+                waiting = [item.start_at for item in pending if item.start_at > now]
+                timeout = max(0.0, min(waiting) - now) if waiting else None
+                if not in_flight:
+                    time.sleep(timeout or 0)
+                    continue
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = in_flight.pop(future)
+                    per_target[item.target_id] -= 1
+                    per_server[item.server_id] -= 1
+                    progress["completed"] += 1
+                    error = future.exception()
+                    if error is None:
+                        progress["succeeded"] += 1
+                    else:
+                        logger.warning(
+                            "Scheduled backup failed for policy %s (app instance %s): %s",
+                            item.policy_id,
+                            item.app_instance_id,
+                            error,
+                        )
+                        progress["failed"] += 1
+                        progress["failures"][f"{item.policy_id}:{item.app_instance_id}"] = str(error)
+                    if self.on_finished:
+                        self.on_finished(item, error)
+                if done:
+                    self._report(progress)
+
+        progress["duration_seconds"] = round(time.monotonic() - started, 3)
+        self._report(progress)
+        return progress
+
+    def _backup(self, item: ScheduledBackup) -> None:
+        with self.db_factory() as db:
+            BackupService(db).run_backup_for_app_instance(item.app_instance_id, policy_id=item.policy_id)
+
+    def _report(self, progress: Dict[str, Any]) -> None:
+        if not self.progress_callback:
+            return
+        try:
+            self.progress_callback(dict(progress, failures=dict(progress["failures"])))
+        except Exception:  # pylint: disable=broad-except
+            logger.debug("Failed to report backup progress", exc_info=True)
+
+
+def plan_scheduled_backups(db: Session, policies: Sequence[BackupPolicy]) -> List[ScheduledBackup]:
+    """Resolve policies to backups with their target, server and last success."""
+
+    work: List[ScheduledBackup] = []
+    instance_policies = [policy for policy in policies if policy.scope_type == "app_instance" and policy.scope_id]
+    for policy in policies:
+        if policy not in instance_policies:
+            logger.info("Skipping unsupported policy scope %s", policy.scope_type)
+    if not instance_policies:
+        return work
+
+    servers: Dict[int, int] = {
+        instance_id: server_id
+        for instance_id, server_id in db.query(AppInstance.id, AppInstance.server_id).filter(
+            AppInstance.id.in_({policy.scope_id for policy in instance_policies})
+        )
+    }
+    last_success = {
+        (policy_id, scope_id): finished_at
+        for policy_id, scope_id, finished_at in db.query(
+            BackupJob.policy_id, BackupJob.scope_id, func.max(BackupJob.finished_at)
+        )
+        .filter(
+            BackupJob.policy_id.in_([policy.id for policy in instance_policies]),
+            BackupJob.status == "success",
+        )
+        .group_by(BackupJob.policy_id, BackupJob.scope_id)
+    }
+    for policy in instance_policies:
+        scope_id = policy.scope_id
+        if scope_id is None or scope_id not in servers:
+            logger.warning("Skipping policy %s: app instance %s not found", policy.id, scope_id)
+            continue
+        work.append(
+            ScheduledBackup(
+                policy_id=policy.id,
+                app_instance_id=scope_id,
+                target_id=policy.backup_target_id,
+                server_id=servers[scope_id],
+                last_success_at=last_success.get((policy.id, policy.scope_id)),
+            )
+        )
+    return work
+
+
+def executor_from_settings(
+    progress_callback: Optional[ProgressCallback] = None,
+    on_finished: Optional[FinishedCallback] = None,
+) -> BackupExecutor:
+    settings = get_settings()
+    return BackupExecutor(
+        max_concurrency=settings.backup_max_concurrency,
+        max_per_target=settings.backup_max_per_target,
+        max_per_server=settings.backup_max_per_server,
+        jitter_seconds=settings.backup_start_jitter_seconds,
+        progress_callback=progress_callback,
+        on_finished=on_finished,
+    )
+
+
+class BackupScheduler:
+    """Run policies when their ``schedule_cron`` comes due.
+
+    Due times live in a min-heap of ``(next_run_at, policy_id)``, so a tick
+    pops only what is due instead of scanning every policy. Policies edited
+    since the last tick (by ``updated_at``) are re-read and re-queued; heap
+    entries that no longer match a policy's current due time are skipped
+    when popped. ``next_run_at``/``last_run_at`` are persisted as each backup
+    finishes, so after a crash a policy whose slot passed runs once on the
+    next tick and unfinished work is retried. Policies without a cron
+    expression are manual-only.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session] = SessionLocal,
+        executor_factory: Callable[..., BackupExecutor] = executor_from_settings,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.db_factory = db_factory
+        self.executor_factory = executor_factory
+        self.clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._schedules: Dict[int, CronSchedule] = {}
+        self._synced_at: Optional[datetime] = None
+
+    def next_due(self) -> Optional[datetime]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def sync(self, db: Session) -> None:
+        """Pick up policies created or edited since the previous sync."""
+
+        # The watermark is compared with updated_at, which is wall-clock time;
+        # the overlap catches edits that committed while the last sync ran.
+        synced_at = datetime.utcnow() - SYNC_OVERLAP
+        started = self.clock()
+        query = db.query(BackupPolicy)
+        if self._synced_at is not None:
+            query = query.filter(BackupPolicy.updated_at >= self._synced_at)
+        changed = False
+        for policy in query:
+            schedule = self._schedule(policy)
+            if schedule is None or not policy.is_enabled:
+                self._due.pop(policy.id, None)
+                continue
+            if policy.next_run_at is None:
+                policy.next_run_at = schedule.next_after(started)
+                changed = True
+            self._queue(policy.id, policy.next_run_at)
+        if changed:
+            db.commit()
+        self._synced_at = synced_at
+
+    def tick(self) -> Dict[str, Any]:
+        """Run every policy that is due now and reschedule it."""
+
+        with self.db_factory() as db:
+            self.sync(db)
+            now = self.clock()
+            due: List[int] = []
+            while self.next_due() is not None and self._heap[0][0] <= now:
+                _, policy_id = heapq.heappop(self._heap)
+                del self._due[policy_id]
+                due.append(policy_id)
+            if not due:
+                return {"total": 0, "due": 0}
+
+            policies = (
+                db.query(BackupPolicy)
+                .filter(BackupPolicy.id.in_(due), BackupPolicy.is_enabled.is_(True))
+                .all()
+            )
+            by_id = {policy.id: policy for policy in policies}
+            work = plan_scheduled_backups(db, policies)
+            # Policies that produce no backup still move on to their next slot.
+            for policy_id in by_id.keys() - {item.policy_id for item in work}:
+                self._advance(db, by_id[policy_id], now)
+
+            def finished(item: ScheduledBackup, _error: Optional[BaseException]) -> None:
+                self._advance(db, by_id[item.policy_id], now)
+
+            summary = self.executor_factory(on_finished=finished).run(work)
+            summary["due"] = len(due)
+            return summary
+
+    def run_forever(self, poll_seconds: float) -> None:
+        while True:
+            try:
+                self.tick()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Backup scheduler tick failed")
+            # Wake for the next due policy, or poll for policy edits.
+            delay = poll_seconds
+            next_due = self.next_due()
+            if next_due is not None:
+                delay = min(delay, max(0.0, (next_due - self.clock()).total_seconds()))
+            time.sleep(max(delay, 1.0))
+
+    def _schedule(self, policy: BackupPolicy) -> Optional[CronSchedule]:
+        if not policy.schedule_cron:
+            self._schedules.pop(policy.id, None)
+            return None
+        schedule = self._schedules.get(policy.id)
+        if schedule is None or schedule.expression != policy.schedule_cron:
+            try:
+                schedule = CronSchedule(policy.schedule_cron)
+            except ValueError as exc:
+                logger.warning("Ignoring policy %s with invalid schedule: %s", policy.id, exc)
+                self._schedules.pop(policy.id, None)
+                return None
+            self._schedules[policy.id] = schedule
+        return schedule
+
+    def _queue(self, policy_id: int, run_at: datetime) -> None:
+        if self._due.get(policy_id) == run_at:
+            return
+        self._due[policy_id] = run_at
+        heapq.heappush(self._heap, (run_at, policy_id))
+
+    def _advance(self, db: Session, policy: BackupPolicy, ran_at: datetime) -> None:
+        # The policy may have been edited while its backup ran.
+        db.refresh(policy)
+        schedule = self._schedule(policy)
+        policy.last_run_at = ran_at
+        # Slots missed while the run was in progress are skipped, not replayed.
+        policy.next_run_at = schedule.next_after(max(ran_at, self.clock())) if schedule else None
+        db.commit()
+        if policy.next_run_at is not None:
+            self._queue(policy.id, policy.next_run_at)
@@ -2,18 +2,22 @@ from __future__ import annotations
 
 import hashlib
 import logging
-import os
 import shutil
 import tarfile
 import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional
 
+from sqlalchemy import and_, delete, func, not_, or_, select
 from sqlalchemy.orm import Session
 
 from ..models.app_models import AppInstance
-from ..models.backup_models import BackupJob, BackupPolicy, BackupSnapshot, BackupTarget
+from ..models.backup_models import BackupChunk, BackupJob, BackupPolicy, BackupSnapshot, BackupTarget
+from ..utils.paths import get_app_data_base_path
+from .backup_archive import AppInstanceBackupStream, manifest_text
+from .backup_cas import ChunkedBackupWriter, chunk_path, manifest_digests, read_manifest, restore_manifest
+from .backup_codecs import DEFAULT_CODEC, EXTENSIONS, open_decompressor
 from .backup_target_base import BackupTargetHandler
 from .backup_target_local import LocalBackupTargetHandler
 from .backup_target_s3 import S3BackupTargetHandler
@@ -21,6 +25,8 @@ from .backup_target_sftp import SFTPBackupTargetHandler
 
 logger = logging.getLogger(__name__)
 
+RETENTION_BATCH_SIZE = 500
+
 
 def _sha256_checksum(file_path: Path) -> str:
     digest = hashlib.sha256()
@@ -30,48 +36,11 @@ def _sha256_checksum(file_path: Path) -> str:
     return digest.hexdigest()
 
 
-def _get_app_data_base_path() -> Path:
-    """Return the root directory where app instance data is stored."""
-
-    env_path = os.getenv("SERVER_PANEL_APP_DATA_PATH") or os.getenv("APP_DATA_PATH")
-    if env_path:
-        return Path(env_path)
-    return Path("/var/lib/server-panel/app-data")
-
-
-def create_app_instance_backup_tar(app_instance: AppInstance) -> Path:
-    temp_dir = Path(tempfile.mkdtemp(prefix=f"app-{app_instance.id}-backup-"))
-    content_dir = temp_dir / "data"
-    content_dir.mkdir(parents=True, exist_ok=True)
-
-    app_data_root = _get_app_data_base_path()
-    data_dir = app_data_root / f"app_instance_{app_instance.id}"
-    data_dir_exists = data_dir.exists()
-
-    manifest_path = content_dir / "manifest.txt"
-    manifest_path.write_text(
-        f"Backup for app instance {app_instance.id}\n"
-        f"Name: {app_instance.display_name}\n"
-        f"Image: {app_instance.docker_image}\n"
-        f"Data directory: {data_dir}\n"
-        f"Data directory present: {data_dir_exists}\n",
-        encoding="utf-8",
-    )
-
-    tar_path = temp_dir / f"app_instance_{app_instance.id}.tar.gz"
-    with tarfile.open(tar_path, "w:gz") as archive:
-        archive.add(
-            manifest_path, arcname=f"app_instance_{app_instance.id}/manifest.txt"
-        )
-        if data_dir_exists:
-            archive.add(data_dir, arcname=f"app_instance_{app_instance.id}/app_data")
-        else:
-            logger.warning(
-                "Data directory for app instance %s is missing at %s",
-                app_instance.id,
-                data_dir,
-            )
-    return tar_path
+def _extract_archive(archive: tarfile.TarFile, destination: Path) -> None:
+    if hasattr(tarfile, "data_filter"):
+        archive.extractall(destination, filter="data")
+    else:  # pragma: no cover - Python without PEP 706 filters
+        archive.extractall(destination)
 
 
 class BackupService:
@@ -165,18 +134,34 @@ class BackupService:
             self.db.add(job)
             self.db.commit()
 
-            tar_path = create_app_instance_backup_tar(app_instance)
+            codec = policy.compression if policy else DEFAULT_CODEC
+            level = policy.compression_level if policy else None
             timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-            remote_subpath = f"app_instance/{app_instance.id}/{timestamp}.tar.gz"
-            location_uri = handler.upload(str(tar_path), remote_subpath)
-            size_bytes = os.path.getsize(tar_path)
-            checksum = _sha256_checksum(tar_path)
+            remote_prefix = f"app_instance/{app_instance.id}/{timestamp}"
+            if policy and policy.incremental:
+                snapshot_format = "chunked"
+                location_uri, size_bytes, checksum = self._write_chunked_backup(
+                    app_instance, handler, target, codec, level, remote_prefix
+                )
+            else:
+                snapshot_format = "archive"
+                archive = AppInstanceBackupStream(
+                    app_instance,
+                    codec=codec,
+                    level=level,
+                    threads=policy.compression_threads if policy else None,
+                )
+                with archive:
+                    location_uri = handler.upload_stream(archive, f"{remote_prefix}{EXTENSIONS[codec]}")
+                    size_bytes = archive.size_bytes
+                    checksum = archive.checksum
 
             snapshot = BackupSnapshot(
                 job_id=job.id,
                 scope_type="app_instance",
                 scope_id=app_instance.id,
                 location_uri=location_uri,
+                format=snapshot_format,
                 size_bytes=size_bytes,
                 checksum=checksum,
             )
@@ -196,16 +181,39 @@ class BackupService:
             self.db.commit()
             logger.error("Backup job %s failed: %s", job.id, exc)
             raise
-        finally:
+
+    def _write_chunked_backup(
+        self,
+        app_instance: AppInstance,
+        handler: BackupTargetHandler,
+        target: BackupTarget,
+        codec: str,
+        level: Optional[int],
+        remote_prefix: str,
+    ) -> tuple[str, int, str]:
+        data_dir = get_app_data_base_path() / f"app_instance_{app_instance.id}"
+        previous = (
+            self.db.query(BackupSnapshot)
+            .join(BackupJob, BackupJob.id == BackupSnapshot.job_id)
+            .filter(
+                BackupSnapshot.scope_type == "app_instance",
+                BackupSnapshot.scope_id == app_instance.id,
+                BackupSnapshot.format == "chunked",
+                BackupJob.backup_target_id == target.id,
+            )
+            .order_by(BackupSnapshot.created_at.desc())
+            .first()
+        )
+        previous_manifest = None
+        if previous:
             try:
-                if "tar_path" in locals():
-                    tar_file_path = Path(tar_path)
-                    temp_dir = tar_file_path.parent
-                    tar_file_path.unlink(missing_ok=True)
-                    if temp_dir.exists():
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-            except Exception:  # pylint: disable=broad-except
-                logger.debug("Failed to clean up temp backup files", exc_info=True)
+                previous_manifest, _ = read_manifest(handler, previous.location_uri)
+            except Exception as exc:  # pylint: disable=broad-except
+                # Only costs re-reading unchanged files; chunks still dedupe.
+                logger.warning("Could not load previous manifest %s: %s", previous.location_uri, exc)
+        writer = ChunkedBackupWriter(self.db, handler, target.id, codec, level)
+        info = manifest_text(app_instance, data_dir, data_dir.exists())
+        return writer.write(data_dir, remote_prefix, info, previous_manifest)
 
     def list_backups_for_app_instance(self, app_instance_id: int) -> list[BackupSnapshot]:
         return (
@@ -230,46 +238,62 @@ class BackupService:
             raise ValueError("Backup target missing for snapshot")
 
         handler = self.get_target_handler(target)
-        temp_dir = Path(tempfile.mkdtemp(prefix=f"app-{app_instance_id}-restore-"))
-        temp_file = temp_dir / "restore.tar.gz"
-        extract_dir = temp_dir / "extracted"
+        # Stage on the data filesystem so the extracted tree can be renamed into
+        # place instead of copied; the archive is the only other copy on disk.
+        data_root = get_app_data_base_path()
+        data_root.mkdir(parents=True, exist_ok=True)
+        staging_dir = Path(
+            tempfile.mkdtemp(prefix=f".restore-app_instance_{app_instance_id}-", dir=data_root)
+        )
         try:
-            handler.download(snapshot.location_uri, str(temp_file))
-            if snapshot.checksum:
-                downloaded_checksum = _sha256_checksum(temp_file)
-                if downloaded_checksum != snapshot.checksum:
+            if snapshot.format == "chunked":
+                manifest, checksum = read_manifest(handler, snapshot.location_uri)
+                if snapshot.checksum and checksum != snapshot.checksum:
                     raise ValueError("Downloaded snapshot checksum mismatch")
-
-            extract_dir.mkdir(parents=True, exist_ok=True)
-            with tarfile.open(temp_file, "r:gz") as archive:
-                archive.extractall(extract_dir)
-
-            content_dir = extract_dir / f"app_instance_{app_instance_id}"
-            if not content_dir.exists():
-                raise ValueError("Backup archive is missing expected content directory")
-
-            restore_target_dir = Path("/var/lib/server-panel/restores") / f"app_instance_{app_instance_id}"
-            if restore_target_dir.exists():
-                shutil.rmtree(restore_target_dir)
-            restore_target_dir.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(content_dir, restore_target_dir)
+                restore_dir = staging_dir / "app_data"
+                restore_manifest(handler, manifest, restore_dir)
+            else:
+                restore_dir = self._stage_archive(handler, snapshot, app_instance_id, staging_dir)
 
             # Restart the application container to pick up restored content.
             from .deployment_engine import DeploymentEngine
 
             engine = DeploymentEngine()
             engine.stop_app_instance(app_instance_id)
-            engine.restart_app_instance(app_instance_id, restore_dir=restore_target_dir)
+            engine.restart_app_instance(app_instance_id, restore_dir=restore_dir)
         finally:
-            try:
-                if temp_file.exists():
-                    temp_file.unlink()
-                if extract_dir.exists():
-                    shutil.rmtree(extract_dir, ignore_errors=True)
-                if temp_dir.exists():
-                    temp_dir.rmdir()
-            except Exception:  # pylint: disable=broad-except
-                logger.debug("Failed to clean up temp restore files", exc_info=True)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    @staticmethod
+    def _stage_archive(
+        handler: BackupTargetHandler, snapshot: BackupSnapshot, app_instance_id: int, staging_dir: Path
+    ) -> Path:
+        temp_file = staging_dir / "restore.archive"
+        extract_dir = staging_dir / "extracted"
+        handler.download(snapshot.location_uri, str(temp_file))
+        if snapshot.checksum:
+            downloaded_checksum = _sha256_checksum(temp_file)
+            if downloaded_checksum != snapshot.checksum:
+                raise ValueError("Downloaded snapshot checksum mismatch")
+
+        extract_dir.mkdir(parents=True, exist_ok=True)
+        # The codec is sniffed from the archive, so policy changes never
+        # strand older snapshots.
+        with temp_file.open("rb") as handle:
+            codec, stream = open_decompressor(handle)
+            logger.info("Restoring %s snapshot %s", codec, snapshot.id)
+            with tarfile.open(fileobj=stream, mode="r|") as archive:
+                _extract_archive(archive, extract_dir)
+        temp_file.unlink()
+
+        content_dir = extract_dir / f"app_instance_{app_instance_id}"
+        if not content_dir.exists():
+            raise ValueError("Backup archive is missing expected content directory")
+        restore_dir = content_dir / "app_data"
+        if not restore_dir.exists():
+            # The data directory was absent when the backup was taken.
+            restore_dir.mkdir()
+        return restore_dir
 
     def run_manual_backup(
         self, scope_type: str, scope_id: int, target_id: Optional[int] = None
@@ -278,19 +302,184 @@ class BackupService:
             return self.run_backup_for_app_instance(scope_id, target_override=target_id)
         raise ValueError(f"Unsupported scope for manual backup: {scope_type}")
 
-    def apply_retention_policy(self, policy: BackupPolicy) -> None:
-        if not policy.retain_last:
-            return
-        snapshots = (
-            self.db.query(BackupSnapshot)
+    def apply_retention_policy(self, policy: BackupPolicy) -> int:
+        """Delete the policy's snapshots that no retention rule keeps; returns how many.
+
+        A snapshot is kept if it is among the ``retain_last`` newest for its
+        scope, or if it is the newest of its day, week or month and that
+        period is among the ``retain_daily``/``retain_weekly``/``retain_monthly``
+        most recent ones. Victims are chosen in SQL with window functions.
+        Remote objects are deleted first, one batch per target; rows are only
+        removed for objects that are gone, so failures are retried next run.
+        Targets that lost a chunked snapshot then get their chunk store swept.
+        """
+
+        victims = self._retention_victims(policy)
+        if not victims:
+            return 0
+        by_target: dict[int, list[tuple[int, str, str]]] = {}
+        for snapshot_id, location_uri, snapshot_format, target_id in victims:
+            by_target.setdefault(target_id, []).append((snapshot_id, location_uri, snapshot_format))
+
+        pruned: list[int] = []
+        to_sweep: list[tuple[BackupTarget, BackupTargetHandler]] = []
+        for target_id, snapshots in by_target.items():
+            target = self.db.get(BackupTarget, target_id)
+            if not target:
+                logger.warning("Skipping retention for missing backup target %s", target_id)
+                continue
+            handler = self.get_target_handler(target)
+            try:
+                failed = set(handler.delete([uri for _, uri, _ in snapshots]))
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Retention delete on target %s failed: %s", target_id, exc)
+                continue
+            gone = [
+                (snapshot_id, snapshot_format)
+                for snapshot_id, uri, snapshot_format in snapshots
+                if uri not in failed
+            ]
+            pruned.extend(snapshot_id for snapshot_id, _ in gone)
+            if any(snapshot_format == "chunked" for _, snapshot_format in gone):
+                to_sweep.append((target, handler))
+
+        for start in range(0, len(pruned), RETENTION_BATCH_SIZE):
+            batch = pruned[start : start + RETENTION_BATCH_SIZE]
+            self.db.execute(delete(BackupSnapshot).where(BackupSnapshot.id.in_(batch)))
+        self.db.commit()
+        logger.info("Pruned %s of %s expired snapshots for policy %s", len(pruned), len(victims), policy.id)
+
+        for target, handler in to_sweep:
+            try:
+                self.sweep_unreferenced_chunks(target, handler)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Chunk sweep on target %s failed: %s", target.id, exc)
+        return len(pruned)
+
+    def sweep_unreferenced_chunks(
+        self, target: BackupTarget, handler: Optional[BackupTargetHandler] = None
+    ) -> int:
+        """Delete the target's chunks that no surviving manifest references; returns how many.
+
+        Mark and sweep: the manifest of every chunked snapshot on the target is
+        read, then chunks recorded in ``BackupChunk`` but referenced by none of
+        them are deleted in batches, the object first and then its row. An
+        unreadable manifest aborts the sweep rather than guess. Backups skip
+        uploading chunks that have a row, so the sweep does not start while a
+        backup to the target is pending or running, and stops before the next
+        batch if one has begun since.
+        """
+
+        handler = handler or self.get_target_handler(target)
+        started_at = datetime.utcnow()
+        if self._backup_active(target.id, started_at):
+            logger.info("Backup to target %s in progress, chunk sweep postponed", target.id)
+            return 0
+
+        manifests = self.db.execute(
+            select(BackupSnapshot.location_uri)
             .join(BackupJob, BackupJob.id == BackupSnapshot.job_id)
-            .filter(BackupJob.policy_id == policy.id)
-            .order_by(BackupSnapshot.created_at.desc())
-            .all()
+            .where(BackupJob.backup_target_id == target.id, BackupSnapshot.format == "chunked")
+        ).scalars()
+        referenced: set[str] = set()
+        for location_uri in manifests.all():
+            manifest, _ = read_manifest(handler, location_uri)
+            referenced.update(manifest_digests(manifest))
+        unreferenced = [
+            (chunk_id, digest)
+            for chunk_id, digest in self.db.execute(
+                select(BackupChunk.id, BackupChunk.digest).where(BackupChunk.backup_target_id == target.id)
+            )
+            if digest not in referenced
+        ]
+
+        removed = 0
+        for start in range(0, len(unreferenced), RETENTION_BATCH_SIZE):
+            if self._backup_active(target.id, started_at):
+                logger.info("Backup to target %s started, chunk sweep stopped early", target.id)
+                break
+            batch = {
+                chunk_path(digest): chunk_id
+                for chunk_id, digest in unreferenced[start : start + RETENTION_BATCH_SIZE]
+            }
+            failed = set(handler.delete(list(batch)))
+            gone = [chunk_id for location, chunk_id in batch.items() if location not in failed]
+            self.db.execute(delete(BackupChunk).where(BackupChunk.id.in_(gone)))
+            self.db.commit()
+            removed += len(gone)
+        logger.info(
+            "Swept %s of %s unreferenced chunks on target %s (%s referenced)",
+            removed,
+            len(unreferenced),
+            target.id,
+            len(referenced),
         )
-        if len(snapshots) <= policy.retain_last:
-            return
-        for snapshot in snapshots[policy.retain_last :]:
-            logger.info("Pruning snapshot %s for policy %s", snapshot.id, policy.id)
-            self.db.delete(snapshot)
-        self.db.commit()
+        return removed
+
+    def _backup_active(self, target_id: int, since: datetime) -> bool:
+        """True if a backup to the target is underway or was created at or after ``since``."""
+
+        query = select(BackupJob.id).where(
+            BackupJob.backup_target_id == target_id,
+            or_(BackupJob.status.in_(("pending", "running")), BackupJob.created_at >= since),
+        )
+        return self.db.execute(query.limit(1)).first() is not None
+
+    def _retention_victims(self, policy: BackupPolicy) -> list[tuple[int, str, str, int]]:
+        """``(snapshot_id, location_uri, format, target_id)`` for every snapshot no rule keeps."""
+
+        tiers = [
+            (unit, count)
+            for unit, count in (
+                ("day", policy.retain_daily),
+                ("week", policy.retain_weekly),
+                ("month", policy.retain_monthly),
+            )
+            if count
+        ]
+        if not policy.retain_last and not tiers:
+            return []
+
+        scope = (BackupSnapshot.scope_type, BackupSnapshot.scope_id)
+        newest_first = BackupSnapshot.created_at.desc()
+        columns: List[Any] = [
+            BackupSnapshot.id.label("id"),
+            BackupSnapshot.location_uri.label("location_uri"),
+            BackupSnapshot.format.label("format"),
+            BackupJob.backup_target_id.label("target_id"),
+            func.row_number().over(partition_by=scope, order_by=newest_first).label("recent"),
+        ]
+        dialect = self.db.get_bind().dialect.name
+        for unit, _ in tiers:
+            period = _period(BackupSnapshot.created_at, unit, dialect)
+            # 1 for the newest snapshot in each period ...
+            columns.append(
+                func.row_number().over(partition_by=(*scope, period), order_by=newest_first).label(f"{unit}_newest")
+            )
+            # ... and how many periods back that period is.
+            columns.append(func.dense_rank().over(partition_by=scope, order_by=period.desc()).label(f"{unit}_rank"))
+        ranked = (
+            select(*columns)
+            .join(BackupJob, BackupJob.id == BackupSnapshot.job_id)
+            .where(BackupJob.policy_id == policy.id)
+            .subquery()
+        )
+
+        keep = []
+        if policy.retain_last:
+            keep.append(ranked.c.recent <= policy.retain_last)
+        for unit, count in tiers:
+            keep.append(and_(ranked.c[f"{unit}_newest"] == 1, ranked.c[f"{unit}_rank"] <= count))
+        query = select(ranked.c.id, ranked.c.location_uri, ranked.c.format, ranked.c.target_id).where(
+            not_(or_(*keep))
+        )
+        return [tuple(row) for row in self.db.execute(query)]
+
+
+def _period(column, unit: str, dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc(unit, column)
+    # SQLite has no date_trunc; use the same period start it would return,
+    # so weeks run Monday to Sunday (ISO) on both backends.
+    modifiers = {"day": (), "week": ("weekday 0", "-6 days"), "month": ("start of month",)}[unit]
+    return func.date(column, *modifiers)
@@ -1,6 +1,33 @@
+import io
+from typing import BinaryIO, List, Sequence, Union
+
+# What upload_stream reads from: files, BytesIO and io-based streams such as
+# the backup archive.
+ReadableStream = Union[BinaryIO, io.RawIOBase, io.BufferedIOBase]
+
+
 class BackupTargetHandler:
     def upload(self, local_path: str, remote_subpath: str) -> str:
         raise NotImplementedError
 
+    def upload_stream(self, stream: ReadableStream, remote_subpath: str) -> str:
+        """Upload everything readable from ``stream`` without knowing its size up front."""
+        raise NotImplementedError
+
+    def put_bytes(self, remote_subpath: str, data: bytes) -> str:
+        return self.upload_stream(io.BytesIO(data), remote_subpath)
+
+    def get_bytes(self, location: str) -> bytes:
+        """Read a small object by subpath or location URI; raises ``FileNotFoundError`` if absent."""
+        raise NotImplementedError
+
     def download(self, location_uri: str, local_path: str) -> None:
         raise NotImplementedError
+
+    def delete(self, locations: Sequence[str]) -> List[str]:
+        """Delete objects by subpath or location URI, batching where the target allows.
+
+        Objects that are already gone count as deleted. Returns the locations
+        that could not be deleted.
+        """
+        raise NotImplementedError
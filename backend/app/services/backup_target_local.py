@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import logging
+import os
 import shutil
 from pathlib import Path
+from typing import List, Sequence
 
-from .backup_target_base import BackupTargetHandler
+from ..utils.fs import clone_file
+from .backup_target_base import BackupTargetHandler, ReadableStream
+
+logger = logging.getLogger(__name__)
 
 
 class LocalBackupTargetHandler(BackupTargetHandler):
@@ -13,16 +19,48 @@ class LocalBackupTargetHandler(BackupTargetHandler):
     def upload(self, local_path: str, remote_subpath: str) -> str:
         destination = Path(self.base_path) / remote_subpath
         destination.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(local_path, destination)
+        clone_file(local_path, destination)
+        return f"local:{destination}"
+
+    def upload_stream(self, stream: ReadableStream, remote_subpath: str) -> str:
+        destination = Path(self.base_path) / remote_subpath
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        partial = destination.with_name(f"{destination.name}.partial")
+        try:
+            with partial.open("wb") as handle:
+                shutil.copyfileobj(stream, handle, 1024 * 1024)
+            os.replace(partial, destination)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
         return f"local:{destination}"
 
+    def _resolve(self, location: str) -> Path:
+        if location.startswith("local:"):
+            return Path(location.split("local:", 1)[1])
+        return Path(self.base_path) / location
+
+    def get_bytes(self, location: str) -> bytes:
+        return self._resolve(location).read_bytes()
+
     def download(self, location_uri: str, local_path: str) -> None:
-        source = location_uri
-        if location_uri.startswith("local:"):
-            source = location_uri.split("local:", 1)[1]
-        source_path = Path(source)
+        source_path = self._resolve(location_uri)
         Path(local_path).parent.mkdir(parents=True, exist_ok=True)
         if source_path.is_dir():
-            shutil.copytree(source_path, local_path, dirs_exist_ok=True)
+            shutil.copytree(source_path, local_path, dirs_exist_ok=True, copy_function=clone_file)
         else:
-            shutil.copy2(source_path, local_path)
+            clone_file(source_path, local_path)
+
+    def delete(self, locations: Sequence[str]) -> List[str]:
+        failed: List[str] = []
+        for location in locations:
+            path = self._resolve(location)
+            try:
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink(missing_ok=True)
+            except OSError as exc:
+                logger.warning("Could not delete %s: %s", location, exc)
+                failed.append(location)
+        return failed
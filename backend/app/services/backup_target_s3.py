@@ -1,36 +1,193 @@
 from __future__ import annotations
 
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+
 import boto3  # type: ignore[import-untyped]
+from boto3.s3.transfer import TransferConfig  # type: ignore[import-untyped]
+from botocore.config import Config  # type: ignore[import-untyped]
+
+from .backup_target_base import BackupTargetHandler, ReadableStream
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# Defaults for the transfer settings a target's config_json may override.
+DEFAULT_MULTIPART_THRESHOLD_MB = 64
+DEFAULT_MULTIPART_CHUNKSIZE_MB = 16
+DEFAULT_MAX_CONCURRENCY = 10
+READ_SIZE = MB
+# DeleteObjects accepts at most this many keys per request.
+DELETE_BATCH_SIZE = 1000
 
-from .backup_target_base import BackupTargetHandler
+# boto3 clients are thread-safe and expensive to build (endpoint resolution,
+# credential chain, a fresh connection pool), so one is shared per config.
+_clients: Dict[Tuple[Any, ...], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _cached_client(config: dict, max_pool_connections: int):
+    key = (
+        config.get("endpoint_url"),
+        config.get("region"),
+        config.get("access_key"),
+        config.get("secret_key"),
+        max_pool_connections,
+    )
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.session.Session().client(
+                "s3",
+                endpoint_url=config.get("endpoint_url"),
+                region_name=config.get("region"),
+                aws_access_key_id=config.get("access_key"),
+                aws_secret_access_key=config.get("secret_key"),
+                config=Config(max_pool_connections=max_pool_connections, retries={"mode": "adaptive"}),
+            )
+            _clients[key] = client
+    return client
 
 
 class S3BackupTargetHandler(BackupTargetHandler):
+    """S3 target with a shared client and tunable multipart transfers.
+
+    ``config_json`` may set ``multipart_threshold_mb``, ``multipart_chunksize_mb``
+    and ``max_concurrency``. Uploads use them through boto3's transfer manager;
+    downloads above the threshold fetch ranged parts in parallel and write
+    them in place.
+    """
+
     def __init__(self, config: dict):
         self.config = config
+        self.multipart_threshold = int(config.get("multipart_threshold_mb", DEFAULT_MULTIPART_THRESHOLD_MB)) * MB
+        self.multipart_chunksize = int(config.get("multipart_chunksize_mb", DEFAULT_MULTIPART_CHUNKSIZE_MB)) * MB
+        self.max_concurrency = max(1, int(config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)))
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency,
+            use_threads=True,
+        )
 
     def _client(self):
-        return boto3.client(
-            "s3",
-            endpoint_url=self.config.get("endpoint_url"),
-            region_name=self.config.get("region"),
-            aws_access_key_id=self.config.get("access_key"),
-            aws_secret_access_key=self.config.get("secret_key"),
-        )
+        # Leave room for transfers plus the chunk store's own parallel puts.
+        return _cached_client(self.config, max(10, self.max_concurrency * 2))
 
     def upload(self, local_path: str, remote_subpath: str) -> str:
-        client = self._client()
-        bucket = self.config.get("bucket")
+        bucket = self._bucket()
         key = remote_subpath.lstrip("/")
-        client.upload_file(local_path, bucket, key)
+        self._client().upload_file(local_path, bucket, key, Config=self.transfer_config)
         return f"s3://{bucket}/{key}"
 
-    def download(self, location_uri: str, local_path: str) -> None:
-        client = self._client()
+    def upload_stream(self, stream: ReadableStream, remote_subpath: str) -> str:
+        bucket = self._bucket()
+        key = remote_subpath.lstrip("/")
+        # Multipart upload straight from the stream; a failed read aborts it.
+        self._client().upload_fileobj(stream, bucket, key, Config=self.transfer_config)
+        return f"s3://{bucket}/{key}"
+
+    def put_bytes(self, remote_subpath: str, data: bytes) -> str:
+        bucket = self._bucket()
+        key = remote_subpath.lstrip("/")
+        self._client().put_object(Bucket=bucket, Key=key, Body=data)
+        return f"s3://{bucket}/{key}"
+
+    def _bucket(self) -> str:
         bucket = self.config.get("bucket")
-        key = location_uri
-        if location_uri.startswith("s3://"):
-            key = location_uri.split("s3://", 1)[1]
+        if not bucket:
+            raise ValueError("S3 backup target has no bucket configured")
+        return str(bucket)
+
+    def _bucket_key(self, location: str) -> tuple[str, str]:
+        key = location
+        if location.startswith("s3://"):
+            key = location.split("s3://", 1)[1]
             if "/" in key:
                 bucket, key = key.split("/", 1)
-        client.download_file(bucket, key, local_path)
+                return bucket, key.lstrip("/")
+        return self._bucket(), key.lstrip("/")
+
+    def get_bytes(self, location: str) -> bytes:
+        client = self._client()
+        bucket, key = self._bucket_key(location)
+        try:
+            response = client.get_object(Bucket=bucket, Key=key)
+        except client.exceptions.NoSuchKey as exc:
+            raise FileNotFoundError(location) from exc
+        return response["Body"].read()
+
+    def download(self, location_uri: str, local_path: str) -> None:
+        client = self._client()
+        bucket, key = self._bucket_key(location_uri)
+        head = client.head_object(Bucket=bucket, Key=key)
+        size = int(head["ContentLength"])
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        if size < self.multipart_threshold:
+            client.download_file(bucket, key, local_path, Config=self.transfer_config)
+            return
+        self._ranged_download(client, bucket, key, head["ETag"], size, local_path)
+
+    def _ranged_download(self, client, bucket: str, key: str, etag: str, size: int, local_path: str) -> None:
+        ranges = [
+            (start, min(start + self.multipart_chunksize, size) - 1)
+            for start in range(0, size, self.multipart_chunksize)
+        ]
+
+        def fetch(byte_range: Tuple[int, int]) -> None:
+            start, end = byte_range
+            # IfMatch fails the part if the object is replaced mid-download.
+            body = client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)["Body"]
+            offset = start
+            for piece in iter(lambda: body.read(READ_SIZE), b""):
+                view = memoryview(piece)
+                while view:
+                    written = os.pwrite(fd, view, offset)
+                    offset += written
+                    view = view[written:]
+            if offset != end + 1:
+                raise IOError(f"Short read for bytes {start}-{end} of s3://{bucket}/{key}")
+
+        try:
+            fd = os.open(local_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.ftruncate(fd, size)
+                with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-range") as pool:
+                    list(pool.map(fetch, ranges))
+            finally:
+                os.close(fd)
+        except BaseException:
+            if os.path.exists(local_path):
+                os.unlink(local_path)
+            raise
+        logger.debug("Downloaded s3://%s/%s in %s ranged parts", bucket, key, len(ranges))
+
+    def delete(self, locations: Sequence[str]) -> List[str]:
+        client = self._client()
+        by_bucket: Dict[str, Dict[str, str]] = {}
+        for location in locations:
+            bucket, key = self._bucket_key(location)
+            by_bucket.setdefault(bucket, {})[key] = location
+        failed: List[str] = []
+        for bucket, keys in by_bucket.items():
+            batch_keys = list(keys)
+            for start in range(0, len(batch_keys), DELETE_BATCH_SIZE):
+                batch = batch_keys[start : start + DELETE_BATCH_SIZE]
+                # Quiet mode only reports failures; missing keys are not errors.
+                response = client.delete_objects(
+                    Bucket=bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+                for error in response.get("Errors", []):
+                    logger.warning(
+                        "Could not delete s3://%s/%s: %s %s",
+                        bucket,
+                        error.get("Key"),
+                        error.get("Code"),
+                        error.get("Message"),
+                    )
+                    failed.append(keys.get(error.get("Key"), f"s3://{bucket}/{error.get('Key')}"))
+        return failed
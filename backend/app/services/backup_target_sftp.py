@@ -1,55 +1,262 @@
 from __future__ import annotations
 
+import atexit
+import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import PurePosixPath
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 import paramiko  # type: ignore[import-untyped]
 
-from .backup_target_base import BackupTargetHandler
+from .backup_target_base import BackupTargetHandler, ReadableStream
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# Defaults for the settings a target's config_json may override.
+DEFAULT_WINDOW_SIZE_MB = 64
+DEFAULT_KEEPALIVE_SECONDS = 30
+DEFAULT_IDLE_TIMEOUT_SECONDS = 300
+DEFAULT_PREFETCH_REQUESTS = 64
+MAX_IDLE_CHANNELS = 8
+
+
+class _SFTPSessionPool:
+    """One SSH transport per target, with its SFTP channels reused across calls.
+
+    The transport (TCP connect, key exchange, auth) is the expensive part and
+    is kept alive with keepalives; each caller gets its own SFTP channel on it,
+    so concurrent backups share the connection without sharing a channel.
+    Remote directories known to exist are remembered so uploads skip the
+    per-segment ``stat`` walk.
+    """
+
+    def __init__(self, config: dict):
+        self.host = config.get("host")
+        self.port = int(config.get("port", 22))
+        self.username = config.get("username")
+        self.password = config.get("password")
+        self.window_size = int(config.get("window_size_mb", DEFAULT_WINDOW_SIZE_MB)) * MB
+        self.keepalive = int(config.get("keepalive_seconds", DEFAULT_KEEPALIVE_SECONDS))
+        self.idle_timeout = float(config.get("idle_timeout_seconds", DEFAULT_IDLE_TIMEOUT_SECONDS))
+        self.known_dirs: Set[str] = set()
+        self._transport: Optional[paramiko.Transport] = None
+        self._idle: List[Tuple[paramiko.SFTPClient, float]] = []
+        self._in_use = 0
+        self._last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _live_transport(self, now: float) -> paramiko.Transport:
+        if self._transport is not None and self._transport.is_active():
+            # Reconnect rather than trust a connection that sat unused past
+            # the idle timeout; servers and NAT boxes drop those quietly.
+            if self._in_use or now - self._last_used < self.idle_timeout:
+                return self._transport
+        if self._transport is not None:
+            self._transport.close()
+            self.known_dirs.clear()
+        transport = paramiko.Transport(
+            (self.host, self.port),
+            default_window_size=self.window_size,
+        )
+        transport.set_keepalive(self.keepalive)
+        transport.connect(username=self.username, password=self.password)
+        logger.info("Opened SFTP connection to %s:%s", self.host, self.port)
+        self._transport = transport
+        self._idle = []
+        return transport
+
+    def acquire(self) -> paramiko.SFTPClient:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                sftp, since = self._idle.pop()
+                channel = sftp.get_channel()
+                if now - since < self.idle_timeout and channel is not None and not channel.closed:
+                    self._in_use += 1
+                    return sftp
+                sftp.close()
+            transport = self._live_transport(now)
+            self._in_use += 1
+            self._last_used = now
+        try:
+            return paramiko.SFTPClient.from_transport(transport, window_size=self.window_size)
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def release(self, sftp: paramiko.SFTPClient) -> None:
+        channel = sftp.get_channel()
+        with self._lock:
+            self._in_use -= 1
+            self._last_used = time.monotonic()
+            healthy = (
+                channel is not None
+                and not channel.closed
+                and self._transport is not None
+                and self._transport.is_active()
+                and channel.get_transport() is self._transport
+            )
+            if healthy and len(self._idle) < MAX_IDLE_CHANNELS:
+                self._idle.append((sftp, self._last_used))
+                return
+        sftp.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for sftp, _ in self._idle:
+                sftp.close()
+            self._idle = []
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+
+
+_pools: Dict[Tuple, _SFTPSessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_for(config: dict) -> _SFTPSessionPool:
+    key = (
+        config.get("host"),
+        int(config.get("port", 22)),
+        config.get("username"),
+        config.get("password"),
+        config.get("window_size_mb"),
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = _SFTPSessionPool(config)
+    return pool
+
+
+@atexit.register
+def close_sftp_sessions() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
 
 
 class SFTPBackupTargetHandler(BackupTargetHandler):
+    """SFTP target on a pooled, kept-alive connection.
+
+    ``config_json`` may set ``window_size_mb``, ``keepalive_seconds``,
+    ``idle_timeout_seconds`` and ``prefetch_requests`` (parallel reads in
+    flight per download).
+    """
+
     def __init__(self, config: dict):
         self.config = config
+        self.prefetch_requests = int(config.get("prefetch_requests", DEFAULT_PREFETCH_REQUESTS))
+        self._pool = _pool_for(config)
 
-    def _connect(self) -> paramiko.SFTPClient:
-        transport = paramiko.Transport((self.config.get("host"), int(self.config.get("port", 22))))
-        transport.connect(
-            username=self.config.get("username"),
-            password=self.config.get("password"),
-        )
-        return paramiko.SFTPClient.from_transport(transport)
+    @contextmanager
+    def _session(self) -> Iterator[paramiko.SFTPClient]:
+        sftp = self._pool.acquire()
+        try:
+            yield sftp
+        finally:
+            self._pool.release(sftp)
 
     def _ensure_remote_dirs(self, sftp: paramiko.SFTPClient, path: PurePosixPath) -> None:
-        segments = path.parts
-        current = PurePosixPath(segments[0])
-        for segment in segments[1:]:
-            current = current / segment
+        known = self._pool.known_dirs
+        if str(path) in known:
+            return
+        # Walk up to the deepest directory that exists, then create downwards.
+        missing: List[PurePosixPath] = []
+        current = path
+        while str(current) not in known and current != current.parent:
             try:
                 sftp.stat(str(current))
+                break
             except FileNotFoundError:
-                sftp.mkdir(str(current))
+                missing.append(current)
+                current = current.parent
+        for directory in reversed(missing):
+            try:
+                sftp.mkdir(str(directory))
+            except IOError:
+                # Another upload may have created it in the meantime.
+                sftp.stat(str(directory))
+        known.add(str(path))
+        known.update(str(parent) for parent in path.parents)
+
+    def _put(self, stream: ReadableStream, remote_path: PurePosixPath) -> None:
+        start = stream.tell() if stream.seekable() else None
+        with self._session() as sftp:
+            for attempt in range(2):
+                self._ensure_remote_dirs(sftp, remote_path.parent)
+                uploaded = False
+                try:
+                    # putfo pipelines its writes instead of waiting for each ack.
+                    sftp.putfo(stream, str(remote_path))
+                    uploaded = True
+                    return
+                except FileNotFoundError:
+                    # The cached directory was removed behind our back (e.g. by
+                    # retention); forget the cache and retry once if we can rewind.
+                    self._pool.known_dirs.clear()
+                    if attempt or start is None:
+                        raise
+                finally:
+                    if not uploaded:
+                        try:
+                            sftp.remove(str(remote_path))
+                        except IOError:
+                            pass
+                stream.seek(start)
 
     def upload(self, local_path: str, remote_subpath: str) -> str:
-        base_path = self.config.get("base_path", "/backups")
-        remote_path = PurePosixPath(base_path) / remote_subpath
-        sftp = self._connect()
-        try:
-            self._ensure_remote_dirs(sftp, remote_path.parent)
-            sftp.put(local_path, str(remote_path))
-        finally:
-            sftp.close()
+        remote_path = PurePosixPath(self.config.get("base_path", "/backups")) / remote_subpath
+        with open(local_path, "rb") as handle:
+            self._put(handle, remote_path)
+        return f"sftp://{self.config.get('host')}{remote_path}"
+
+    def upload_stream(self, stream: ReadableStream, remote_subpath: str) -> str:
+        remote_path = PurePosixPath(self.config.get("base_path", "/backups")) / remote_subpath
+        self._put(stream, remote_path)
         return f"sftp://{self.config.get('host')}{remote_path}"
 
+    def _remote_path(self, location: str) -> PurePosixPath:
+        # Location URIs carry the absolute remote path; bare subpaths are relative to base_path.
+        if location.startswith("sftp://"):
+            return PurePosixPath("/" + location[len("sftp://") :].split("/", 1)[-1])
+        return PurePosixPath(self.config.get("base_path", "/backups")) / location.lstrip("/")
+
+    def get_bytes(self, location: str) -> bytes:
+        with self._session() as sftp:
+            with sftp.open(str(self._remote_path(location)), "rb") as handle:
+                handle.prefetch(max_concurrent_requests=self.prefetch_requests)
+                return handle.read()
+
     def download(self, location_uri: str, local_path: str) -> None:
-        base_path = self.config.get("base_path", "/backups")
-        remote_path = location_uri
-        if location_uri.startswith("sftp://"):
-            remote_path = location_uri.split(self.config.get("host", ""), 1)[-1]
-        remote_full = PurePosixPath(base_path) / remote_path.lstrip("/")
-        sftp = self._connect()
-        try:
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            sftp.get(str(remote_full), local_path)
-        finally:
-            sftp.close()
+        remote_full = self._remote_path(location_uri)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with self._session() as sftp, open(local_path, "wb") as handle:
+            sftp.getfo(
+                str(remote_full),
+                handle,
+                prefetch=True,
+                max_concurrent_prefetch_requests=self.prefetch_requests,
+            )
+
+    def delete(self, locations: Sequence[str]) -> List[str]:
+        failed: List[str] = []
+        # One pooled channel for the whole batch instead of a connection per file.
+        with self._session() as sftp:
+            for location in locations:
+                try:
+                    sftp.remove(str(self._remote_path(location)))
+                except FileNotFoundError:
+                    continue
+                except IOError as exc:
+                    logger.warning("Could not delete %s: %s", location, exc)
+                    failed.append(location)
+        return failed
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class BulkOperationRunner:
+    """Apply one operation to many app instances under concurrency limits.
+
+    Work is capped globally (``max_concurrency``) and per server
+    (``max_per_server``), and servers are served round-robin so one large host
+    does not starve the rest. Once ``min_samples`` operations have finished, the
+    run stops scheduling new work if the failure ratio exceeds
+    ``max_error_rate``; operations already in flight are allowed to finish.
+    """
+
+    def __init__(
+        self,
+        operation: Callable[[int], Any],
+        max_concurrency: int = 10,
+        max_per_server: int = 2,
+        max_error_rate: float = 0.2,
+        min_samples: int = 5,
+        progress_callback: Optional[ProgressCallback] = None,
+    ):
+        self.operation = operation
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_server = max(1, max_per_server)
+        self.max_error_rate = max_error_rate
+        self.min_samples = max(1, min_samples)
+        self.progress_callback = progress_callback
+
+    def run(self, targets: Sequence[Tuple[int, int]]) -> Dict[str, Any]:
+        """Run the operation for ``(app_instance_id, server_id)`` pairs."""
+
+        queues: Dict[int, Deque[int]] = {}
+        for instance_id, server_id in targets:
+            queues.setdefault(server_id, deque()).append(instance_id)
+        server_order: Deque[int] = deque(queues)
+        in_flight: Dict[Future, Tuple[int, int]] = {}
+        per_server: Dict[int, int] = {server_id: 0 for server_id in queues}
+        progress: Dict[str, Any] = {
+            "total": len(targets),
+            "completed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": 0,
+            "aborted": False,
+            "failures": {},
+        }
+
+        def next_target() -> Optional[Tuple[int, int]]:
+            for _ in range(len(server_order)):
+                server_id = server_order[0]
+                server_order.rotate(-1)
+                if queues[server_id] and per_server[server_id] < self.max_per_server:
+                    return queues[server_id].popleft(), server_id
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bulk") as pool:
+            while True:
+                while not progress["aborted"] and len(in_flight) < self.max_concurrency:
+                    target = next_target()
+                    if target is None:
+                        break
+                    per_server[target[1]] += 1
+                    in_flight[pool.submit(self.operation, target[0])] = target
+                if not in_flight:
+                    break
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    instance_id, server_id = in_flight.pop(future)
+                    per_server[server_id] -= 1
+                    progress["completed"] += 1
+                    try:
+                        future.result()
+                        progress["succeeded"] += 1
+                    except Exception as exc:  # pylint: disable=broad-except
+                        logger.warning("Bulk operation failed for app instance %s: %s", instance_id, exc)
+                        progress["failed"] += 1
+                        progress["failures"][str(instance_id)] = str(exc)
+                if (
+                    not progress["aborted"]
+                    and progress["completed"] >= self.min_samples
+                    and progress["failed"] / progress["completed"] > self.max_error_rate
+                ):
+                    progress["aborted"] = True
+                    logger.error(
+                        "Bulk operation aborted: %s of %s operations failed",
+                        progress["failed"],
+                        progress["completed"],
+                    )
+                self._report(progress)
+
+        progress["skipped"] = sum(len(queue) for queue in queues.values())
+        self._report(progress)
+        return progress
+
+    def _report(self, progress: Dict[str, Any]) -> None:
+        if not self.progress_callback:
+            return
+        try:
+            self.progress_callback(dict(progress, failures=dict(progress["failures"])))
+        except Exception:  # pylint: disable=broad-except
+            logger.debug("Failed to report bulk operation progress", exc_info=True)
+
+
+def select_targets(
+    db: Any,
+    instance_ids: Optional[List[int]] = None,
+    app_id: Optional[int] = None,
+    server_id: Optional[int] = None,
+    status: Optional[str] = None,
+) -> List[Tuple[int, int]]:
+    from ..models import AppInstance
+
+    query = db.query(AppInstance.id, AppInstance.server_id)
+    if instance_ids:
+        query = query.filter(AppInstance.id.in_(instance_ids))
+    if app_id is not None:
+        query = query.filter(AppInstance.app_id == app_id)
+    if server_id is not None:
+        query = query.filter(AppInstance.server_id == server_id)
+    if status:
+        query = query.filter(AppInstance.status == status)
+    return [(row.id, row.server_id) for row in query.order_by(AppInstance.id).all()]
@@ -3,13 +3,22 @@ from __future__ import annotations
 import logging
 import os
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence, Set, TypedDict
 
 from sqlalchemy.orm import Session
 
+from ..core.config import get_settings
 from ..core.database import SessionLocal
-from ..models import AppInstance, Application, Domain, Server
+from ..models import AppInstance, AppInstanceReplica, Application, Domain, Server
+from ..utils.fs import move_or_clone_tree
+from ..utils.paths import get_app_data_base_path
+from .app_blueprints import blueprint_images, get_app_blueprint
+from .deployment_tracer import DeploymentTracer, emit, record_phase, set_outcome, trace_phase
+from .desired_state import CONTAINER_KEYS, STATE_KEYS, changed_pieces, compute_fingerprint, domain_spec
 from .dns.dns_manager import DNSManager
 from .docker_service import DockerService
 from .subdomain_service import SubdomainService
@@ -18,11 +27,88 @@ from .traefik_service import TraefikLabelBuilder
 logger = logging.getLogger(__name__)
 
 
+class ContainerNotReadyError(RuntimeError):
+    """The replacement container never passed its readiness probe."""
+
+
+class BlueGreenAbortedError(ContainerNotReadyError):
+    """The green container never became ready; the live one was left serving."""
+
+
 class DomainContext(TypedDict):
     domain: Domain
     subdomains: Set[str]
 
 
+_provider_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_provider_semaphores_lock = threading.Lock()
+
+
+def _readiness_healthcheck(probe: Sequence[str], port: int) -> Dict[str, object]:
+    """Docker healthcheck running a blueprint's readiness probe inside the container."""
+
+    seconds = 1_000_000_000
+    return {
+        "test": [part.format(port=port) for part in probe],
+        "interval": 2 * seconds,
+        "timeout": 3 * seconds,
+        "retries": 3,
+        "start_period": 0,
+    }
+
+
+def _image_repository(image: str) -> str:
+    """``image`` without its tag or digest, e.g. ``node`` for ``node:20-alpine``."""
+
+    name = image.split("@", 1)[0]
+    repository, sep, tag = name.rpartition(":")
+    # A colon followed by a path is a registry port, not a tag.
+    return repository if sep and "/" not in tag else name
+
+
+def _provider_semaphore(provider_type: str) -> threading.BoundedSemaphore:
+    """Process-wide cap on concurrent DNS calls per provider type."""
+
+    key = (provider_type or "").lower()
+    with _provider_semaphores_lock:
+        semaphore = _provider_semaphores.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(
+                max(1, get_settings().dns_provider_concurrency)
+            )
+            _provider_semaphores[key] = semaphore
+        return semaphore
+
+
+class _PullProgressRelay:
+    """Forward docker pull progress as deployment events, throttled per layer."""
+
+    def __init__(self, image: str, interval: float = 0.5):
+        self.image = image
+        self.interval = interval
+        self._last_sent: Dict[str, float] = {}
+
+    def __call__(self, event: Dict[str, object]) -> None:
+        layer = str(event.get("id") or "")
+        detail = event.get("progressDetail") or {}
+        now = time.monotonic()
+        # Status changes ("Pull complete", ...) always go out; byte counters are sampled.
+        if isinstance(detail, dict) and detail.get("total"):
+            if now - self._last_sent.get(layer, 0.0) < self.interval:
+                return
+        else:
+            detail = {}
+        self._last_sent[layer] = now
+        emit(
+            "pull_progress",
+            image=self.image,
+            layer=layer or None,
+            status=event.get("status"),
+            current=detail.get("current"),
+            total=detail.get("total"),
+        )
+
+
 class DeploymentEngine:
     def __init__(self, db_factory=SessionLocal):
         self.db_factory = db_factory
@@ -32,7 +118,11 @@ class DeploymentEngine:
     def _get_db(self) -> Session:
         return self.db_factory()
 
-    def deploy_app_instance(self, app_instance_id: int) -> AppInstance:
+    def deploy_app_instance(self, app_instance_id: int, force: bool = False) -> AppInstance:
+        with DeploymentTracer(self.db_factory, app_instance_id, "deploy"):
+            return self._deploy_app_instance(app_instance_id, force)
+
+    def _deploy_app_instance(self, app_instance_id: int, force: bool) -> AppInstance:
         db = self._get_db()
         try:
             app_instance = db.get(AppInstance, app_instance_id)
@@ -43,39 +133,57 @@ class DeploymentEngine:
             if not application or not server:
                 raise ValueError("Application or Server missing for deployment")
 
-            fqdn_list, domain_map, wildcard_roots = self._collect_domain_context(db, app_instance)
-            dns_manager = DNSManager(db)
-            dns_success, dns_errors = self._provision_dns_records(
-                dns_manager, app_instance, domain_map
-            )
-            if not dns_success:
-                error_detail = "; ".join(dns_errors) if dns_errors else "unknown error"
-                raise RuntimeError(
-                    "DNS provisioning failed for one or more domains; aborting deployment"
-                    f" ({error_detail})"
+            with trace_phase("domain_context"):
+                fqdn_list, domain_map, wildcard_roots = self._collect_domain_context(db, app_instance)
+            with trace_phase("labels"):
+                labels = TraefikLabelBuilder.build_labels_for_app_instance(
+                    app_instance, fqdn_list, wildcard_domains=wildcard_roots
                 )
-            labels = TraefikLabelBuilder.build_labels_for_app_instance(
-                app_instance, fqdn_list, wildcard_domains=wildcard_roots
-            )
             data_dir = self._get_data_dir(app_instance.id)
             data_dir.mkdir(parents=True, exist_ok=True)
+            desired = self._desired_state(app_instance, labels, data_dir, domain_map)
+            first_deploy = app_instance.deployed_state is None
+            changed = set(STATE_KEYS) if force else changed_pieces(app_instance.deployed_state, desired)
 
-            ports = {f"{app_instance.docker_port}/tcp": None}
-            container_id = self.docker_service.run_container(
-                server=server,
-                image=app_instance.docker_image,
-                name=app_instance.internal_container_name,
-                env=app_instance.env_vars,
-                labels=labels,
-                ports=ports,
-                volumes=[f"{data_dir}:/data"],
-                networks=["cp-net"],
+            if "domains" in changed:
+                # Raises with the aggregated failures, aborting the deployment.
+                with trace_phase("dns", domains=len(domain_map)):
+                    self._provision_dns_records(DNSManager(db), app_instance, domain_map)
+                self._record_deployed_state(app_instance, desired, ("domains",))
+
+            container_id: Optional[str] = None
+            if self._container_up_to_date(server, app_instance, changed):
+                set_outcome("noop")
+                logger.info(
+                    "Container for app instance %s already matches its desired state", app_instance.id
+                )
+            elif self._should_swap_blue_green(server, app_instance):
+                # Redeploying a live instance replaces it the way a restart does.
+                set_outcome("bluegreen")
+                container_id = self._blue_green_swap(server, app_instance, labels, data_dir)
+            else:
+                set_outcome("created")
+                # A stopped or stale container would still hold the canonical name.
+                with trace_phase("container_stop"):
+                    self._stop_and_remove_container(server, app_instance.internal_container_name)
+                with trace_phase("agent_run"):
+                    container_id = self._run_app_container(
+                        server, app_instance, labels, data_dir, warm=first_deploy
+                    )
+            if container_id:
+                logger.info("Deployed container %s for app instance %s", container_id, app_instance.id)
+                self._record_container_state(server, app_instance, desired, container_id)
+            self._reconcile_replicas(
+                db, app_instance, labels, data_dir, replace=bool(changed & set(CONTAINER_KEYS))
             )
-            logger.info("Deployed container %s for app instance %s", container_id, app_instance.id)
             app_instance.status = "running"
             db.commit()
             db.refresh(app_instance)
             return app_instance
+        except BlueGreenAbortedError as exc:
+            # The previous container was never touched and keeps serving traffic.
+            logger.error("Blue/green deploy aborted for app instance %s: %s", app_instance_id, exc)
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("Deployment failed for app instance %s: %s", app_instance_id, exc)
             db.query(AppInstance).filter(AppInstance.id == app_instance_id).update(
@@ -108,13 +216,26 @@ class DeploymentEngine:
                     )
                 else:
                     raise
+            self._stop_replicas(db, app_instance)
             app_instance.status = "stopped"
             db.commit()
         finally:
             db.close()
 
     def restart_app_instance(
-        self, app_instance_id: int, restore_dir: Optional[Path] = None
+        self, app_instance_id: int, restore_dir: Optional[Path] = None, force: bool = False
+    ) -> AppInstance:
+        """Redeploy an instance, optionally swapping in restored data first.
+
+        ``restore_dir`` is moved into place when it lives on the data
+        filesystem, so callers must not expect it to survive the call.
+        """
+        action = "restore" if restore_dir else "restart"
+        with DeploymentTracer(self.db_factory, app_instance_id, action):
+            return self._restart_app_instance(app_instance_id, restore_dir, force)
+
+    def _restart_app_instance(
+        self, app_instance_id: int, restore_dir: Optional[Path], force: bool
     ) -> AppInstance:
         db = self._get_db()
         try:
@@ -125,27 +246,41 @@ class DeploymentEngine:
             if not server:
                 raise ValueError("Server not found")
 
-            fqdn_list, domain_map, wildcard_roots = self._collect_domain_context(db, app_instance)
-            dns_manager = DNSManager(db)
-            self._provision_dns_records(dns_manager, app_instance, domain_map)
-
+            with trace_phase("domain_context"):
+                fqdn_list, domain_map, wildcard_roots = self._collect_domain_context(db, app_instance)
+            with trace_phase("labels"):
+                labels = TraefikLabelBuilder.build_labels_for_app_instance(
+                    app_instance,
+                    fqdn_list,
+                    wildcard_domains=wildcard_roots,
+                )
             data_dir = self._get_data_dir(app_instance.id)
             data_dir.parent.mkdir(parents=True, exist_ok=True)
+            desired = self._desired_state(app_instance, labels, data_dir, domain_map)
+            changed = set(STATE_KEYS) if force else changed_pieces(app_instance.deployed_state, desired)
+
+            if "domains" in changed:
+                with trace_phase("dns", domains=len(domain_map)):
+                    self._provision_dns_records(DNSManager(db), app_instance, domain_map)
+                self._record_deployed_state(app_instance, desired, ("domains",))
 
+            container_id: Optional[str] = None
             if restore_dir:
                 self._validate_restore_dir(restore_dir)
                 temp_restore_dir = data_dir.with_name(f"{data_dir.name}_temp_restore")
                 try:
-                    # First, copy the restore data to a temporary location. This is the step
-                    # most likely to fail if the restore archive is corrupted or unreadable.
+                    # Stage the restored data next to the live directory. Restores extracted
+                    # on the same filesystem are renamed into place; anything else is cloned.
                     if temp_restore_dir.exists():
                         shutil.rmtree(temp_restore_dir)
-                    shutil.copytree(restore_dir, temp_restore_dir)
+                    with trace_phase("restore_stage"):
+                        move_or_clone_tree(restore_dir, temp_restore_dir)
 
-                    # Only after the copy succeeds, stop the live container
+                    # Only after staging succeeds, stop the live containers
                     self._stop_and_remove_container(
                         server, app_instance.internal_container_name
                     )
+                    self._stop_replicas(db, app_instance)
 
                     # Atomically replace the data directory with the restored content.
                     # The source `temp_restore_dir` is moved into place.
@@ -154,31 +289,46 @@ class DeploymentEngine:
                     # Clean up the temporary directory if it still exists
                     if temp_restore_dir.exists():
                         shutil.rmtree(temp_restore_dir)
+                set_outcome("restored")
+                with trace_phase("agent_run"):
+                    container_id = self._run_app_container(server, app_instance, labels, data_dir)
+            elif self._container_up_to_date(server, app_instance, changed):
+                data_dir.mkdir(parents=True, exist_ok=True)
+                set_outcome("noop")
+                logger.info(
+                    "App instance %s already matches its desired state, nothing to restart",
+                    app_instance.id,
+                )
+            elif self._should_swap_blue_green(server, app_instance):
+                data_dir.mkdir(parents=True, exist_ok=True)
+                set_outcome("bluegreen")
+                container_id = self._blue_green_swap(server, app_instance, labels, data_dir)
             else:
                 # For a simple restart, just ensure the container is stopped and data dir exists
-                self._stop_and_remove_container(server, app_instance.internal_container_name)
+                set_outcome("recreated")
+                with trace_phase("container_stop"):
+                    self._stop_and_remove_container(server, app_instance.internal_container_name)
                 data_dir.mkdir(parents=True, exist_ok=True)
-            ports = {f"{app_instance.docker_port}/tcp": None}
-            labels = TraefikLabelBuilder.build_labels_for_app_instance(
+                with trace_phase("agent_run"):
+                    container_id = self._run_app_container(server, app_instance, labels, data_dir)
+            if container_id:
+                logger.info("Restarted container %s for app instance %s", container_id, app_instance.id)
+                self._record_container_state(server, app_instance, desired, container_id)
+            self._reconcile_replicas(
+                db,
                 app_instance,
-                fqdn_list,
-                wildcard_domains=wildcard_roots,
-            )
-            container_id = self.docker_service.run_container(
-                server,
-                app_instance.docker_image,
-                app_instance.internal_container_name,
-                app_instance.env_vars,
                 labels,
-                ports,
-                volumes=[f"{data_dir}:/data"],
-                networks=["cp-net"],
+                data_dir,
+                replace=bool(restore_dir) or bool(changed & set(CONTAINER_KEYS)),
             )
-            logger.info("Restarted container %s for app instance %s", container_id, app_instance.id)
             app_instance.status = "running"
             db.commit()
             db.refresh(app_instance)
             return app_instance
+        except BlueGreenAbortedError as exc:
+            # The previous container was never touched and keeps serving traffic.
+            logger.error("Blue/green restart aborted for app instance %s: %s", app_instance_id, exc)
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("Restart failed for app instance %s: %s", app_instance_id, exc)
             # Use a transaction-safe update
@@ -202,8 +352,377 @@ class DeploymentEngine:
         finally:
             db.close()
 
+    def _run_app_container(
+        self,
+        server: Server,
+        app_instance: AppInstance,
+        labels: Dict[str, str],
+        data_dir: Path,
+        name: Optional[str] = None,
+        healthcheck: Optional[Dict[str, object]] = None,
+        warm: bool = False,
+    ) -> str:
+        # First deployments of blueprint images go through the agent's warm
+        # pool, which keeps the image current itself; a pool miss makes the
+        # agent pull inside the run call.
+        warm = warm and get_settings().warm_pool_enabled and app_instance.docker_image in blueprint_images()
+        pulled = False if warm else self._pull_image(server, app_instance.docker_image)
+        return self.docker_service.run_container(
+            server,
+            app_instance.docker_image,
+            name or app_instance.internal_container_name,
+            app_instance.env_vars,
+            labels,
+            self._container_ports(app_instance),
+            volumes=self._container_volumes(data_dir),
+            networks=["cp-net"],
+            healthcheck=healthcheck,
+            pull=not pulled,
+            warm=warm,
+        )
+
+    def _pull_image(self, server: Server, image: str) -> bool:
+        """Pull ahead of the run call so progress can be streamed to watchers.
+
+        Returns False when the pre-pull failed (for example an agent without
+        ``/docker/pull``), in which case the run call pulls as before.
+        """
+
+        try:
+            with trace_phase("image_pull", image=image):
+                self.docker_service.pull_image(server, image, on_progress=_PullProgressRelay(image))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Pre-pull of %s on %s failed, the run call will pull: %s", image, server.name, exc)
+            return False
+        return True
+
+    @staticmethod
+    def _container_ports(app_instance: AppInstance) -> Dict[str, None]:
+        return {f"{app_instance.docker_port}/tcp": None}
+
+    @staticmethod
+    def _container_volumes(data_dir: Path) -> List[str]:
+        return [f"{data_dir}:/data"]
+
+    def _desired_state(
+        self,
+        app_instance: AppInstance,
+        labels: Dict[str, str],
+        data_dir: Path,
+        domain_map: Dict[int, DomainContext],
+    ) -> Dict[str, str]:
+        return compute_fingerprint(
+            app_instance.docker_image,
+            app_instance.env_vars,
+            labels,
+            self._container_ports(app_instance),
+            self._container_volumes(data_dir),
+            domain_spec(app_instance.server_id, domain_map),
+        )
+
+    def _container_up_to_date(
+        self, server: Server, app_instance: AppInstance, changed: Set[str]
+    ) -> bool:
+        """True when the running container was created from the desired spec.
+
+        The recorded image id guards against the container having been replaced
+        out of band; a tag that now points at a newer image needs ``force``.
+        """
+
+        if changed.intersection(CONTAINER_KEYS):
+            return False
+        current = self.docker_service.inspect_container(
+            server, app_instance.internal_container_name
+        )
+        if not current or not current.get("running"):
+            return False
+        recorded_image = (app_instance.deployed_state or {}).get("image_id")
+        return not recorded_image or current.get("image_id") == recorded_image
+
+    def _record_container_state(
+        self,
+        server: Server,
+        app_instance: AppInstance,
+        desired: Dict[str, str],
+        container_id: str,
+    ) -> None:
+        try:
+            current = self.docker_service.inspect_container(server, container_id) or {}
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Could not inspect container %s: %s", container_id, exc)
+            current = {}
+        self._record_deployed_state(
+            app_instance, desired, CONTAINER_KEYS, image_id=current.get("image_id")
+        )
+
+    @staticmethod
+    def _record_deployed_state(
+        app_instance: AppInstance,
+        desired: Dict[str, str],
+        keys: Sequence[str],
+        **extra: Optional[str],
+    ) -> None:
+        # Assign a new dict so SQLAlchemy notices the JSON column changed.
+        app_instance.deployed_state = {
+            **(app_instance.deployed_state or {}),
+            **{key: desired[key] for key in keys},
+            **extra,
+        }
+
+    def _should_swap_blue_green(self, server: Server, app_instance: AppInstance) -> bool:
+        if get_settings().restart_strategy != "bluegreen":
+            return False
+        if self._readiness_for(app_instance) is None:
+            # Without a probe nothing tells us when green is serving, so
+            # cutting traffic over would be a guess; recreate instead.
+            logger.info(
+                "No readiness probe for image %s, recreating app instance %s in place",
+                app_instance.docker_image,
+                app_instance.id,
+            )
+            return False
+        current = self.docker_service.inspect_container(
+            server, app_instance.internal_container_name
+        )
+        # Nothing is serving, so there is no downtime to avoid.
+        return bool(current and current.get("running"))
+
+    def _blue_green_swap(
+        self,
+        server: Server,
+        app_instance: AppInstance,
+        labels: Dict[str, str],
+        data_dir: Path,
+    ) -> str:
+        """Replace the running container without a gap in service.
+
+        The replacement ("green") starts next to the live one under a temporary
+        name with the same Traefik labels and a readiness healthcheck; Traefik
+        ignores containers that are not yet healthy, so it only joins the load
+        balancer once ready. The old container is then stopped, which drains
+        it, and green takes over the canonical name.
+        """
+
+        live_name = app_instance.internal_container_name
+        green_name = f"{live_name}-green"
+        # Leftover from an earlier aborted swap.
+        self._stop_and_remove_container(server, green_name)
+        with trace_phase("agent_run"):
+            green_id = self._run_app_container(
+                server,
+                app_instance,
+                labels,
+                data_dir,
+                name=green_name,
+                healthcheck=self._readiness_for(app_instance),
+            )
+        try:
+            self._wait_until_ready(server, green_name)
+        except ContainerNotReadyError as exc:
+            self._stop_and_remove_container(server, green_name)
+            raise BlueGreenAbortedError(str(exc)) from exc
+        except Exception:
+            self._stop_and_remove_container(server, green_name)
+            raise
+        with trace_phase("container_stop"):
+            self._stop_and_remove_container(server, live_name)
+        with trace_phase("container_rename"):
+            self.docker_service.rename_container(server, green_id, live_name)
+        return green_id
+
+    @staticmethod
+    def _readiness_for(app_instance: AppInstance) -> Optional[Dict[str, object]]:
+        """The blueprint's readiness healthcheck, or None when there is no known probe.
+
+        Probes rely on a tool shipped in the blueprint's image, so an instance
+        running some other image gets none.
+        """
+
+        application = app_instance.application
+        blueprint = get_app_blueprint(application.type) if application else {}
+        probe = blueprint.get("readiness")
+        if not probe or _image_repository(app_instance.docker_image) != _image_repository(
+            blueprint["docker_image"]
+        ):
+            return None
+        return _readiness_healthcheck(probe, app_instance.docker_port)
+
+    def scale_app_instance(
+        self,
+        app_instance_id: int,
+        replicas: int,
+        server_ids: Optional[Sequence[int]] = None,
+    ) -> AppInstance:
+        """Change the number of containers serving an instance without downtime.
+
+        New replicas must pass their readiness check before surplus ones are
+        stopped. Replicas run on the instance's own server: they share its
+        host-local data directory and Traefik only routes to local containers,
+        so ``server_ids`` naming any other server is rejected.
+        """
+
+        if replicas < 1:
+            raise ValueError("An app instance needs at least one replica")
+        with DeploymentTracer(self.db_factory, app_instance_id, "scale"):
+            return self._scale_app_instance(app_instance_id, replicas, server_ids)
+
+    def _scale_app_instance(
+        self, app_instance_id: int, replicas: int, server_ids: Optional[Sequence[int]]
+    ) -> AppInstance:
+        db = self._get_db()
+        try:
+            app_instance = db.get(AppInstance, app_instance_id)
+            if not app_instance:
+                raise ValueError("AppInstance not found")
+            other_servers = sorted(set(server_ids or ()) - {app_instance.server_id})
+            if other_servers:
+                raise ValueError(
+                    f"Replicas must run on the instance's server {app_instance.server_id}, "
+                    f"not {other_servers}"
+                )
+            try:
+                fqdn_list, _, wildcard_roots = self._collect_domain_context(db, app_instance)
+                labels = TraefikLabelBuilder.build_labels_for_app_instance(
+                    app_instance, fqdn_list, wildcard_domains=wildcard_roots
+                )
+                data_dir = self._get_data_dir(app_instance.id)
+                data_dir.mkdir(parents=True, exist_ok=True)
+                app_instance.replicas = replicas
+                self._reconcile_replicas(db, app_instance, labels, data_dir)
+                db.commit()
+                db.refresh(app_instance)
+                logger.info("Scaled app instance %s to %s replicas", app_instance.id, replicas)
+                return app_instance
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("Scaling failed for app instance %s: %s", app_instance_id, exc)
+                db.rollback()
+                db.query(AppInstance).filter(AppInstance.id == app_instance_id).update(
+                    {"status": "error"}
+                )
+                db.commit()
+                raise
+        finally:
+            db.close()
+
+    def _reconcile_replicas(
+        self,
+        db: Session,
+        app_instance: AppInstance,
+        labels: Dict[str, str],
+        data_dir: Path,
+        replace: bool = False,
+    ) -> None:
+        """Converge the extra replica containers on ``app_instance.replicas``.
+
+        Replica 0 is the primary container managed by deploy/restart. Existing
+        replicas are replaced one at a time, each waiting for readiness, so the
+        rest keep serving; with ``replace=False`` only stopped or missing ones
+        are recreated.
+        """
+
+        with trace_phase("replicas", replicas=app_instance.replicas or 1):
+            self._converge_replicas(db, app_instance, labels, data_dir, replace)
+
+    def _converge_replicas(
+        self,
+        db: Session,
+        app_instance: AppInstance,
+        labels: Dict[str, str],
+        data_dir: Path,
+        replace: bool,
+    ) -> None:
+        desired = max(1, app_instance.replicas or 1)
+        by_index = {replica.replica_index: replica for replica in app_instance.replica_containers}
+        home_server = db.get(Server, app_instance.server_id)
+        if not home_server:
+            raise ValueError("Server not found")
+        # Without a known probe a replica counts as ready once it runs.
+        healthcheck = self._readiness_for(app_instance)
+        started: List[AppInstanceReplica] = []
+        try:
+            for index in range(1, desired):
+                replica = by_index.get(index)
+                if replica is None:
+                    replica = AppInstanceReplica(
+                        app_instance_id=app_instance.id,
+                        server_id=home_server.id,
+                        replica_index=index,
+                        container_name=f"{app_instance.internal_container_name}-r{index}",
+                    )
+                    db.add(replica)
+                    app_instance.replica_containers.append(replica)
+                    started.append(replica)
+                elif replica.server_id != home_server.id:
+                    # Placed on another server, where the data directory is
+                    # empty and nothing routes to it; bring it home.
+                    stale_server = db.get(Server, replica.server_id)
+                    if stale_server:
+                        self._stop_and_remove_container(stale_server, replica.container_name)
+                    replica.server_id = home_server.id
+                elif not replace:
+                    current = self.docker_service.inspect_container(home_server, replica.container_name)
+                    if current and current.get("running"):
+                        continue
+                self._stop_and_remove_container(home_server, replica.container_name)
+                self._run_app_container(
+                    home_server,
+                    app_instance,
+                    labels,
+                    data_dir,
+                    name=replica.container_name,
+                    healthcheck=healthcheck,
+                )
+                self._wait_until_ready(home_server, replica.container_name)
+                replica.status = "running"
+        except Exception:
+            # Roll back replicas created by this call; replaced ones stay as they are.
+            for replica in started:
+                self._stop_and_remove_container(home_server, replica.container_name)
+            raise
+
+        for replica in list(app_instance.replica_containers):
+            if replica.replica_index < desired:
+                continue
+            server = db.get(Server, replica.server_id)
+            if server:
+                # Stopping lets Traefik drain the container before it goes away.
+                self._stop_and_remove_container(server, replica.container_name)
+            app_instance.replica_containers.remove(replica)
+
+    def _stop_replicas(self, db: Session, app_instance: AppInstance) -> None:
+        for replica in app_instance.replica_containers:
+            server = db.get(Server, replica.server_id)
+            if server:
+                self._stop_and_remove_container(server, replica.container_name)
+            replica.status = "stopped"
+
+    def _wait_until_ready(self, server: Server, container_name: str) -> None:
+        with trace_phase("readiness", container=container_name):
+            self._poll_until_ready(server, container_name)
+
+    def _poll_until_ready(self, server: Server, container_name: str) -> None:
+        settings = get_settings()
+        deadline = time.monotonic() + settings.readiness_timeout_seconds
+        while True:
+            state = self.docker_service.inspect_container(server, container_name)
+            if not state:
+                raise ContainerNotReadyError(f"Container {container_name} disappeared")
+            if not state.get("running"):
+                raise ContainerNotReadyError(
+                    f"Container {container_name} exited with code {state.get('exit_code')}"
+                )
+            health = state.get("health")
+            if health == "healthy" or (health is None and state.get("running")):
+                return
+            if time.monotonic() >= deadline:
+                raise ContainerNotReadyError(
+                    f"Container {container_name} not ready after "
+                    f"{settings.readiness_timeout_seconds}s (health: {health})"
+                )
+            time.sleep(settings.readiness_poll_interval)
+
     def _get_data_dir(self, app_instance_id: int) -> Path:
-        return Path("/var/lib/server-panel/app-data") / f"app_instance_{app_instance_id}"
+        return get_app_data_base_path() / f"app_instance_{app_instance_id}"
 
     def _stop_and_remove_container(self, server: Server, container_name: str) -> None:
         """Ensure the container is stopped and removed before mutating mounted data."""
@@ -395,31 +914,116 @@ class DeploymentEngine:
         dns_manager: DNSManager,
         app_instance: AppInstance,
         domain_map: Dict[int, DomainContext],
-    ) -> None:
+    ) -> Dict[str, float]:
+        """Provision DNS for every domain, fanning out when there is more than one.
+
+        Each worker thread uses its own session and DNSManager, and calls are
+        throttled per provider type. Every attempt is recorded as a ``dns_domain``
+        phase tagged with its outcome. Returns the per-domain duration in seconds
+        and raises with the aggregated failures once every domain was tried.
+        """
+
+        settings = get_settings()
+        tasks = [
+            (ctx["domain"], sorted(ctx["subdomains"]) if ctx.get("subdomains") else [])
+            for ctx in domain_map.values()
+        ]
+        timings: Dict[str, float] = {}
         failures: List[str] = []
-        for ctx in domain_map.values():
-            domain: Domain = ctx["domain"]
-            subdomains: Sequence[str] = (
-                sorted(ctx["subdomains"])
-                if ctx.get("subdomains")
-                else []
-            )
-            try:
-                dns_manager.create_dns_for_deployment(
-                    app_instance,
-                    domain,
-                    subdomains=list(subdomains),
-                )
-            except Exception as exc:  # pylint: disable=broad-except
-                logger.error(
-                    "DNS provisioning failed for domain %s: %s", domain.domain_name, exc
-                )
-                failures.append(domain.domain_name)
+        if len(tasks) <= 1:
+            for domain, subdomains in tasks:
+                started = time.monotonic()
+                outcome = "error"
+                try:
+                    with _provider_semaphore(domain.provider_type):
+                        dns_manager.create_dns_for_deployment(
+                            app_instance, domain, subdomains=subdomains
+                        )
+                    outcome = "success"
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error(
+                        "DNS provisioning failed for domain %s: %s", domain.domain_name, exc
+                    )
+                    failures.append(domain.domain_name)
+                finally:
+                    timings[domain.domain_name] = time.monotonic() - started
+                    record_phase(
+                        "dns_domain",
+                        timings[domain.domain_name] * 1000,
+                        domain=domain.domain_name,
+                        outcome=outcome,
+                    )
+        else:
+            max_workers = max(1, min(len(tasks), settings.dns_provision_max_workers))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dns") as pool:
+                # Workers fill in their own duration, including when they fail;
+                # phases are recorded here since the tracer lives on this thread.
+                futures = {
+                    pool.submit(
+                        self._provision_domain_dns,
+                        app_instance.id,
+                        domain.id,
+                        domain.provider_type,
+                        subdomains,
+                        timings,
+                        domain.domain_name,
+                    ): domain.domain_name
+                    for domain, subdomains in tasks
+                }
+                for future in as_completed(futures):
+                    domain_name = futures[future]
+                    outcome = "error"
+                    try:
+                        future.result()
+                        outcome = "success"
+                    except Exception as exc:  # pylint: disable=broad-except
+                        logger.error(
+                            "DNS provisioning failed for domain %s: %s", domain_name, exc
+                        )
+                        failures.append(domain_name)
+                    finally:
+                        record_phase(
+                            "dns_domain",
+                            timings.get(domain_name, 0.0) * 1000,
+                            domain=domain_name,
+                            outcome=outcome,
+                        )
 
+        if timings:
+            logger.info(
+                "DNS provisioning timings for app instance %s: %s",
+                app_instance.id,
+                ", ".join(f"{name}={seconds:.3f}s" for name, seconds in sorted(timings.items())),
+            )
         if failures:
             raise RuntimeError(
                 "DNS provisioning failed for: " + ", ".join(sorted(failures))
             )
+        return timings
+
+    def _provision_domain_dns(
+        self,
+        app_instance_id: int,
+        domain_id: int,
+        provider_type: str,
+        subdomains: Sequence[str],
+        timings: Dict[str, float],
+        domain_name: str,
+    ) -> None:
+        started = time.monotonic()
+        db = self._get_db()
+        try:
+            app_instance = db.get(AppInstance, app_instance_id)
+            domain = db.get(Domain, domain_id)
+            if not app_instance or not domain:
+                raise ValueError(f"Domain {domain_id} or AppInstance {app_instance_id} missing")
+            with _provider_semaphore(provider_type):
+                DNSManager(db).create_dns_for_deployment(
+                    app_instance, domain, subdomains=list(subdomains)
+                )
+        finally:
+            db.close()
+            timings[domain_name] = time.monotonic() - started
 
     def get_app_logs(self, app_instance_id: int, tail: int = 200) -> str:
         db = self._get_db()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, cast
+
+from redis.exceptions import RedisError
+
+from ..core.queue import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "deployment-events"
+HISTORY_LIMIT = 500
+HISTORY_TTL_SECONDS = 60 * 60
+# After a failed publish, skip Redis for this long so a missing broker does
+# not add a connection attempt to every deployment phase.
+PUBLISH_BACKOFF_SECONDS = 30.0
+
+_publish_disabled_until = 0.0
+_publish_lock = threading.Lock()
+
+
+def _channel(app_instance_id: int) -> str:
+    return f"{CHANNEL_PREFIX}:{app_instance_id}"
+
+
+def _current_job_id() -> Optional[str]:
+    try:
+        from rq import get_current_job
+
+        job = get_current_job()
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return job.id if job else None
+
+
+def publish_event(app_instance_id: int, event_type: str, **data: Any) -> None:
+    """Publish a progress event for an app instance; never raises.
+
+    Events get a per-instance sequence number usable as an SSE ``id`` and are
+    kept in a capped history list so late subscribers can catch up.
+    """
+
+    global _publish_disabled_until
+    if time.monotonic() < _publish_disabled_until:
+        return
+    channel = _channel(app_instance_id)
+    try:
+        connection = get_redis_connection()
+        event: Dict[str, Any] = {
+            "id": cast(int, connection.incr(f"{channel}:seq")),
+            "type": event_type,
+            "app_instance_id": app_instance_id,
+            "job_id": _current_job_id(),
+            "at": datetime.utcnow().isoformat(),
+            **data,
+        }
+        payload = json.dumps(event, default=str)
+        pipe = connection.pipeline()
+        pipe.rpush(f"{channel}:history", payload)
+        pipe.ltrim(f"{channel}:history", -HISTORY_LIMIT, -1)
+        pipe.expire(f"{channel}:history", HISTORY_TTL_SECONDS)
+        pipe.expire(f"{channel}:seq", HISTORY_TTL_SECONDS)
+        pipe.publish(channel, payload)
+        pipe.execute()
+    except RedisError as exc:
+        with _publish_lock:
+            _publish_disabled_until = time.monotonic() + PUBLISH_BACKOFF_SECONDS
+        logger.warning("Deployment events disabled for %ss: %s", PUBLISH_BACKOFF_SECONDS, exc)
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def stream_events(
+    app_instance_id: int,
+    last_event_id: Optional[int] = None,
+    job_id: Optional[str] = None,
+    follow: bool = True,
+    keepalive_seconds: float = 15.0,
+) -> Iterator[str]:
+    """Yield server-sent events for an app instance.
+
+    Without ``last_event_id`` the replay starts at the most recent
+    ``deployment_start`` in the history. With ``job_id`` only that job's
+    events are sent. Unless ``follow`` is set, the stream ends after the first
+    ``deployment_end``.
+    """
+
+    connection = get_redis_connection()
+    channel = _channel(app_instance_id)
+    pubsub = connection.pubsub(ignore_subscribe_messages=True)
+    # Subscribe before reading the history so nothing falls in between;
+    # duplicates are dropped by sequence number.
+    pubsub.subscribe(channel)
+    try:
+        history = [
+            json.loads(raw) for raw in cast(List[bytes], connection.lrange(f"{channel}:history", 0, -1))
+        ]
+        yield ": connected\n\n"
+        if job_id:
+            history = [event for event in history if event.get("job_id") == job_id]
+        if last_event_id is not None:
+            history = [event for event in history if event["id"] > last_event_id]
+        else:
+            starts = [index for index, event in enumerate(history) if event["type"] == "deployment_start"]
+            history = history[starts[-1]:] if starts else []
+        seen = last_event_id or 0
+        for event in history:
+            seen = max(seen, event["id"])
+            yield _format_sse(event)
+            if not follow and event["type"] == "deployment_end":
+                return
+
+        idle_since = time.monotonic()
+        while True:
+            message = pubsub.get_message(timeout=1.0)
+            if message is None:
+                if time.monotonic() - idle_since >= keepalive_seconds:
+                    idle_since = time.monotonic()
+                    yield ": keepalive\n\n"
+                continue
+            event = json.loads(message["data"])
+            if event["id"] <= seen or (job_id and event.get("job_id") != job_id):
+                continue
+            seen = event["id"]
+            idle_since = time.monotonic()
+            yield _format_sse(event)
+            if not follow and event["type"] == "deployment_end":
+                return
+    finally:
+        pubsub.close()
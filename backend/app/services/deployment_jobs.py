@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from ..core.config import get_settings
+from ..core.queue import get_queue, get_redis_connection
+from ..workers.deployment_worker import (
+    bulk_operation_job,
+    deploy_app_instance_job,
+    restart_app_instance_job,
+    restore_app_instance_job,
+    rolling_upgrade_job,
+    scale_app_instance_job,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_job(
+    func: Callable[..., Any],
+    *args: Any,
+    action: str,
+    job_timeout: Optional[int] = None,
+    **meta: Any,
+) -> Job:
+    """Put ``func(*args)`` on the deployments queue, tagging it for status lookups."""
+
+    settings = get_settings()
+    job = get_queue().enqueue(
+        func,
+        *args,
+        job_timeout=job_timeout or settings.deployment_job_timeout,
+        result_ttl=settings.deployment_job_result_ttl,
+        failure_ttl=settings.deployment_job_result_ttl,
+        meta={"action": action, **meta},
+        description=f"{action} {meta}",
+    )
+    logger.info("Enqueued %s job %s (%s)", action, job.id, meta)
+    return job
+
+
+def enqueue_deployment(app_instance_id: int) -> Job:
+    return enqueue_job(
+        deploy_app_instance_job, app_instance_id, action="deploy", app_instance_id=app_instance_id
+    )
+
+
+def enqueue_restart(app_instance_id: int, force: bool = False) -> Job:
+    return enqueue_job(
+        restart_app_instance_job,
+        app_instance_id,
+        force,
+        action="restart",
+        app_instance_id=app_instance_id,
+        force=force,
+    )
+
+
+def enqueue_scale(app_instance_id: int, replicas: int, server_ids: Optional[List[int]] = None) -> Job:
+    return enqueue_job(
+        scale_app_instance_job,
+        app_instance_id,
+        replicas,
+        server_ids,
+        action="scale",
+        app_instance_id=app_instance_id,
+        replicas=replicas,
+    )
+
+
+def enqueue_restore(app_instance_id: int, snapshot_id: int) -> Job:
+    return enqueue_job(
+        restore_app_instance_job,
+        app_instance_id,
+        snapshot_id,
+        action="restore",
+        app_instance_id=app_instance_id,
+        snapshot_id=snapshot_id,
+    )
+
+
+def enqueue_bulk_operation(
+    action: str,
+    targets: List[Tuple[int, int]],
+    options: Dict[str, Any],
+    force: bool = False,
+) -> Job:
+    return enqueue_job(
+        bulk_operation_job,
+        action,
+        targets,
+        options,
+        force,
+        action=f"bulk_{action}",
+        job_timeout=get_settings().bulk_operation_job_timeout,
+        total=len(targets),
+        force=force,
+    )
+
+
+def enqueue_rolling_upgrade(application_id: int, image: str, options: Dict[str, Any]) -> Job:
+    return enqueue_job(
+        rolling_upgrade_job,
+        application_id,
+        image,
+        options,
+        action="rolling_upgrade",
+        job_timeout=get_settings().bulk_operation_job_timeout,
+        application_id=application_id,
+        image=image,
+    )
+
+
+def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        job = Job.fetch(job_id, connection=get_redis_connection())
+    except NoSuchJobError:
+        return None
+    error: Optional[str] = None
+    if job.is_failed and job.exc_info:
+        error = job.exc_info.strip().splitlines()[-1]
+    meta = dict(job.meta or {})
+    status = job.get_status(refresh=False)
+    return {
+        "id": job.id,
+        "status": getattr(status, "value", status) or "unknown",
+        "action": meta.pop("action", None),
+        "app_instance_id": meta.pop("app_instance_id", None),
+        "enqueued_at": job.enqueued_at,
+        "started_at": job.started_at,
+        "ended_at": job.ended_at,
+        "error": error,
+        "result": job.return_value() if job.is_finished else None,
+        "meta": meta,
+    }
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypedDict
+
+from sqlalchemy.orm import Session
+
+from ..models import Deployment
+from .deployment_events import publish_event
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["DeploymentTracer"]] = ContextVar("deployment_tracer", default=None)
+
+
+class DeploymentTracer:
+    """Time the phases of one deployment and persist them as a ``Deployment`` row.
+
+    Used as a context manager around a deploy/restart; while active it is
+    reachable through :func:`current_tracer`, so lower layers such as
+    ``DockerService`` can report timings without being handed the tracer.
+    Persisting goes through its own session and never fails the deployment.
+    Phase boundaries are also published as live progress events.
+    """
+
+    def __init__(self, db_factory: Callable[[], Session], app_instance_id: int, action: str):
+        self.db_factory = db_factory
+        self.app_instance_id = app_instance_id
+        self.action = action
+        self.outcome: Optional[str] = None
+        self.phases: List[Dict[str, Any]] = []
+        self.deployment_id: Optional[int] = None
+        self._started = 0.0
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> "DeploymentTracer":
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        self._save(status="running")
+        self.publish("deployment_start", action=self.action)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        status = "failed" if exc is not None else "success"
+        error = str(exc) if exc is not None else None
+        self._save(status=status, error=error, finished=True)
+        self.publish(
+            "deployment_end",
+            action=self.action,
+            status=status,
+            outcome=self.outcome,
+            error=error,
+            duration_ms=round((time.perf_counter() - self._started) * 1000, 3),
+        )
+
+    def publish(self, event_type: str, **data: Any) -> None:
+        publish_event(self.app_instance_id, event_type, deployment_id=self.deployment_id, **data)
+
+    @contextmanager
+    def phase(self, name: str, **detail: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        failed = False
+        self.publish("phase_start", phase=name, **detail)
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(
+                name,
+                (time.perf_counter() - started) * 1000,
+                offset_ms=(started - self._started) * 1000,
+                **({"failed": True} if failed else {}),
+                **detail,
+            )
+
+    def record(self, name: str, duration_ms: float, offset_ms: Optional[float] = None, **detail: Any) -> None:
+        entry: Dict[str, Any] = {"name": name, "duration_ms": round(duration_ms, 3)}
+        if offset_ms is not None:
+            entry["offset_ms"] = round(offset_ms, 3)
+        entry.update(detail)
+        self.phases.append(entry)
+        self.publish("phase_end", phase=name, **{k: v for k, v in entry.items() if k != "name"})
+
+    def _save(self, status: str, error: Optional[str] = None, finished: bool = False) -> None:
+        try:
+            with self.db_factory() as db:
+                deployment = db.get(Deployment, self.deployment_id) if self.deployment_id else None
+                if deployment is None:
+                    deployment = Deployment(app_instance_id=self.app_instance_id, action=self.action)
+                    db.add(deployment)
+                deployment.status = status
+                deployment.outcome = self.outcome
+                deployment.error = error
+                deployment.phases = list(self.phases)
+                if finished:
+                    deployment.finished_at = datetime.utcnow()
+                    deployment.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+                db.commit()
+                self.deployment_id = deployment.id
+        except Exception:  # pylint: disable=broad-except
+            logger.warning(
+                "Failed to record %s trace for app instance %s", self.action, self.app_instance_id, exc_info=True
+            )
+
+
+def current_tracer() -> Optional[DeploymentTracer]:
+    return _current.get()
+
+
+@contextmanager
+def trace_phase(name: str, **detail: Any) -> Iterator[None]:
+    """Time ``name`` on the active tracer; a no-op outside a traced deployment."""
+
+    tracer = _current.get()
+    if tracer is None:
+        yield
+        return
+    with tracer.phase(name, **detail):
+        yield
+
+
+def record_phase(name: str, duration_ms: float, **detail: Any) -> None:
+    tracer = _current.get()
+    if tracer is not None:
+        tracer.record(name, duration_ms, **detail)
+
+
+def emit(event_type: str, **data: Any) -> None:
+    """Publish a progress event for the active deployment, if any."""
+
+    tracer = _current.get()
+    if tracer is not None:
+        tracer.publish(event_type, **data)
+
+
+def set_outcome(outcome: str) -> None:
+    tracer = _current.get()
+    if tracer is not None:
+        tracer.outcome = outcome
+
+
+class PhaseStats(TypedDict):
+    name: str
+    count: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    total_ms: float
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def phase_statistics(deployments: List[Deployment], slowest: int = 10) -> Dict[str, Any]:
+    """Per-phase latency percentiles plus the slowest deployments in ``deployments``."""
+
+    samples: Dict[str, List[float]] = {}
+    for deployment in deployments:
+        for phase in deployment.phases or []:
+            samples.setdefault(phase["name"], []).append(float(phase["duration_ms"]))
+    phases: List[PhaseStats] = []
+    for name, values in samples.items():
+        ordered = sorted(values)
+        phases.append(
+            PhaseStats(
+                name=name,
+                count=len(ordered),
+                p50_ms=round(_percentile(ordered, 50), 3),
+                p95_ms=round(_percentile(ordered, 95), 3),
+                max_ms=round(ordered[-1], 3),
+                total_ms=round(sum(ordered), 3),
+            )
+        )
+    phases.sort(key=lambda item: item["p95_ms"], reverse=True)
+
+    finished = [deployment for deployment in deployments if deployment.duration_ms is not None]
+    finished.sort(key=lambda deployment: deployment.duration_ms or 0.0, reverse=True)
+    slowest_items = []
+    for deployment in finished[:slowest]:
+        top = max(deployment.phases or [], key=lambda phase: phase["duration_ms"], default=None)
+        slowest_items.append(
+            {
+                "id": deployment.id,
+                "app_instance_id": deployment.app_instance_id,
+                "action": deployment.action,
+                "status": deployment.status,
+                "duration_ms": deployment.duration_ms,
+                "slowest_phase": top["name"] if top else None,
+                "slowest_phase_ms": top["duration_ms"] if top else None,
+                "started_at": deployment.started_at,
+            }
+        )
+    return {"deployments": len(deployments), "phases": phases, "slowest": slowest_items}
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+# Pieces of an app instance's desired state, each hashed separately so the
+# engine can tell which deployment steps actually have work to do.
+CONTAINER_KEYS = ("image", "env", "labels", "ports", "volumes")
+STATE_KEYS = CONTAINER_KEYS + ("domains",)
+
+
+def _digest(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def domain_spec(server_id: int, domain_map: Mapping[int, Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Everything DNS provisioning for an instance depends on, in a stable order."""
+
+    spec: List[Dict[str, Any]] = []
+    for domain_id in sorted(domain_map):
+        domain = domain_map[domain_id]["domain"]
+        spec.append(
+            {
+                "id": domain.id,
+                "name": domain.domain_name,
+                "provider": domain.provider_type,
+                "wildcard": bool(domain.is_wildcard),
+                "subdomains": sorted(domain_map[domain_id].get("subdomains") or []),
+            }
+        )
+    return [{"server_id": server_id}, *spec]
+
+
+def compute_fingerprint(
+    image: str,
+    env: Optional[Mapping[str, Any]],
+    labels: Mapping[str, str],
+    ports: Mapping[str, Any],
+    volumes: Iterable[str],
+    domains: List[Dict[str, Any]],
+) -> Dict[str, str]:
+    return {
+        "image": _digest(image),
+        "env": _digest(dict(env or {})),
+        "labels": _digest(dict(labels)),
+        "ports": _digest(dict(ports)),
+        "volumes": _digest(sorted(volumes)),
+        "domains": _digest(domains),
+    }
+
+
+def changed_pieces(previous: Optional[Mapping[str, Any]], desired: Mapping[str, str]) -> Set[str]:
+    previous = previous or {}
+    return {key for key in STATE_KEYS if previous.get(key) != desired.get(key)}
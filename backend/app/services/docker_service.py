@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional
 
 import requests  # type: ignore[import-untyped]
 
 from ..models.app_models import Server
+from .agent_circuit import CircuitOpenError, call_agent
+from .agent_wire import agent_accept_headers, decode_agent_response
+from .deployment_tracer import record_phase
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +22,7 @@ class DockerService:
         return docker.from_env()
 
     def _agent_headers(self, server: Server) -> Dict[str, str]:
-        headers = {"Content-Type": "application/json"}
+        headers = {"Content-Type": "application/json", **agent_accept_headers()}
         if server.agent_token:
             headers["X-Agent-Token"] = server.agent_token
         return headers
@@ -29,11 +34,15 @@ class DockerService:
         payload: dict | None = None,
         method: str = "post",
         params: Optional[dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
     ) -> Any:
         if not server.agent_url:
             raise ValueError("Agent URL not configured for remote server")
         url = f"{server.agent_url.rstrip('/')}/{path.lstrip('/')}"
-        try:
+        if idempotent is None:
+            idempotent = method.lower() == "get"
+
+        def _send() -> requests.Response:
             response = requests.request(
                 method,
                 url,
@@ -43,10 +52,17 @@ class DockerService:
                 timeout=15,
             )
             response.raise_for_status()
+            return response
+
+        try:
+            response = call_agent(server, _send, idempotent=idempotent)
+        except CircuitOpenError as exc:
+            logger.warning("Skipping agent call to %s: %s", server.name, exc)
+            raise
         except requests.RequestException as exc:  # type: ignore[import-untyped]
             logger.error("Failed to contact agent %s: %s", server.name, exc)
             raise RuntimeError(f"Agent request failed: {exc}") from exc
-        return response.json() if response.content else None
+        return decode_agent_response(response)
 
     def run_container(
         self,
@@ -58,12 +74,15 @@ class DockerService:
         ports: Dict[str, Optional[int]],
         volumes: Optional[List[str]] = None,
         networks: Optional[List[str]] = None,
+        healthcheck: Optional[Dict[str, Any]] = None,
+        pull: bool = True,
+        warm: bool = False,
     ) -> str:
         networks = networks or []
         volumes = volumes or []
         logger.info("Starting container %s on server %s", name, server.name)
         if not server.is_master or server.agent_url:
-            payload = {
+            payload: Dict[str, Any] = {
                 "image": image,
                 "name": name,
                 "env": env,
@@ -72,13 +91,25 @@ class DockerService:
                 "volumes": volumes,
                 "networks": networks,
             }
+            if healthcheck:
+                payload["healthcheck"] = healthcheck
+            if not pull:
+                payload["pull"] = False
+            if warm:
+                payload["warm"] = True
             data = self._agent_request(server, "/docker/run", payload)
             container_id = data.get("id") if isinstance(data, dict) else None
             if not container_id:
                 raise RuntimeError("Agent did not return container id")
+            # Older agents do not report timings.
+            for key, value in (data.get("timings") or {}).items():
+                record_phase(key.removesuffix("_ms"), float(value), source="agent")
+            if data.get("warm"):
+                logger.info("Container %s on %s skipped its pull via the warm pool", name, server.name)
             return container_id
 
         client = self._get_local_client()
+        started = time.perf_counter()
         container = client.containers.run(
             image,
             name=name,
@@ -86,6 +117,7 @@ class DockerService:
             labels=labels,
             ports=ports,
             volumes=volumes or None,
+            healthcheck=healthcheck,
             detach=True,
             network=networks[0] if networks else None,
         )
@@ -96,12 +128,68 @@ class DockerService:
                     network.connect(container)
                 except Exception as exc:  # pylint: disable=broad-except
                     logger.warning("Failed to connect container to network %s: %s", net_name, exc)
+        record_phase("container_start", (time.perf_counter() - started) * 1000, source="local")
         return container.id
 
+    def pull_image(
+        self,
+        server: Server,
+        image: str,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        """Pull ``image`` on the server, passing each daemon progress event to ``on_progress``."""
+
+        logger.info("Pulling image %s on server %s", image, server.name)
+        if not server.is_master or server.agent_url:
+            if not server.agent_url:
+                raise ValueError("Agent URL not configured for remote server")
+            url = f"{server.agent_url.rstrip('/')}/docker/pull"
+
+            def _send() -> Optional[str]:
+                response = requests.post(
+                    url,
+                    json={"image": image},
+                    headers=self._agent_headers(server),
+                    stream=True,
+                    # Connect, then the longest gap allowed between progress lines.
+                    timeout=(5, 120),
+                )
+                with response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        if event.get("error"):
+                            return str(event["error"])
+                        if on_progress:
+                            on_progress(event)
+                return None
+
+            try:
+                error = call_agent(server, _send, idempotent=True)
+            except requests.RequestException as exc:  # type: ignore[import-untyped]
+                raise RuntimeError(f"Agent request failed: {exc}") from exc
+            if error:
+                raise RuntimeError(f"Image pull failed: {error}")
+            return
+
+        import docker.utils
+
+        client = self._get_local_client()
+        repository, tag = docker.utils.parse_repository_tag(image)
+        for event in client.api.pull(repository, tag=tag or "latest", stream=True, decode=True):
+            if event.get("error"):
+                raise RuntimeError(f"Image pull failed: {event['error']}")
+            if on_progress:
+                on_progress(event)
+
     def stop_container(self, server: Server, container_name_or_id: str) -> None:
         logger.info("Stopping container %s on server %s", container_name_or_id, server.name)
         if not server.is_master or server.agent_url:
-            self._agent_request(server, "/docker/stop", {"container": container_name_or_id})
+            self._agent_request(
+                server, "/docker/stop", {"container": container_name_or_id}, idempotent=True
+            )
             return
         client = self._get_local_client()
         try:
@@ -114,7 +202,9 @@ class DockerService:
     def remove_container(self, server: Server, container_name_or_id: str) -> None:
         logger.info("Removing container %s on server %s", container_name_or_id, server.name)
         if not server.is_master or server.agent_url:
-            self._agent_request(server, "/docker/remove", {"container": container_name_or_id})
+            self._agent_request(
+                server, "/docker/remove", {"container": container_name_or_id}, idempotent=True
+            )
             return
         client = self._get_local_client()
         try:
@@ -124,6 +214,51 @@ class DockerService:
             logger.error("Error removing container %s: %s", container_name_or_id, exc)
             raise
 
+    def inspect_container(
+        self, server: Server, container_name_or_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return state/health for a container, or None when it does not exist."""
+
+        if not server.is_master or server.agent_url:
+            data = self._agent_request(
+                server, "/docker/inspect", method="get", params={"container": container_name_or_id}
+            )
+            if not isinstance(data, dict) or not data.get("exists"):
+                return None
+            return data
+        import docker.errors
+
+        client = self._get_local_client()
+        try:
+            attrs = client.api.inspect_container(container_name_or_id)
+        except docker.errors.NotFound:
+            return None
+        state = attrs.get("State") or {}
+        return {
+            "exists": True,
+            "id": attrs.get("Id"),
+            "name": (attrs.get("Name") or "").lstrip("/"),
+            "image_id": attrs.get("Image"),
+            "state": state.get("Status"),
+            "running": bool(state.get("Running")),
+            "health": (state.get("Health") or {}).get("Status"),
+            "exit_code": state.get("ExitCode"),
+        }
+
+    def rename_container(self, server: Server, container_name_or_id: str, new_name: str) -> None:
+        logger.info(
+            "Renaming container %s to %s on server %s", container_name_or_id, new_name, server.name
+        )
+        if not server.is_master or server.agent_url:
+            self._agent_request(
+                server,
+                "/docker/rename",
+                {"container": container_name_or_id, "name": new_name},
+            )
+            return
+        client = self._get_local_client()
+        client.containers.get(container_name_or_id).rename(new_name)
+
     def get_logs(self, server: Server, container_name_or_id: str, tail: int = 200) -> str:
         logger.info("Fetching logs for %s on server %s", container_name_or_id, server.name)
         if not server.is_master or server.agent_url:
@@ -142,12 +277,64 @@ class DockerService:
             logger.error("Error fetching logs for container %s: %s", container_name_or_id, exc)
             raise
 
-    def list_containers(self, server: Server, filters: Optional[Dict[str, Any]] = None) -> list:
+    def list_containers(
+        self,
+        server: Server,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        page_size: int = 500,
+    ) -> list:
+        """Return container summaries (id, name, image, state, status, labels, ...).
+
+        Filters use the docker ``label``/``status``/``name``/``id`` syntax and are
+        evaluated on the host; ``fields`` limits each summary to the given keys.
+        """
+
         logger.info("Listing containers on server %s", server.name)
         filters = filters or {}
         if not server.is_master or server.agent_url:
-            data = self._agent_request(server, "/docker/containers", {"filters": filters})
-            return data if isinstance(data, list) else []
+            containers: list = []
+            offset: Optional[int] = 0
+            while offset is not None:
+                payload: Dict[str, Any] = {
+                    "filters": filters,
+                    "offset": offset,
+                    "limit": page_size,
+                }
+                if fields:
+                    payload["fields"] = fields
+                data = self._agent_request(
+                    server, "/docker/containers", payload, idempotent=True
+                )
+                if isinstance(data, list):
+                    # Agents predating paging return the bare list.
+                    return data
+                if not isinstance(data, dict):
+                    break
+                containers.extend(data.get("containers") or [])
+                offset = data.get("next_offset")
+            return containers
         client = self._get_local_client()
-        containers = client.containers.list(filters=filters)
-        return [c.attrs for c in containers]
+        raw = client.api.containers(all=True, filters=filters)
+        raw.sort(key=lambda item: (item.get("Created") or 0, item.get("Id", "")))
+        return [_project(_summarize_container(item), fields) for item in raw]
+
+
+def _summarize_container(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    names = attrs.get("Names") or []
+    return {
+        "id": attrs.get("Id", ""),
+        "name": names[0].lstrip("/") if names else "",
+        "image": attrs.get("Image", ""),
+        "state": attrs.get("State", ""),
+        "status": attrs.get("Status", ""),
+        "labels": dict(attrs.get("Labels") or {}),
+        "created": attrs.get("Created"),
+        "ports": list(attrs.get("Ports") or []),
+    }
+
+
+def _project(entry: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if not fields:
+        return entry
+    return {field: entry[field] for field in fields if field in entry}
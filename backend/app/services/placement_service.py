@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models import AppInstance, AppInstanceReplica, Server, ServerMetricSnapshot
+from .agent_circuit import STATE_OPEN, get_circuit_state
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("spread", "binpack")
+
+# Weights of each signal in a server's utilisation estimate.
+CPU_WEIGHT = 0.4
+MEMORY_WEIGHT = 0.4
+DENSITY_WEIGHT = 0.2
+# Containers per server at which the density signal saturates.
+DENSITY_CEILING = 50
+
+
+class PlacementError(ValueError):
+    """No server can take the requested workload."""
+
+
+def _latest_snapshots(db: Session) -> Dict[int, ServerMetricSnapshot]:
+    latest_ids = (
+        db.query(func.max(ServerMetricSnapshot.id))
+        .group_by(ServerMetricSnapshot.server_id)
+        .subquery()
+    )
+    rows = db.query(ServerMetricSnapshot).filter(ServerMetricSnapshot.id.in_(latest_ids.select())).all()
+    return {row.server_id: row for row in rows}
+
+
+def _committed_resources(db: Session) -> Dict[int, Dict[str, float]]:
+    """Containers and declared requests already placed on each server."""
+
+    committed: Dict[int, Dict[str, float]] = {}
+
+    def add(server_id: int, containers: int, cpu: float, memory: float) -> None:
+        bucket = committed.setdefault(server_id, {"containers": 0, "cpu": 0.0, "memory_mb": 0.0})
+        bucket["containers"] += containers
+        bucket["cpu"] += cpu
+        bucket["memory_mb"] += memory
+
+    primaries = (
+        db.query(
+            AppInstance.server_id,
+            func.count(AppInstance.id),
+            func.coalesce(func.sum(AppInstance.cpu_request), 0.0),
+            func.coalesce(func.sum(AppInstance.memory_request_mb), 0),
+        )
+        .filter(AppInstance.status != "stopped")
+        .group_by(AppInstance.server_id)
+    )
+    for server_id, count, cpu, memory in primaries:
+        add(server_id, count, float(cpu), float(memory))
+    replicas = (
+        db.query(
+            AppInstanceReplica.server_id,
+            func.count(AppInstanceReplica.id),
+            func.coalesce(func.sum(AppInstance.cpu_request), 0.0),
+            func.coalesce(func.sum(AppInstance.memory_request_mb), 0),
+        )
+        .join(AppInstance, AppInstance.id == AppInstanceReplica.app_instance_id)
+        .filter(AppInstanceReplica.status != "stopped")
+        .group_by(AppInstanceReplica.server_id)
+    )
+    for server_id, count, cpu, memory in replicas:
+        add(server_id, count, float(cpu), float(memory))
+    return committed
+
+
+def score_servers(
+    db: Session,
+    cpu_request: Optional[float] = None,
+    memory_request_mb: Optional[int] = None,
+    strategy: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Score every active server for a new container, best candidate first.
+
+    Utilisation blends live CPU/memory readings with the requests already
+    committed to the server, taking whichever is higher. ``spread`` prefers the
+    least utilised server and ``binpack`` the most utilised one that still
+    fits. Ineligible servers are returned last with the reasons they failed.
+    """
+
+    settings = get_settings()
+    strategy = strategy or settings.placement_strategy
+    if strategy not in STRATEGIES:
+        raise PlacementError(f"Unknown placement strategy: {strategy}")
+    cpu_request = cpu_request or 0.0
+    memory_request_mb = memory_request_mb or 0
+    snapshots = _latest_snapshots(db)
+    committed = _committed_resources(db)
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.placement_metrics_max_age_seconds)
+
+    candidates: List[Dict[str, Any]] = []
+    for server in db.query(Server).filter(Server.is_active.is_(True)).order_by(Server.id):
+        snapshot = snapshots.get(server.id)
+        usage = committed.get(server.id, {"containers": 0, "cpu": 0.0, "memory_mb": 0.0})
+        reasons: List[str] = []
+        if not server.agent_url and not server.is_master:
+            reasons.append("no agent configured")
+        circuit = get_circuit_state(server)
+        if circuit and circuit["state"] == STATE_OPEN:
+            reasons.append("agent circuit open")
+        if snapshot is None or snapshot.created_at < stale_before:
+            reasons.append("no recent metrics")
+
+        cpu_percent = snapshot.cpu_percent if snapshot else None
+        memory_percent = snapshot.memory_percent if snapshot else None
+        disk_percent = snapshot.disk_percent if snapshot else None
+        cpu_capacity = snapshot.cpu_count if snapshot else None
+        memory_capacity = snapshot.memory_total_mb if snapshot else None
+
+        cpu_load = (cpu_percent or 0.0) / 100
+        if cpu_capacity:
+            cpu_allowed = cpu_capacity * settings.placement_cpu_overcommit
+            cpu_after = usage["cpu"] + cpu_request
+            if cpu_request and cpu_after > cpu_allowed:
+                reasons.append(f"cpu requests {cpu_after:g} exceed {cpu_allowed:g} cores")
+            cpu_load = max(cpu_load, cpu_after / cpu_allowed)
+        memory_load = (memory_percent or 0.0) / 100
+        if memory_capacity:
+            memory_after = usage["memory_mb"] + memory_request_mb
+            if memory_request_mb and memory_after > memory_capacity:
+                reasons.append(f"memory requests {memory_after:g}MB exceed {memory_capacity}MB")
+            memory_load = max(
+                memory_load + memory_request_mb / memory_capacity, memory_after / memory_capacity
+            )
+        if memory_percent is not None and memory_percent >= settings.placement_max_memory_percent:
+            reasons.append(f"memory at {memory_percent:.0f}%")
+        if disk_percent is not None and disk_percent >= settings.placement_max_disk_percent:
+            reasons.append(f"disk at {disk_percent:.0f}%")
+        density = min(1.0, (usage["containers"] + 1) / DENSITY_CEILING)
+
+        utilisation = min(
+            1.0,
+            CPU_WEIGHT * min(cpu_load, 1.0)
+            + MEMORY_WEIGHT * min(memory_load, 1.0)
+            + DENSITY_WEIGHT * density,
+        )
+        score = 100 * (utilisation if strategy == "binpack" else 1 - utilisation)
+        candidates.append(
+            {
+                "server_id": server.id,
+                "server_name": server.name,
+                "eligible": not reasons,
+                "reasons": reasons,
+                "score": round(score, 2),
+                "utilisation": round(utilisation, 4),
+                "cpu_percent": cpu_percent,
+                "memory_percent": memory_percent,
+                "disk_percent": disk_percent,
+                "cpu_count": cpu_capacity,
+                "memory_total_mb": memory_capacity,
+                "instance_count": int(usage["containers"]),
+                "committed_cpu": round(usage["cpu"], 3),
+                "committed_memory_mb": int(usage["memory_mb"]),
+                "metrics_at": snapshot.created_at if snapshot else None,
+            }
+        )
+    candidates.sort(key=lambda item: (not item["eligible"], -item["score"], item["server_id"]))
+    return candidates
+
+
+def choose_server(
+    db: Session,
+    cpu_request: Optional[float] = None,
+    memory_request_mb: Optional[int] = None,
+    strategy: Optional[str] = None,
+) -> Server:
+    candidates = score_servers(db, cpu_request, memory_request_mb, strategy)
+    best = next((candidate for candidate in candidates if candidate["eligible"]), None)
+    if best is None:
+        raise PlacementError(
+            "No eligible server: "
+            + "; ".join(f"{item['server_name']}: {', '.join(item['reasons'])}" for item in candidates)
+            if candidates
+            else "No servers registered"
+        )
+    logger.info(
+        "Placement picked server %s (score %s, %s)",
+        best["server_name"],
+        best["score"],
+        strategy or get_settings().placement_strategy,
+    )
+    server = db.get(Server, best["server_id"])
+    if server is None:
+        raise PlacementError(f"Server {best['server_id']} disappeared during placement")
+    return server
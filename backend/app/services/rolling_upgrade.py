@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.database import SessionLocal
+from ..models import AppInstance, AppInstanceReplica, Application, Server
+from .deployment_engine import DeploymentEngine
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class RollingUpgrade:
+    """Move every instance of an application to a new image in waves.
+
+    The image is pulled on all involved servers first, so a bad tag or an
+    unreachable registry stops the rollout before anything changed. Each wave
+    restarts its instances with the new image; restarts of running instances
+    go through the engine's blue/green swap, so an instance that never turns
+    ready keeps serving the old container. When the failure ratio after a wave
+    exceeds ``max_failure_rate`` every upgraded instance is put back on its
+    previous image.
+    """
+
+    def __init__(
+        self,
+        application_id: int,
+        image: str,
+        wave_size: int = 1,
+        max_failure_rate: float = 0.0,
+        pull_concurrency: int = 8,
+        engine: Optional[DeploymentEngine] = None,
+        db_factory=SessionLocal,
+        progress_callback: Optional[ProgressCallback] = None,
+    ):
+        self.application_id = application_id
+        self.image = image
+        self.wave_size = max(1, wave_size)
+        self.max_failure_rate = max_failure_rate
+        self.pull_concurrency = max(1, pull_concurrency)
+        self.engine = engine or DeploymentEngine(db_factory=db_factory)
+        self.db_factory = db_factory
+        self.progress_callback = progress_callback
+        self.progress: Dict[str, Any] = {
+            "application_id": application_id,
+            "image": image,
+            "phase": "planning",
+            "total": 0,
+            "upgraded": [],
+            "failed": {},
+            "rolled_back": [],
+            "pull_failures": {},
+            "waves_completed": 0,
+            "aborted": False,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        targets, parked, servers = self._plan()
+        self.progress["total"] = len(targets)
+        self._report()
+
+        self.progress["phase"] = "pulling"
+        self._report()
+        self._prepull(servers)
+        if self.progress["pull_failures"]:
+            self.progress["phase"] = "aborted"
+            self.progress["aborted"] = True
+            self._report()
+            return self.progress
+
+        self.progress["phase"] = "upgrading"
+        previous: Dict[int, str] = {}
+        processed = 0
+        for start in range(0, len(targets), self.wave_size):
+            wave = targets[start : start + self.wave_size]
+            with ThreadPoolExecutor(max_workers=len(wave), thread_name_prefix="upgrade") as pool:
+                results = list(pool.map(self._upgrade_instance, wave))
+            for (instance_id, old_image), error in zip(wave, results):
+                previous[instance_id] = old_image
+                if error:
+                    self.progress["failed"][str(instance_id)] = error
+                else:
+                    self.progress["upgraded"].append(instance_id)
+            processed += len(wave)
+            self.progress["waves_completed"] += 1
+            self._report()
+            if len(self.progress["failed"]) / processed > self.max_failure_rate:
+                logger.error(
+                    "Rolling upgrade of application %s to %s exceeded the failure rate, rolling back",
+                    self.application_id,
+                    self.image,
+                )
+                self._rollback(previous)
+                return self.progress
+
+        self._finish(parked)
+        return self.progress
+
+    def _plan(self) -> Tuple[List[Tuple[int, str]], List[int], Dict[int, Server]]:
+        with self.db_factory() as db:
+            application = db.get(Application, self.application_id)
+            if not application:
+                raise ValueError("Application not found")
+            instances = (
+                db.query(AppInstance)
+                .filter(AppInstance.app_id == self.application_id, AppInstance.docker_image != self.image)
+                .order_by(AppInstance.id)
+                .all()
+            )
+            targets = [(item.id, item.docker_image) for item in instances if item.status != "stopped"]
+            parked = [item.id for item in instances if item.status == "stopped"]
+            server_ids = {item.server_id for item in instances if item.status != "stopped"}
+            server_ids.update(
+                server_id
+                for (server_id,) in db.query(AppInstanceReplica.server_id).filter(
+                    AppInstanceReplica.app_instance_id.in_([item_id for item_id, _ in targets])
+                )
+            )
+            servers = {server.id: server for server in db.query(Server).filter(Server.id.in_(server_ids))}
+            for server in servers.values():
+                db.expunge(server)
+        return targets, parked, servers
+
+    def _prepull(self, servers: Dict[int, Server]) -> None:
+        def pull(server: Server) -> Optional[str]:
+            try:
+                self.engine.docker_service.pull_image(server, self.image)
+            except Exception as exc:  # pylint: disable=broad-except
+                return str(exc)
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.pull_concurrency, thread_name_prefix="prepull") as pool:
+            for server, error in zip(servers.values(), pool.map(pull, servers.values())):
+                if error:
+                    logger.error("Pre-pull of %s failed on %s: %s", self.image, server.name, error)
+                    self.progress["pull_failures"][server.name] = error
+
+    def _set_image(self, instance_id: int, image: str) -> None:
+        with self.db_factory() as db:
+            db.query(AppInstance).filter(AppInstance.id == instance_id).update({"docker_image": image})
+            db.commit()
+
+    def _upgrade_instance(self, target: Tuple[int, str]) -> Optional[str]:
+        instance_id, old_image = target
+        self._set_image(instance_id, self.image)
+        try:
+            self.engine.restart_app_instance(instance_id)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Upgrade of app instance %s failed: %s", instance_id, exc)
+            self._revert_instance(instance_id, old_image)
+            return str(exc)
+        return None
+
+    def _revert_instance(self, instance_id: int, old_image: str) -> None:
+        self._set_image(instance_id, old_image)
+        try:
+            # A no-op when the blue/green swap left the old container serving.
+            self.engine.restart_app_instance(instance_id)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("Could not restore app instance %s to %s: %s", instance_id, old_image, exc)
+
+    def _rollback(self, previous: Dict[int, str]) -> None:
+        self.progress["phase"] = "rolling_back"
+        self._report()
+        upgraded = list(self.progress["upgraded"])
+        with ThreadPoolExecutor(max_workers=self.wave_size, thread_name_prefix="rollback") as pool:
+            list(pool.map(lambda item: self._revert_instance(item, previous[item]), upgraded))
+        self.progress["rolled_back"] = upgraded
+        self.progress["upgraded"] = []
+        self.progress["phase"] = "rolled_back"
+        self.progress["aborted"] = True
+        self._report()
+
+    def _finish(self, parked: List[int]) -> None:
+        with self.db_factory() as db:
+            # Stopped instances pick the new image up on their next start.
+            if parked:
+                db.query(AppInstance).filter(AppInstance.id.in_(parked)).update(
+                    {"docker_image": self.image}, synchronize_session=False
+                )
+            application = db.get(Application, self.application_id)
+            if application:
+                application.default_image = self.image
+            db.commit()
+        self.progress["phase"] = "completed"
+        self._report()
+
+    def _report(self) -> None:
+        if not self.progress_callback:
+            return
+        try:
+            self.progress_callback(
+                dict(
+                    self.progress,
+                    upgraded=list(self.progress["upgraded"]),
+                    failed=dict(self.progress["failed"]),
+                )
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.debug("Failed to report rolling upgrade progress", exc_info=True)
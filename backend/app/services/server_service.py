@@ -8,6 +8,8 @@ import requests  # type: ignore[import-untyped]
 from sqlalchemy.orm import Session
 
 from ..models.app_models import Server, ServerMetricSnapshot
+from .agent_circuit import CircuitOpenError, call_agent, get_circuit_state, reset_breaker
+from .agent_wire import agent_accept_headers, decode_agent_response
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,8 @@ def create_server(db: Session, data: Dict[str, Any]) -> Server:
 
 
 def update_server(db: Session, server: Server, data: Dict[str, Any]) -> Server:
+    if "agent_url" in data or "agent_token" in data:
+        reset_breaker(server.id)
     for key, value in data.items():
         setattr(server, key, value)
     db.add(server)
@@ -38,24 +42,31 @@ def update_server(db: Session, server: Server, data: Dict[str, Any]) -> Server:
 
 
 def delete_server(db: Session, server: Server) -> None:
+    reset_breaker(server.id)
     db.delete(server)
     db.commit()
 
 
-def _agent_get(url: str, headers: dict[str, str]) -> Dict[str, Any]:
-    response = requests.get(url, headers=headers, timeout=10)
-    response.raise_for_status()
-    return response.json()
+def _agent_get(server: Server, path: str) -> Dict[str, Any]:
+    url = f"{(server.agent_url or '').rstrip('/')}/{path.lstrip('/')}"
+    headers = agent_accept_headers()
+    if server.agent_token:
+        headers["X-Agent-Token"] = server.agent_token
+
+    def _send() -> requests.Response:
+        response = requests.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+        return response
+
+    response = call_agent(server, _send, idempotent=True)
+    return decode_agent_response(response) or {}
 
 
 def ping_server(db: Session, server: Server) -> Dict[str, Any]:
     if server.agent_url:
         try:
-            result = _agent_get(
-                f"{server.agent_url.rstrip('/')}/health",
-                {"X-Agent-Token": server.agent_token or ""} if server.agent_token else {},
-            )
-        except requests.RequestException as exc:  # type: ignore[import-untyped]
+            result = _agent_get(server, "/health")
+        except (requests.RequestException, CircuitOpenError) as exc:  # type: ignore[import-untyped]
             logger.warning("Failed to ping server %s: %s", server.name, exc)
             return {"status": "error", "detail": str(exc)}
     else:
@@ -71,11 +82,8 @@ def collect_metrics(db: Session, server: Server) -> Optional[ServerMetricSnapsho
     metrics: Optional[Dict[str, Any]] = None
     if server.agent_url:
         try:
-            metrics = _agent_get(
-                f"{server.agent_url.rstrip('/')}/metrics",
-                {"X-Agent-Token": server.agent_token or ""} if server.agent_token else {},
-            )
-        except requests.RequestException as exc:  # type: ignore[import-untyped]
+            metrics = _agent_get(server, "/metrics")
+        except (requests.RequestException, CircuitOpenError) as exc:  # type: ignore[import-untyped]
             logger.warning("Failed to collect metrics for %s: %s", server.name, exc)
             return None
     elif server.is_master:
@@ -86,6 +94,8 @@ def collect_metrics(db: Session, server: Server) -> Optional[ServerMetricSnapsho
                 "cpu_percent": psutil.cpu_percent(interval=0.1),
                 "memory_percent": psutil.virtual_memory().percent,
                 "disk_percent": psutil.disk_usage("/").percent,
+                "cpu_count": psutil.cpu_count() or 1,
+                "memory_total_mb": psutil.virtual_memory().total // (1024 * 1024),
                 "docker_running_containers": 0,
                 "docker_total_containers": 0,
             }
@@ -103,6 +113,8 @@ def collect_metrics(db: Session, server: Server) -> Optional[ServerMetricSnapsho
         disk_percent=metrics.get("disk_percent", 0.0),
         docker_running_containers=int(metrics.get("docker_running_containers", 0)),
         docker_total_containers=int(metrics.get("docker_total_containers", 0)),
+        cpu_count=metrics.get("cpu_count"),
+        memory_total_mb=metrics.get("memory_total_mb"),
     )
     db.add(snapshot)
     db.commit()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Set, Tuple
+
+_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_MONTH_NAMES = {name: index for index, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+_DAY_NAMES = {name: index for index, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+# (low, high, names) for minute, hour, day of month, month, day of week.
+_FIELDS: Tuple[Tuple[int, int, Dict[str, int]], ...] = (
+    (0, 59, {}),
+    (0, 23, {}),
+    (1, 31, {}),
+    (1, 12, _MONTH_NAMES),
+    (0, 7, _DAY_NAMES),
+)
+# Long enough for any satisfiable expression (Feb 29 on a given weekday repeats within 28 years).
+_SEARCH_YEARS = 30
+
+
+def _value(token: str, low: int, high: int, names: dict) -> int:
+    value = names.get(token.lower()) if names else None
+    if value is None:
+        if not token.isdigit():
+            raise ValueError(f"Invalid cron value {token!r}")
+        value = int(token)
+    if not low <= value <= high:
+        raise ValueError(f"Cron value {value} outside {low}-{high}")
+    return value
+
+
+def _parse_field(field: str, low: int, high: int, names: dict) -> Tuple[FrozenSet[int], bool]:
+    """Return the allowed values and whether the field was an unrestricted ``*``."""
+
+    values: Set[int] = set()
+    for item in field.split(","):
+        spec, _, step_text = item.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ValueError(f"Invalid cron step {item!r}")
+            step = int(step_text)
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            first, _, last = spec.partition("-")
+            start, end = _value(first, low, high, names), _value(last, low, high, names)
+            if start > end:
+                raise ValueError(f"Invalid cron range {spec!r}")
+        else:
+            start = _value(spec, low, high, names)
+            # "5/15" means every 15 starting at 5.
+            end = high if step_text else start
+        values.update(range(start, end + 1, step))
+    return frozenset(values), field == "*"
+
+
+class CronSchedule:
+    """A standard five-field cron expression (minute hour day month weekday).
+
+    Supports lists, ranges, steps, month and weekday names and the ``@daily``
+    style macros. As in Vixie cron, when both day of month and day of week
+    are restricted a day matching either runs. Times are naive UTC, like the
+    rest of the models.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        text = _MACROS.get(expression.strip().lower(), expression)
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        parsed = [_parse_field(field, *spec) for field, spec in zip(fields, _FIELDS)]
+        self.minutes, self.hours = parsed[0][0], parsed[1][0]
+        self.days, days_any = parsed[2]
+        self.months = parsed[3][0]
+        weekdays, weekdays_any = parsed[4]
+        # Sunday is both 0 and 7.
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._days_any = days_any
+        self._weekdays_any = weekdays_any
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._days_any or self._weekdays_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``."""
+
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate.year + _SEARCH_YEARS
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                later = [minute for minute in self.minutes if minute > candidate.minute]
+                if later:
+                    candidate = candidate.replace(minute=min(later))
+                else:
+                    candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
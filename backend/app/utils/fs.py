@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+# From <linux/fs.h>: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+_CLONE_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOSYS,
+    errno.EBADF,
+    errno.EPERM,
+}
+
+
+def _try_ficlone(src_fd: int, dst_fd: int) -> bool:
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - non-POSIX
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as exc:
+        if exc.errno in _CLONE_UNSUPPORTED:
+            return False
+        raise
+    return True
+
+
+def _try_copy_file_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None:
+        return False
+    copied = 0
+    try:
+        while copied < size:
+            sent = copy_file_range(src_fd, dst_fd, size - copied)
+            if sent == 0:
+                break
+            copied += sent
+    except OSError as exc:
+        if copied == 0 and exc.errno in _CLONE_UNSUPPORTED:
+            return False
+        raise
+    return copied == size
+
+
+def clone_file(src: PathLike, dst: PathLike) -> str:
+    """Copy ``src`` to ``dst`` as cheaply as the filesystem allows.
+
+    Tries a reflink (``FICLONE``) first, which shares extents on btrfs, XFS and
+    similar filesystems, then ``copy_file_range`` which stays in the kernel,
+    and finally a plain buffered copy. Metadata is copied like ``copy2``.
+    Signature matches ``shutil.copy2`` so it can be passed as ``copy_function``.
+    """
+
+    src_path, dst_path = Path(src), Path(dst)
+    if dst_path.is_dir():
+        dst_path = dst_path / src_path.name
+    with src_path.open("rb") as source, dst_path.open("wb") as destination:
+        size = os.fstat(source.fileno()).st_size
+        if not (
+            _try_ficlone(source.fileno(), destination.fileno())
+            or _try_copy_file_range(source.fileno(), destination.fileno(), size)
+        ):
+            destination.seek(0)
+            destination.truncate()
+            source.seek(0)
+            shutil.copyfileobj(source, destination, length=1024 * 1024)
+    shutil.copystat(src_path, dst_path)
+    return str(dst_path)
+
+
+def clone_tree(src: PathLike, dst: PathLike) -> None:
+    """``copytree`` that clones regular files with :func:`clone_file`."""
+
+    shutil.copytree(src, dst, symlinks=True, copy_function=clone_file)
+
+
+def same_filesystem(first: PathLike, second: PathLike) -> bool:
+    """True when both paths (or their closest existing parents) share a device."""
+
+    def _device(path: Path) -> int:
+        for candidate in (path, *path.parents):
+            if candidate.exists():
+                return candidate.stat().st_dev
+        return -1
+
+    return _device(Path(first)) == _device(Path(second))
+
+
+def move_or_clone_tree(src: PathLike, dst: PathLike) -> None:
+    """Move ``src`` to ``dst`` with a rename when possible, cloning otherwise.
+
+    The rename consumes ``src``; the clone fallback leaves it in place.
+    """
+
+    if same_filesystem(src, Path(dst).parent):
+        os.rename(src, dst)
+        return
+    logger.info("%s and %s are on different filesystems, copying", src, dst)
+    clone_tree(src, dst)
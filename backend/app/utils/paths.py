@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def get_app_data_base_path() -> Path:
+    """Return the root directory where app instance data is stored."""
+
+    env_path = os.getenv("SERVER_PANEL_APP_DATA_PATH") or os.getenv("APP_DATA_PATH")
+    if env_path:
+        return Path(env_path)
+    return Path("/var/lib/server-panel/app-data")
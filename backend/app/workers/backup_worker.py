@@ -1,34 +1,48 @@
 from __future__ import annotations
 
 import logging
+from typing import Any, Dict
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
+from ..core.config import get_settings
 from ..core.database import get_db
 from ..models import BackupPolicy
+from ..services.backup_scheduler import BackupScheduler
 from ..services.backup_service import BackupService
 
 logger = logging.getLogger(__name__)
 
 
-def run_scheduled_backups() -> None:
-    with next(get_db()) as db:  # type: Session
-        service = BackupService(db)
-        policies = db.query(BackupPolicy).filter(BackupPolicy.is_enabled.is_(True)).all()
-        for policy in policies:
-            try:
-                if policy.scope_type == "app_instance" and policy.scope_id:
-                    service.run_backup_for_app_instance(policy.scope_id, policy_id=policy.id)
-                else:
-                    logger.info("Skipping unsupported policy scope %s", policy.scope_type)
-            except Exception as exc:  # pylint: disable=broad-except
-                logger.warning("Scheduled backup failed for policy %s: %s", policy.id, exc)
+_scheduler = BackupScheduler()
+
+
+def run_scheduled_backups() -> Dict[str, Any]:
+    """Run the policies that are due; call periodically, e.g. once a minute."""
+    return _scheduler.tick()
+
+
+def run_backup_scheduler() -> None:
+    """Long-running scheduler loop that sleeps until the next policy is due."""
+    _scheduler.run_forever(get_settings().backup_scheduler_poll_seconds)
 
 
 def apply_all_retention_policies() -> None:
     with next(get_db()) as db:  # type: Session
         service = BackupService(db)
-        policies = db.query(BackupPolicy).filter(BackupPolicy.retain_last.isnot(None)).all()
+        policies = (
+            db.query(BackupPolicy)
+            .filter(
+                or_(
+                    BackupPolicy.retain_last.isnot(None),
+                    BackupPolicy.retain_daily.isnot(None),
+                    BackupPolicy.retain_weekly.isnot(None),
+                    BackupPolicy.retain_monthly.isnot(None),
+                )
+            )
+            .all()
+        )
         for policy in policies:
             try:
                 service.apply_retention_policy(policy)
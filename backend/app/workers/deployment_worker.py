@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from rq import get_current_job
+from sqlalchemy.orm import Session
+
+from ..core.database import get_db
+from ..services.backup_service import BackupService
+from ..services.bulk_operations import BulkOperationRunner
+from ..services.deployment_engine import DeploymentEngine
+from ..services.rolling_upgrade import RollingUpgrade
+
+logger = logging.getLogger(__name__)
+
+
+def deploy_app_instance_job(app_instance_id: int, force: bool = False) -> int:
+    DeploymentEngine().deploy_app_instance(app_instance_id, force=force)
+    return app_instance_id
+
+
+def restart_app_instance_job(app_instance_id: int, force: bool = False) -> int:
+    DeploymentEngine().restart_app_instance(app_instance_id, force=force)
+    return app_instance_id
+
+
+def scale_app_instance_job(
+    app_instance_id: int, replicas: int, server_ids: Optional[List[int]] = None
+) -> int:
+    DeploymentEngine().scale_app_instance(app_instance_id, replicas, server_ids=server_ids)
+    return app_instance_id
+
+
+def restore_app_instance_job(app_instance_id: int, snapshot_id: int) -> int:
+    with next(get_db()) as db:  # type: Session
+        BackupService(db).restore_app_instance_from_backup(app_instance_id, snapshot_id)
+    return app_instance_id
+
+
+def _progress_reporter():
+    job = get_current_job()
+
+    def report(progress: Dict[str, Any]) -> None:
+        if job is None:
+            return
+        job.meta["progress"] = progress
+        job.save_meta()
+
+    return report
+
+
+def bulk_operation_job(
+    action: str,
+    targets: List[Tuple[int, int]],
+    options: Dict[str, Any],
+    force: bool = False,
+) -> Dict[str, Any]:
+    engine = DeploymentEngine()
+    method = engine.deploy_app_instance if action == "deploy" else engine.restart_app_instance
+    operation = functools.partial(method, force=force)
+    runner = BulkOperationRunner(operation, progress_callback=_progress_reporter(), **options)
+    return runner.run([(instance_id, server_id) for instance_id, server_id in targets])
+
+
+def rolling_upgrade_job(application_id: int, image: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    upgrade = RollingUpgrade(application_id, image, progress_callback=_progress_reporter(), **options)
+    return upgrade.run()
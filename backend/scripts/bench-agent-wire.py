@@ -0,0 +1,128 @@
+"""Compare agent response encodings: bytes on the wire and (de)serialization time.
+
+Usage: python scripts/bench-agent-wire.py [--repeat N]
+"""
+import argparse
+import gzip
+import json
+import random
+import string
+import time
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def container_list(count=500):
+    rng = random.Random(1)
+    containers = []
+    for index in range(count):
+        app_id = rng.randint(1, 200)
+        containers.append(
+            {
+                "id": "".join(rng.choices("0123456789abcdef", k=64)),
+                "name": f"cp-app-site{app_id}-1-{index:08x}",
+                "image": rng.choice(["wordpress:latest", "node:18-alpine", "nginx:alpine"]),
+                "state": rng.choice(["running", "running", "running", "exited"]),
+                "status": "Up 3 days",
+                "labels": {
+                    "traefik.enable": "true",
+                    f"traefik.http.routers.cp-{index}-router.rule": f"Host(`site{index}.example.com`)",
+                    f"traefik.http.routers.cp-{index}-router.entrypoints": "websecure",
+                    f"traefik.http.routers.cp-{index}-router.tls.certresolver": "le",
+                    f"traefik.http.services.cp-{index}-service.loadbalancer.server.port": "80",
+                },
+                "created": 1700000000 + index,
+                "ports": [{"PrivatePort": 80, "Type": "tcp"}],
+            }
+        )
+    return containers
+
+
+def log_tail(lines=2000):
+    rng = random.Random(2)
+    paths = ["/", "/wp-login.php", "/wp-admin/admin-ajax.php", "/favicon.ico", "/feed/"]
+    out = []
+    for index in range(lines):
+        ip = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+        path = rng.choice(paths)
+        agent = "".join(rng.choices(string.ascii_letters, k=12))
+        out.append(
+            f'{ip} - - [19/Oct/2026:10:{index % 60:02d}:00 +0000] "GET {path} HTTP/1.1" 200 '
+            f'{rng.randint(200, 90000)} "-" "Mozilla/5.0 {agent}"'
+        )
+    return {"logs": "\n".join(out)}
+
+
+def metric_history(points=1000):
+    rng = random.Random(3)
+    return [
+        {
+            "cpu_percent": round(rng.uniform(0, 100), 1),
+            "memory_percent": round(rng.uniform(20, 90), 1),
+            "disk_percent": round(rng.uniform(30, 60), 1),
+            "docker_running_containers": rng.randint(100, 120),
+            "docker_total_containers": 130,
+            "created_at": f"2026-10-19T10:{index % 60:02d}:00",
+        }
+        for index in range(points)
+    ]
+
+
+def codecs():
+    yield "json", lambda obj: json.dumps(obj).encode(), lambda data: json.loads(data)
+    if msgpack is not None:
+        yield (
+            "msgpack",
+            lambda obj: msgpack.packb(obj, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False),
+        )
+
+
+def compressions():
+    yield "identity", lambda data: data, lambda data: data
+    yield "gzip", lambda data: gzip.compress(data, compresslevel=6), gzip.decompress
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3)
+        decompressor = zstandard.ZstdDecompressor()
+        yield "zstd", compressor.compress, decompressor.decompress
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {
+        "containers(500)": container_list(),
+        "logs(2000 lines)": log_tail(),
+        "metrics(1000)": metric_history(),
+    }
+    print(f"{'payload':<18} {'body':<8} {'encoding':<9} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for payload_name, payload in payloads.items():
+        for body_name, dumps, loads in codecs():
+            for enc_name, compress, decompress in compressions():
+                encode_ms, wire = timed(lambda: compress(dumps(payload)), args.repeat)
+                decode_ms, _ = timed(lambda: loads(decompress(wire)), args.repeat)
+                print(
+                    f"{payload_name:<18} {body_name:<8} {enc_name:<9} {len(wire):>10} "
+                    f"{encode_ms:>10.2f} {decode_ms:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
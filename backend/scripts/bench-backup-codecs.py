@@ -0,0 +1,149 @@
+"""Compare backup compression codecs on a synthetic app-data tree.
+
+Builds a WordPress-like tree (PHP/CSS sources, a SQL dump, logs and
+incompressible media), then tars it through every available codec the same
+way backups do and reports archive size, ratio and throughput in MB/s of
+uncompressed input for compression and decompression.
+
+Usage (from backend/):
+    python scripts/bench-backup-codecs.py --size-mb 256 --threads 0 4
+"""
+import argparse
+import io
+import os
+import random
+import string
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.backup_codecs import (  # noqa: E402
+    CODECS,
+    LEVELS,
+    open_compressor,
+    open_decompressor,
+    validate_codec,
+)
+
+
+class CountingSink(io.RawIOBase):
+    def __init__(self, keep: bool):
+        self.size = 0
+        self.buffer = io.BytesIO() if keep else None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.size += len(data)
+        if self.buffer is not None:
+            self.buffer.write(data)
+        return len(data)
+
+
+def build_tree(root: Path, size_mb: int) -> int:
+    rng = random.Random(7)
+    budget = size_mb * 1024 * 1024
+    words = ["function", "return", "$post", "array(", "wp_enqueue_script", "echo", "<?php", "if (", "}"]
+    shares = {"source": 0.3, "sql": 0.2, "logs": 0.1, "media": 0.4}
+    written = 0
+    for kind, share in shares.items():
+        target = int(budget * share)
+        produced = 0
+        index = 0
+        while produced < target:
+            directory = root / kind / f"{index // 100:03d}"
+            directory.mkdir(parents=True, exist_ok=True)
+            if kind == "media":
+                data = rng.randbytes(min(target - produced, rng.randint(64, 2048) * 1024))
+                name = f"upload-{index}.jpg"
+            elif kind == "sql":
+                rows = [
+                    f"INSERT INTO wp_posts VALUES ({index * 100 + row},'{''.join(rng.choices(string.ascii_letters, k=40))}',"
+                    f"'2026-10-{row % 28 + 1:02d}','publish');\n"
+                    for row in range(2000)
+                ]
+                data = "".join(rows).encode()
+                name = f"dump-{index}.sql"
+            elif kind == "logs":
+                lines = [
+                    f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)} - - [19/Oct/2026:10:{row % 60:02d}:00] "
+                    f'"GET /wp-content/uploads/{rng.randint(1, 9999)}.jpg HTTP/1.1" 200 {rng.randint(200, 90000)}\n'
+                    for row in range(2000)
+                ]
+                data = "".join(lines).encode()
+                name = f"access-{index}.log"
+            else:
+                data = " ".join(rng.choices(words, k=rng.randint(500, 5000))).encode()
+                name = f"file-{index}.php"
+            data = data[: target - produced] or data[:1]
+            (directory / name).write_bytes(data)
+            produced += len(data)
+            index += 1
+        written += produced
+    return written
+
+
+def variants(threads):
+    for codec in CODECS:
+        try:
+            validate_codec(codec)
+        except ValueError as exc:
+            print(f"skipping {codec}: {exc}")
+            continue
+        if codec == "none":
+            yield codec, None, None
+            continue
+        low, high, default = LEVELS[codec]
+        levels = sorted({max(low, 1), default, min(high, 9 if codec != "lz4" else high)})
+        for level in levels:
+            if codec == "zstd":
+                for count in threads:
+                    yield codec, level, count
+            else:
+                yield codec, level, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--threads", type=int, nargs="+", default=[0, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-backup-") as temp:
+        root = Path(temp) / "app_data"
+        source_bytes = build_tree(root, args.size_mb)
+        # Warm the page cache so every codec reads the tree from memory.
+        for path in root.rglob("*"):
+            if path.is_file():
+                path.read_bytes()
+        source_mb = source_bytes / (1024 * 1024)
+        print(f"tree: {source_mb:.1f} MB in {sum(1 for _ in root.rglob('*'))} entries, {os.cpu_count()} cpus")
+        print(f"{'codec':<6} {'level':>5} {'threads':>7} {'archive MB':>11} {'ratio':>7} {'comp MB/s':>10} {'decomp MB/s':>12}")
+        for codec, level, threads in variants(args.threads):
+            sink = CountingSink(keep=True)
+            started = time.perf_counter()
+            compressed = open_compressor(codec, sink, level, threads)
+            with compressed, tarfile.open(fileobj=compressed, mode="w|") as archive:
+                archive.add(root, arcname="app_data")
+            compress_s = time.perf_counter() - started
+
+            sink.buffer.seek(0)
+            started = time.perf_counter()
+            _, stream = open_decompressor(sink.buffer)
+            while stream.read(1024 * 1024):
+                pass
+            decompress_s = time.perf_counter() - started
+            print(
+                f"{codec:<6} {level if level is not None else '-':>5} {threads if threads is not None else '-':>7} "
+                f"{sink.size / (1024 * 1024):>11.1f} {source_bytes / sink.size:>7.2f} "
+                f"{source_mb / compress_s:>10.1f} {source_mb / decompress_s:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
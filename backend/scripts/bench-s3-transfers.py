@@ -0,0 +1,132 @@
+"""Measure S3 backup target throughput against a local S3 stand-in.
+
+Compares the previous handler behaviour (a new boto3 client per call and
+boto3's default transfer settings) with the tuned handler (shared client,
+per-target multipart settings, parallel ranged downloads) for one large
+upload/download and a run of small chunk-store puts.
+
+Starts an in-process moto server when ``moto[server]`` is installed; pass
+``--endpoint-url`` to run against MinIO or another S3-compatible service.
+
+Usage (from backend/):
+    python scripts/bench-s3-transfers.py --size-mb 512 --chunksize-mb 16 --concurrency 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boto3  # noqa: E402
+
+from app.services.backup_target_s3 import S3BackupTargetHandler  # noqa: E402
+
+
+def start_moto(port):
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        sys.exit("moto[server] is not installed; pass --endpoint-url for an existing S3 service")
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def legacy_client(config):
+    return boto3.client(
+        "s3",
+        endpoint_url=config.get("endpoint_url"),
+        region_name=config.get("region"),
+        aws_access_key_id=config.get("access_key"),
+        aws_secret_access_key=config.get("secret_key"),
+    )
+
+
+def timed(label, size_bytes, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    rate = f"{size_bytes / (1024 * 1024) / elapsed:>9.1f} MB/s" if size_bytes else ""
+    print(f"{label:<34} {elapsed:>8.2f} s {rate}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--bucket", default="bench-backups")
+    parser.add_argument("--access-key", default="testing")
+    parser.add_argument("--secret-key", default="testing")
+    parser.add_argument("--region", default="us-east-1")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunksize-mb", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--small-objects", type=int, default=200)
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint_url
+    if not endpoint:
+        server, endpoint = start_moto(args.port)
+    config = {
+        "endpoint_url": endpoint,
+        "region": args.region,
+        "access_key": args.access_key,
+        "secret_key": args.secret_key,
+        "bucket": args.bucket,
+        "multipart_threshold_mb": args.chunksize_mb,
+        "multipart_chunksize_mb": args.chunksize_mb,
+        "max_concurrency": args.concurrency,
+    }
+    try:
+        client = legacy_client(config)
+        try:
+            client.create_bucket(Bucket=args.bucket)
+        except client.exceptions.BucketAlreadyOwnedByYou:
+            pass
+        handler = S3BackupTargetHandler(config)
+        size = args.size_mb * 1024 * 1024
+        run = uuid.uuid4().hex[:8]
+        with tempfile.TemporaryDirectory(prefix="bench-s3-") as temp:
+            source = os.path.join(temp, "archive.bin")
+            with open(source, "wb") as handle:
+                for _ in range(args.size_mb):
+                    handle.write(os.urandom(1024 * 1024))
+            target = os.path.join(temp, "restored.bin")
+            key = f"bench/{run}/archive.bin"
+            print(f"endpoint {endpoint}, object {args.size_mb} MB, parts {args.chunksize_mb} MB x {args.concurrency}")
+
+            timed("upload   legacy", size, lambda: legacy_client(config).upload_file(source, args.bucket, key))
+            timed("upload   tuned", size, lambda: handler.upload(source, key))
+            timed(
+                "download legacy",
+                size,
+                lambda: legacy_client(config).download_file(args.bucket, key, target),
+            )
+            timed("download tuned (ranged GETs)", size, lambda: handler.download(f"s3://{args.bucket}/{key}", target))
+
+            payload = os.urandom(64 * 1024)
+            small = args.small_objects * len(payload)
+
+            def legacy_puts():
+                for index in range(args.small_objects):
+                    legacy_client(config).put_object(
+                        Bucket=args.bucket, Key=f"bench/{run}/legacy/{index}", Body=payload
+                    )
+
+            def tuned_puts():
+                for index in range(args.small_objects):
+                    handler.put_bytes(f"bench/{run}/tuned/{index}", payload)
+
+            timed(f"{args.small_objects} x 64KB puts legacy", small, legacy_puts)
+            timed(f"{args.small_objects} x 64KB puts tuned", small, tuned_puts)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
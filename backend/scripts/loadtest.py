@@ -0,0 +1,359 @@
+"""Drive the control plane against a simulated agent fleet.
+
+A single local ASGI app impersonates any number of agents: agent ``N`` lives
+under ``http://127.0.0.1:<port>/agents/N`` and implements ``/health``,
+``/metrics``, ``/info`` and the ``/docker/*`` routes the engine calls (run,
+pull, inspect, rename, stop, remove, logs, containers) with configurable
+latency, jitter and failure rates. The driver seeds servers and app instances
+pointing at it, then exercises ``run_server_health_checks``, deployments and
+log reads and prints throughput and latency percentiles. Errors count failed
+operations plus every non-2xx agent response other than the "No such
+container" answers the engine expects when clearing absent containers.
+
+Usage (from backend/):
+    python scripts/loadtest.py --servers 500 --instances 1000 --concurrency 32
+
+The database defaults to a throwaway SQLite file; pass ``--database-url`` with
+a Postgres URL for numbers that reflect production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_sim_app(latency_ms: float, jitter_ms: float, failure_rate: float, down_ratio: float):
+    """Return the simulated fleet and a dict counting its unexpected non-2xx responses."""
+
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI(title="Simulated KWS agent fleet")
+    containers: Dict[int, Dict[str, dict]] = {}
+    stats = {"non_2xx": 0}
+    rng = random.Random(42)
+
+    @app.middleware("http")
+    async def count_errors(request: Request, call_next):
+        response = await call_next(request)
+        if not 200 <= response.status_code < 300 and not response.headers.get("x-sim-expected"):
+            stats["non_2xx"] += 1
+        return response
+
+    def missing() -> HTTPException:
+        # What a real agent answers for an absent container; the engine treats it as success.
+        return HTTPException(status_code=400, detail="No such container", headers={"X-Sim-Expected": "missing"})
+
+    def find(agent_id: int, ref: Optional[str]) -> Tuple[Optional[str], Optional[dict]]:
+        fleet = containers.get(agent_id, {})
+        if ref in fleet:
+            return ref, fleet[ref]
+        for name, container in fleet.items():
+            if container["id"] == ref:
+                return name, container
+        return None, None
+
+    def is_down(agent_id: int) -> bool:
+        return down_ratio > 0 and (agent_id * 2654435761 % 1000) / 1000 < down_ratio
+
+    async def simulate(agent_id: int) -> None:
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if is_down(agent_id) or rng.random() < failure_rate:
+            raise HTTPException(status_code=503, detail="simulated agent failure")
+
+    @app.get("/agents/{agent_id}/health")
+    async def health(agent_id: int):
+        await simulate(agent_id)
+        return {"status": "ok", "name": f"sim-{agent_id}"}
+
+    @app.get("/agents/{agent_id}/info")
+    async def info(agent_id: int):
+        await simulate(agent_id)
+        return {"hostname": f"sim-{agent_id}", "os": "sim", "ip_addresses": [], "docker_available": True}
+
+    @app.get("/agents/{agent_id}/metrics")
+    async def metrics(agent_id: int):
+        await simulate(agent_id)
+        running = sum(1 for c in containers.get(agent_id, {}).values() if c["state"] == "running")
+        return {
+            "cpu_percent": rng.uniform(5, 95),
+            "memory_percent": rng.uniform(20, 90),
+            "disk_percent": rng.uniform(10, 80),
+            "docker_running_containers": running,
+            "docker_total_containers": len(containers.get(agent_id, {})),
+        }
+
+    @app.post("/agents/{agent_id}/docker/run")
+    async def docker_run(agent_id: int, payload: dict):
+        await simulate(agent_id)
+        fleet = containers.setdefault(agent_id, {})
+        name = payload.get("name")
+        if name in fleet:
+            raise HTTPException(status_code=409, detail=f"Conflict. The container name {name} is already in use")
+        container_id = "%064x" % rng.getrandbits(256)
+        fleet[name or container_id] = {
+            "id": container_id,
+            "name": name,
+            "image": payload.get("image"),
+            "image_id": "sha256:%064x" % (hash(payload.get("image")) & (2**256 - 1)),
+            "state": "running",
+            "labels": payload.get("labels") or {},
+        }
+        return {"id": container_id, "timings": {}, "warm": False}
+
+    @app.post("/agents/{agent_id}/docker/pull")
+    async def docker_pull(agent_id: int, payload: dict):
+        await simulate(agent_id)
+        image = payload.get("image")
+        if not image:
+            raise HTTPException(status_code=400, detail="image required")
+        events = [{"status": f"Pulling from {image}"}, {"status": f"Status: Image is up to date for {image}"}]
+        return StreamingResponse(
+            (json.dumps(event) + "\n" for event in events), media_type="application/x-ndjson"
+        )
+
+    @app.get("/agents/{agent_id}/docker/inspect")
+    async def docker_inspect(agent_id: int, container: str):
+        await simulate(agent_id)
+        name, found = find(agent_id, container)
+        if not found:
+            return {"exists": False}
+        running = found["state"] == "running"
+        return {
+            "exists": True,
+            "id": found["id"],
+            "name": name,
+            "image_id": found["image_id"],
+            "state": found["state"],
+            "running": running,
+            # The engine's readiness wait polls until a healthcheck passes.
+            "health": "healthy" if running else None,
+            "exit_code": 0,
+        }
+
+    @app.post("/agents/{agent_id}/docker/rename")
+    async def docker_rename(agent_id: int, payload: dict):
+        await simulate(agent_id)
+        name, found = find(agent_id, payload.get("container"))
+        if not found:
+            raise missing()
+        fleet = containers[agent_id]
+        fleet[payload["name"]] = fleet.pop(name)
+        found["name"] = payload["name"]
+        return {"status": "renamed"}
+
+    @app.post("/agents/{agent_id}/docker/stop")
+    async def docker_stop(agent_id: int, payload: dict):
+        await simulate(agent_id)
+        _, found = find(agent_id, payload.get("container"))
+        if not found:
+            raise missing()
+        found["state"] = "exited"
+        return {"status": "stopped"}
+
+    @app.post("/agents/{agent_id}/docker/remove")
+    async def docker_remove(agent_id: int, payload: dict):
+        await simulate(agent_id)
+        name, found = find(agent_id, payload.get("container"))
+        if not found:
+            raise missing()
+        del containers[agent_id][name]
+        return {"status": "removed"}
+
+    @app.get("/agents/{agent_id}/docker/logs")
+    async def docker_logs(agent_id: int, container: str, tail: int = 200):
+        await simulate(agent_id)
+        return {"logs": "\n".join(f"{container} line {i}" for i in range(tail))}
+
+    @app.post("/agents/{agent_id}/docker/containers")
+    async def docker_containers(agent_id: int, payload: dict):
+        await simulate(agent_id)
+        items = list(containers.get(agent_id, {}).values())
+        return {"containers": items, "total": len(items), "next_offset": None}
+
+    return app, stats
+
+
+def start_sim_server(app, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name: str, latencies_ms: List[float], errors: int, wall_s: float) -> None:
+    ops = len(latencies_ms)
+    print(
+        f"{name:<14} ops={ops:<6} errors={errors:<5} wall={wall_s:7.2f}s "
+        f"throughput={ops / wall_s if wall_s else 0:8.1f}/s "
+        f"p50={percentile(latencies_ms, 50):7.1f}ms p95={percentile(latencies_ms, 95):7.1f}ms "
+        f"p99={percentile(latencies_ms, 99):7.1f}ms max={max(latencies_ms or [0]):7.1f}ms"
+    )
+
+
+def run_concurrently(func: Callable[[int], None], ids: List[int], concurrency: int):
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def task(item_id: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        failed = False
+        try:
+            func(item_id)
+        except Exception:  # pylint: disable=broad-except
+            failed = True
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            errors += int(failed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, ids))
+    return latencies, errors, time.perf_counter() - started
+
+
+def timed_wrapper(func, latencies: List[float], errors: List[int], failed: Callable[[Any], bool]):
+    # ping_server/collect_metrics swallow agent errors, so failures show up in
+    # their return value rather than as exceptions.
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            errors[0] += 1
+            raise
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+        errors[0] += int(failed(result))
+        return result
+
+    return wrapper
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", type=int, default=500)
+    parser.add_argument("--instances", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--down-ratio", type=float, default=0.0, help="fraction of agents that always fail")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--scenarios", default="health,deploy,logs")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="kws-loadtest-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/loadtest.db"
+    os.environ.setdefault("SERVER_PANEL_APP_DATA_PATH", os.path.join(workdir, "app-data"))
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import AppInstance, Application, Server, User
+    from app.services import logs_service, server_service
+    from app.services.deployment_engine import DeploymentEngine
+    from app.workers import server_health_worker
+
+    Base.metadata.create_all(bind=engine)
+    sim_app, sim_stats = build_sim_app(args.latency_ms, args.jitter_ms, args.failure_rate, args.down_ratio)
+    start_sim_server(sim_app, args.port)
+
+    def run_scenario(name: str, func: Callable[[int], None], ids: List[int]) -> None:
+        agent_errors = sim_stats["non_2xx"]
+        latencies, errors, wall = run_concurrently(func, ids, args.concurrency)
+        report(name, latencies, errors + sim_stats["non_2xx"] - agent_errors, wall)
+
+    with SessionLocal() as db:
+        user = User(email=f"loadtest-{time.time_ns()}@example.com", hashed_password="x", role="admin")
+        db.add(user)
+        db.flush()
+        application = Application(
+            name="Load test", slug=f"loadtest-{time.time_ns()}", type="static", created_by_user_id=user.id
+        )
+        db.add(application)
+        db.flush()
+        servers = [
+            Server(name=f"sim-{time.time_ns()}-{i}", agent_url=f"http://127.0.0.1:{args.port}/agents/{i}")
+            for i in range(args.servers)
+        ]
+        db.add_all(servers)
+        db.flush()
+        instances = [
+            AppInstance(
+                app_id=application.id,
+                server_id=servers[i % len(servers)].id,
+                display_name=f"instance-{i}",
+                internal_container_name=f"cp-loadtest-{application.id}-{i}",
+                docker_image="nginx:alpine",
+                env_vars={},
+            )
+            for i in range(args.instances)
+        ]
+        db.add_all(instances)
+        db.commit()
+        instance_ids = [instance.id for instance in instances]
+
+    print(
+        f"fleet: {args.servers} agents, {args.instances} instances, latency {args.latency_ms}±{args.jitter_ms}ms, "
+        f"failure rate {args.failure_rate}, down ratio {args.down_ratio}"
+    )
+    scenarios = set(args.scenarios.split(","))
+
+    if "health" in scenarios:
+        latencies: List[float] = []
+        errors = [0]
+        original_ping, original_collect = server_service.ping_server, server_service.collect_metrics
+        server_service.ping_server = timed_wrapper(
+            original_ping, latencies, errors, lambda result: (result or {}).get("status") != "ok"
+        )
+        server_service.collect_metrics = timed_wrapper(
+            original_collect, latencies, errors, lambda result: result is None
+        )
+        started = time.perf_counter()
+        try:
+            server_health_worker.run_server_health_checks()
+        finally:
+            server_service.ping_server, server_service.collect_metrics = original_ping, original_collect
+        report("health-check", latencies, errors[0], time.perf_counter() - started)
+
+    if "deploy" in scenarios:
+        deployment_engine = DeploymentEngine()
+        run_scenario("deploy", deployment_engine.deploy_app_instance, instance_ids)
+
+    if "logs" in scenarios:
+
+        def read_logs(instance_id: int) -> None:
+            with SessionLocal() as db:
+                logs_service.get_app_instance_logs(db, instance_id, tail=200)
+
+        run_scenario("logs", read_logs, instance_ids)
+
+
+if __name__ == "__main__":
+    main()